@@ -0,0 +1,231 @@
+"""
+⏱ Offline benchmark for message routing overhead
+
+Routes synthetic private messages (plain texts, menu buttons, commands,
+some from admins) through a Dispatcher with every router in main.py's
+order. An inner middleware records which handler won and returns without
+running it, so the numbers are pure dispatch cost: filters, routers and
+the fast path.
+
+    python -m benchmarks.bench_routing --routing chain --json > chain.json
+    python -m benchmarks.bench_routing --routing fast --baseline chain.json
+
+``chain`` is the plain router chain, ``fast`` adds the admin gate and the
+translate fast path. Routers are module-level objects, so each run
+measures one mode. Both modes must pick the same handlers; the report
+lists the winners.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Message routing benchmark")
+    parser.add_argument("--routing", choices=("chain", "fast"), default="fast")
+    parser.add_argument("--updates", type=int, default=20000, help="measured updates")
+    parser.add_argument("--warmup", type=int, default=1000, help="updates before measuring")
+    parser.add_argument("--buttons", type=float, default=0.1, help="share of menu button texts")
+    parser.add_argument("--commands", type=float, default=0.05, help="share of commands")
+    parser.add_argument("--admins", type=float, default=0.01, help="share of updates from admins")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    return parser.parse_args()
+
+
+def prepare_environment():
+    """Must run before config is imported"""
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK-OFFLINE-TOKEN")
+    os.environ.setdefault("DBTYPE", "sqlite")
+    if os.environ["DBTYPE"].lower() != "postgres":
+        os.environ.setdefault("DB_NAME", os.path.join(tempfile.mkdtemp(prefix="tarjimon-bench-"), "bench.db"))
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("ADMINS_ID", "1")
+
+
+PLAIN_TEXTS = [
+    "Hello, how are you?",
+    "The weather is nice today and we are going to the park.",
+    "Could you please send me the report by Friday?",
+    "I am learning new words every day.",
+]
+
+BUTTON_TEXTS = [
+    "🌐 Tilni tanlash",
+    "📝 Tarjima qilish",
+    "📅 Dars jadvali",
+    "ℹ️ Yordam",
+    "📚 Lug'atlar va Mashqlar",
+    "👤 Profil",
+]
+
+COMMANDS = ["/start", "/help", "/lang", "/history", "/profile", "/jadval"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    from aiogram import Dispatcher
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.types import Chat, Message, Update, User
+
+    from config import bot, ADMIN_ID
+    from src.handlers.admins.admin import admin_router
+    from src.handlers.admins.messages import msg_router
+    from src.handlers.admins.enhanced_admin import enhanced_admin_router
+    from src.handlers.admins.admin_panel_complete import admin_complete_router
+    from src.handlers.users.users import user_router
+    from src.handlers.users.enhanced_user_panel import enhanced_user_router
+    from src.handlers.users.callback_handlers import callback_router
+    from src.handlers.users.translate import translate_router
+    from src.handlers.users.inline_translate import inline_router
+    from src.handlers.users.lughatlar import lughatlar_router
+    from src.handlers.others.channels import channel_router
+    from src.handlers.others.groups import group_router
+    from src.handlers.others.other import other_router
+    from src.handlers.routing import AdminGate, RouteTable
+    from src.middlewares.fast_path_middleware import FastPathMiddleware
+
+    admin_routers = (admin_complete_router, enhanced_admin_router, admin_router, msg_router)
+    user_routers = (
+        enhanced_user_router, callback_router, user_router, inline_router, lughatlar_router,
+        translate_router, channel_router, group_router, other_router,
+    )
+
+    dp = Dispatcher(storage=MemoryStorage())
+    if args.routing == "fast":
+        dp.include_router(AdminGate(*admin_routers))
+    else:
+        dp.include_routers(*admin_routers)
+    dp.include_routers(*user_routers)
+
+    table = None
+    if args.routing == "fast":
+        table = RouteTable.compile(dp, translate_router)
+        if not table.enabled:
+            raise SystemExit(f"Fast path disabled: {table.disabled_reason}")
+        dp.message.outer_middleware(FastPathMiddleware(table))
+
+    winners = Counter()
+
+    async def record_winner(handler, event, data):
+        """Inner middleware: runs after filters matched; the handler itself is skipped"""
+        callback = data["handler"].callback
+        winners[getattr(callback, "__name__", repr(callback))] += 1
+
+    dp.message.middleware(record_winner)
+
+    rnd = random.Random(args.seed)
+    counter = iter(range(1, 10 ** 9))
+    admin_id = ADMIN_ID[0]
+
+    def make_update():
+        n = next(counter)
+        uid = admin_id if rnd.random() < args.admins else 10_000_000 + rnd.randrange(1000)
+        roll = rnd.random()
+        if roll < args.buttons:
+            text = rnd.choice(BUTTON_TEXTS)
+        elif roll < args.buttons + args.commands:
+            text = rnd.choice(COMMANDS)
+        else:
+            text = rnd.choice(PLAIN_TEXTS)
+        return Update(
+            update_id=n,
+            message=Message(
+                message_id=n,
+                date=datetime.now(),
+                chat=Chat(id=uid, type="private"),
+                from_user=User(id=uid, is_bot=False, first_name=f"User{uid}", language_code="uz"),
+                text=text,
+            ),
+        )
+
+    for _ in range(args.warmup):
+        await dp.feed_update(bot, make_update())
+    winners.clear()
+
+    updates = [make_update() for _ in range(args.updates)]
+    latencies = []
+    started = time.perf_counter()
+    for update in updates:
+        t = time.perf_counter()
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "routing": args.routing,
+        "updates": args.updates,
+        "updates_per_sec": round(args.updates / elapsed, 1),
+        "mean_us": round(elapsed / args.updates * 1e6, 1),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 1),
+        "table": table.describe() if table else None,
+        "winners": dict(winners.most_common()),
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"\n⏱ Message routing ({result['routing']}, {result['updates']} updates)")
+    if result["table"]:
+        print(f"  route table        {result['table']}")
+    rows = [
+        ("updates/s", "updates_per_sec", True),
+        ("mean µs/update", "mean_us", False),
+        ("p50 µs", "p50_us", False),
+        ("p99 µs", "p99_us", False),
+    ]
+    for label, key, higher_is_better in rows:
+        line = f"  {label:<18} {result[key]:>10}"
+        if baseline and baseline.get(key):
+            change = (result[key] - baseline[key]) / baseline[key] * 100
+            better = change > 0 if higher_is_better else change < 0
+            line += f"   ({change:+.1f}% vs {baseline['routing']} {baseline[key]}{' ✅' if better else ''})"
+        print(line)
+    print("  handlers:")
+    for name, count in result["winners"].items():
+        line = f"    {count:>7}× {name}"
+        if baseline and baseline["winners"].get(name) != count:
+            line += f"   (⚠️ {baseline['routing']}: {baseline['winners'].get(name, 0)})"
+        print(line)
+
+
+def main():
+    args = parse_args()
+    prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    if args.json:
+        # Import va migratsiya print'lari JSON natijani buzmasligi uchun
+        with contextlib.redirect_stdout(sys.stderr):
+            result = asyncio.run(run(args))
+    else:
+        result = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+⏱ Offline benchmark for the translate hot path
+
+Feeds synthetic text-message Updates through a Dispatcher wired like
+main.py (ordering + analytics + metrics middlewares, translate_router).
+Telegram is replaced by a fake bot session and the translation provider by
+a stub, so the numbers only reflect our own code and the database.
+
+    python -m benchmarks.bench_translate                      # temp SQLite
+    DBTYPE=postgres DB_NAME=tarjimon_bench python -m benchmarks.bench_translate
+    python -m benchmarks.bench_translate --json > base.json
+    python -m benchmarks.bench_translate --baseline base.json
+
+Reports updates/s, p50/p95/p99 latency, DB queries and Bot API calls per
+update.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Translate hot path benchmark")
+    parser.add_argument("--updates", type=int, default=3000, help="measured updates")
+    parser.add_argument("--warmup", type=int, default=200, help="updates before measuring")
+    parser.add_argument("--users", type=int, default=1000, help="distinct synthetic users")
+    parser.add_argument("--concurrency", type=int, default=1, help="updates processed at once")
+    parser.add_argument("--translate-ms", type=float, default=0.0, help="stub provider latency")
+    parser.add_argument("--log-level", default="WARNING", help="level for the bot's named loggers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    return parser.parse_args()
+
+
+def prepare_environment():
+    """Must run before config is imported"""
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK-OFFLINE-TOKEN")
+    os.environ.setdefault("DBTYPE", "sqlite")
+    if os.environ["DBTYPE"].lower() != "postgres":
+        os.environ.setdefault("DB_NAME", os.path.join(tempfile.mkdtemp(prefix="tarjimon-bench-"), "bench.db"))
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("ADMINS_ID", "1")
+
+
+SAMPLE_TEXTS = [
+    "Hello, how are you?",
+    "The weather is nice today and we are going to the park.",
+    "Could you please send me the report by Friday?",
+    "I am learning new words every day.",
+    "Translation bots are useful for students and travellers alike. " * 3,
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Chat, Message, Update, User
+
+    from config import bot, dp, sql, db, DB_TYPE
+    from src.db import query_tracer
+    from src.db.migration_runner import run_migrations
+    from src.handlers.users import translate as translate_module
+    from src.handlers.setup import setup_dispatcher
+    from src.handlers.users.translate import translate_router
+    from src.utils.rate_limiter import rate_limiter
+
+    for name in ("bot", "database", "translate", "users", "admin"):
+        logging.getLogger(name).setLevel(args.log_level.upper())
+
+    class FakeSession(BaseSession):
+        """Answers Bot API calls locally"""
+
+        def __init__(self):
+            super().__init__()
+            self.calls = Counter()
+            self._message_id = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+            if method.__returning__ is Message:
+                self._message_id += 1
+                chat_id = getattr(method, "chat_id", 0)
+                return Message(
+                    message_id=self._message_id,
+                    date=datetime.now(),
+                    chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+                    text=getattr(method, "text", None),
+                ).as_(bot)
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    class StubTranslator:
+        def __init__(self, source, target):
+            self.target = target
+
+        def translate(self, text):
+            if args.translate_ms:
+                time.sleep(args.translate_ms / 1000)
+            return f"[{self.target}] {text[::-1]}"
+
+    session = FakeSession()
+    bot.session = session
+    translate_module.deep_translator = type("deep_translator", (), {"GoogleTranslator": StubTranslator})
+
+    # Schema + seed data
+    await run_migrations()
+    user_ids = [10_000_000 + i for i in range(args.users)]
+    for uid in user_ids:
+        sql.execute(
+            "INSERT INTO user_languages (user_id, from_lang, to_lang) VALUES (%s, %s, %s) "
+            "ON CONFLICT (user_id) DO NOTHING",
+            (uid, "en", "uz")
+        )
+    db.commit()
+
+    route_table = setup_dispatcher(dp, user_routers=(translate_router,))
+
+    rnd = random.Random(args.seed)
+    counter = iter(range(1, 10 ** 9))
+
+    def make_update():
+        uid = rnd.choice(user_ids)
+        n = next(counter)
+        return Update(
+            update_id=n,
+            message=Message(
+                message_id=n,
+                date=datetime.now(),
+                chat=Chat(id=uid, type="private"),
+                from_user=User(id=uid, is_bot=False, first_name=f"User{uid}", language_code="uz"),
+                text=rnd.choice(SAMPLE_TEXTS),
+            ),
+        )
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def feed(update, measure):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                errors += 1
+            if measure:
+                latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(feed(make_update(), False) for _ in range(args.warmup)))
+
+    rate_limiter.users.clear()
+    session.calls.clear()
+    queries_before = query_tracer.summary()["count"]
+    errors = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(feed(make_update(), True) for _ in range(args.updates)))
+    elapsed = time.perf_counter() - started
+
+    queries = query_tracer.summary()["count"] - queries_before
+    return {
+        "db": DB_TYPE,
+        "updates": args.updates,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(args.updates / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_update": round(queries / args.updates, 2),
+        "api_calls_per_update": round(sum(session.calls.values()) / args.updates, 2),
+        "api_calls": dict(session.calls),
+        "errors": errors,
+        "fast_path": route_table.describe() if route_table.enabled else route_table.disabled_reason,
+        "top_queries": [
+            {"fingerprint": s.fingerprint, "count": s.count, "total_ms": round(s.total * 1000, 1)}
+            for s in query_tracer.top_queries(5)
+        ],
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"\n⏱ Translate hot path ({result['db']}, {result['updates']} updates, "
+          f"{result['users']} users, concurrency {result['concurrency']})")
+    rows = [
+        ("updates/s", "updates_per_sec", True),
+        ("p50 ms", "p50_ms", False),
+        ("p95 ms", "p95_ms", False),
+        ("p99 ms", "p99_ms", False),
+        ("queries/update", "queries_per_update", False),
+        ("api calls/update", "api_calls_per_update", False),
+    ]
+    for label, key, higher_is_better in rows:
+        line = f"  {label:<18} {result[key]:>10}"
+        if baseline and baseline.get(key):
+            change = (result[key] - baseline[key]) / baseline[key] * 100
+            better = change > 0 if higher_is_better else change < 0
+            line += f"   ({change:+.1f}% vs baseline {baseline[key]}{' ✅' if better else ''})"
+        print(line)
+    print(f"  errors             {result['errors']:>10}")
+    print(f"  fast path          {result['fast_path']}")
+    print("  top queries:")
+    for q in result["top_queries"]:
+        print(f"    {q['count']:>6}× {q['total_ms']:>9.1f} ms  {q['fingerprint'][:90]}")
+
+
+def main():
+    args = parse_args()
+    prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    if args.json:
+        # Migratsiya va boshqa print'lar JSON natijani buzmasligi uchun
+        with contextlib.redirect_stdout(sys.stderr):
+            result = asyncio.run(run(args))
+    else:
+        result = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+⏱ Offline benchmark for admin user search
+
+Fills ``users`` with synthetic users (Uzbek first/last names, random
+usernames and ids) and times first pages and deep keyset pages of
+src/utils/user_search.py, next to the old ``username ILIKE '%q%'`` scan.
+
+    python -m benchmarks.bench_user_search --users 1000000     # temp SQLite
+    DBTYPE=postgres DB_NAME=tarjimon_bench python -m benchmarks.bench_user_search
+
+Reports p50/p99 latency per query kind.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Admin user search benchmark")
+    parser.add_argument("--users", type=int, default=200000, help="synthetic users to insert")
+    parser.add_argument("--repeat", type=int, default=20, help="searches per query")
+    parser.add_argument("--pages", type=int, default=20, help="pages followed in the deep paging run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args()
+
+
+def prepare_environment():
+    """Must run before config is imported"""
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK-OFFLINE-TOKEN")
+    os.environ.setdefault("DBTYPE", "sqlite")
+    if os.environ["DBTYPE"].lower() != "postgres":
+        os.environ.setdefault("DB_NAME", os.path.join(tempfile.mkdtemp(prefix="tarjimon-bench-"), "bench.db"))
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("ADMINS_ID", "1")
+
+
+FIRST_NAMES = ["Ali", "Alisher", "Aziz", "Bobur", "Dilnoza", "Jasur", "Kamola", "Malika", "Sardor", "Алишер"]
+LAST_NAMES = [None, "Karimov", "Aliyev", "Toshmatov", "Rahimova", "Yusupov"]
+
+QUERIES = {
+    "id exact": None,  # birinchi qo'shilgan foydalanuvchi ID'si
+    "id prefix": "12",
+    "username exact": None,
+    "common prefix": "ali",
+    "short prefix": "a",
+    "substring": "sher",
+    "cyrillic": "Алиш",
+    "no match": "zzqqxx",
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def fill_users(count: int, rnd: random.Random):
+    from config import db, sql
+
+    sql.execute("SELECT COUNT(*) FROM users")
+    existing = sql.fetchone()[0]
+    rows = []
+    for user_id in rnd.sample(range(10 ** 8, 8 * 10 ** 9), count):
+        username = None
+        if rnd.random() < 0.7:
+            username = "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(5, 12)))
+        rows.append((user_id, rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES), username))
+
+    if existing < count:
+        cur = db.cursor()
+        for i in range(0, len(rows), 10000):
+            cur.executemany(
+                "INSERT INTO users (user_id, first_name, last_name, username) VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (user_id) DO NOTHING",
+                rows[i:i + 10000]
+            )
+            db.commit()
+    return rows
+
+
+async def run(args):
+    from config import db
+    from src.db.migration_runner import run_migrations
+    from src.utils.user_search import search_users
+
+    await run_migrations()
+    rnd = random.Random(args.seed)
+    rows = fill_users(args.users, rnd)
+    queries = dict(QUERIES)
+    queries["id exact"] = str(rows[0][0])
+    queries["username exact"] = next(row[3] for row in rows if row[3])
+
+    columns = ("user_id", "first_name", "username", "created_at")
+    result = {"users": args.users, "queries": {}}
+    for kind, query in queries.items():
+        latencies = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            await search_users(query, columns)
+            latencies.append(time.perf_counter() - t)
+
+        deep, after = [], None
+        for _ in range(args.pages):
+            t = time.perf_counter()
+            _, after = await search_users(query, columns, after=after)
+            deep.append(time.perf_counter() - t)
+            if after is None:
+                break
+
+        def scan():
+            cur = db.cursor()
+            cur.execute("SELECT user_id, first_name, username, created_at FROM users "
+                        "WHERE username ILIKE %s LIMIT 5", (f"%{query}%",))
+            return cur.fetchall()
+
+        t = time.perf_counter()
+        await asyncio.to_thread(scan)
+        scan_ms = (time.perf_counter() - t) * 1000
+
+        result["queries"][kind] = {
+            "query": query,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "deep_max_ms": round(max(deep) * 1000, 2),
+            "pages": len(deep),
+            "old_scan_ms": round(scan_ms, 2),
+        }
+    return result
+
+
+def print_report(result):
+    print(f"\n⏱ Admin user search ({result['users']} users)")
+    print(f"  {'kind':<16} {'query':<12} {'p50 ms':>8} {'p99 ms':>8} {'deep ms':>8} {'pages':>6} {'old ILIKE ms':>13}")
+    for kind, row in result["queries"].items():
+        print(f"  {kind:<16} {row['query']:<12} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+              f"{row['deep_max_ms']:>8} {row['pages']:>6} {row['old_scan_ms']:>13}")
+
+
+def main():
+    args = parse_args()
+    prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # Import va migratsiya print'lari natijani buzmasligi uchun
+    with contextlib.redirect_stdout(sys.stderr):
+        result = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 
+from src.db import query_tracer
+
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
@@ -28,44 +30,30 @@ if DB_TYPE == "postgres":
         "port": DB_PORT
     }
     db = psycopg2.connect(
-        database=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT)
+        database=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT,
+        cursor_factory=query_tracer.psycopg2_cursor_factory())
     db.autocommit = True
     sql = db.cursor()
     print(f"[DB] Using PostgreSQL database: {DB_NAME}")
     
 else:
-    # SQLite support (fallback)
-    import sqlite3
+    # SQLite: WAL, har bir thread uchun alohida ulanish, Postgres dialekti tarjimasi
+    from src.db.sqlite_backend import SQLiteDatabase, SharedCursor
     DB_NAME = os.getenv("DB_NAME", "tarjimon4.db")
-    db = sqlite3.connect(DB_NAME, check_same_thread=False)
-    db.row_factory = sqlite3.Row
-    cursor = db.cursor()
-    
-    class SQLiteCursor:
-        def __init__(self, cursor):
-            self.cursor = cursor
-        def execute(self, query, params=None):
-            sqlite_query = query.replace('%s', '?')
-            if 'RETURNING' in sqlite_query.upper():
-                sqlite_query = sqlite_query.split('RETURNING')[0].strip()
-            if params:
-                return self.cursor.execute(sqlite_query, params)
-            return self.cursor.execute(sqlite_query)
-        def fetchone(self):
-            row = self.cursor.fetchone()
-            return tuple(row) if row else None
-        def fetchall(self):
-            return [tuple(row) for row in self.cursor.fetchall()]
-        @property
-        def rowcount(self):
-            return self.cursor.rowcount
-    
-    sql = SQLiteCursor(cursor)
+    db = SQLiteDatabase(DB_NAME)
+    sql = SharedCursor(db)
     DB_CONFIG = {"dbname": DB_NAME, "user": "", "password": "", "host": "", "port": ""}
     print(f"[DB] Using SQLite database: {DB_NAME}")
 
 ADMIN_ID = ADMINS = [int(admin_id) for admin_id in os.getenv("ADMINS_ID", "1918760732").split(",")]
 
+# Dars jadvali guruhlari: "Guruh nomi=fayl_nomi;Guruh nomi=fayl_nomi"
+TIMETABLE_GROUPS = dict(
+    item.rsplit("=", 1) for item in os.getenv("TIMETABLE_GROUPS", "MMF 2/56-24 MexM (o'z)=56-24").split(";")
+    if "=" in item
+)
+TIMETABLE_REFRESH_HOURS = float(os.getenv("TIMETABLE_REFRESH_HOURS", "6"))
+
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(link_preview_is_disabled=True))
 storage = MemoryStorage()
 dp = Dispatcher(storage=storage)
@@ -7,17 +7,18 @@ import asyncio
 import logging
 import sys
 
-from config import dp, bot, ADMIN_ID
+# Startup profiler (PROFILE_STARTUP=1) boshqa importlardan oldin o'rnatiladi
+from src.utils import startup_profiler
+startup_profiler.install()
+
+from config import dp, bot, db, ADMIN_ID
 
 # Database initialization
-from src.db.init_db import create_all_base, init_languages_table, create_indexes_and_constraints
-from src.db.enhanced_schema import DatabaseManager
-from src.db.migrate_add_created_at import run_all_migrations
-from src.db.comprehensive_schema import create_comprehensive_schema, init_default_achievements
+from src.db.migration_runner import run_migrations
 
 # Admin handlers
 from src.handlers.admins.admin import admin_router
-from src.handlers.admins.messages import msg_router
+from src.handlers.admins.messages import msg_router, resume_broadcast
 from src.handlers.admins.enhanced_admin import enhanced_admin_router
 from src.handlers.admins.admin_panel_complete import admin_complete_router
 
@@ -27,7 +28,7 @@ from src.handlers.users.enhanced_user_panel import enhanced_user_router
 from src.handlers.users.callback_handlers import callback_router
 from src.handlers.users.translate import translate_router
 from src.handlers.users.inline_translate import inline_router
-from src.handlers.users.timetable import *
+from src.handlers.users.timetable import timetable_refresher
 
 # Vocabulary handlers
 from src.handlers.users.lughatlar import lughatlar_router  # Combined router for all vocabulary features
@@ -37,19 +38,21 @@ from src.handlers.others.channels import channel_router
 from src.handlers.others.groups import group_router
 from src.handlers.others.other import other_router
 
-# Middleware
-from src.middlewares.middleware import RegisterUserMiddleware
-from src.middlewares.comprehensive_middleware import ComprehensiveUserMiddleware
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Middlewares + routers + translate fast path (shared with the benchmarks)
+from src.handlers.setup import setup_dispatcher
+
+from src.utils.logger import configure_logging, stop_logging
+from src.utils.lifecycle import lifecycle
+from src.utils.metrics import start_metrics_server, stop_metrics_server
+from src.utils.session_tracker import session_tracker
+from src.utils.xp_ledger import xp_ledger
+from src.utils.streak_service import streak_service
+from src.utils.challenge_service import challenge_service
+from src.utils.scheduler import scheduler
+from src.utils.scheduled_jobs import register_default_jobs
+
+# Configure logging (queue + background listener, see src/utils/logger.py)
+configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -58,56 +61,49 @@ async def on_startup() -> None:
     logger.info("[START] Starting Tarjimon Bot...")
     
     try:
-        # 1. Create COMPREHENSIVE analytics schema (NEW)
-        logger.info("[DB] Creating comprehensive analytics schema...")
-        await create_comprehensive_schema()
-        
-        # 2. Initialize default achievements
-        logger.info("[DB] Initializing achievements...")
-        await init_default_achievements()
-        
-        # 3. Create basic tables (legacy support)
-        logger.info("[DB] Creating legacy tables...")
-        await create_all_base()
-        
-        # 4. Run legacy migrations
-        logger.info("[DB] Running legacy migrations...")
-        run_all_migrations()
-        
-        # 5. Create enhanced tables (legacy support)
-        logger.info("[DB] Creating enhanced schema (legacy)...")
-        await DatabaseManager.create_enhanced_tables()
-        
-        # 6. Initialize languages
-        logger.info("[DB] Initializing languages...")
-        init_languages_table()
-        
-        # 7. Create indexes
-        logger.info("[DB] Creating indexes...")
-        create_indexes_and_constraints()
-        
-        # 8. Create essential and parallel vocabulary tables
-        logger.info("[DB] Creating vocabulary tables...")
-        try:
-            from src.handlers.users.lughatlar.essential import create_essential_tables, init_essential_series
-            await create_essential_tables()
-            await init_essential_series()
-            logger.info("[OK] Essential tables created")
-        except Exception as e:
-            logger.warning(f"[WARN] Essential tables: {e}")
-        
-        try:
-            from src.handlers.users.lughatlar.parallel import create_parallel_tables, init_parallel_series
-            await create_parallel_tables()
-            await init_parallel_series()
-            logger.info("[OK] Parallel tables created")
-        except Exception as e:
-            logger.warning(f"[WARN] Parallel tables: {e}")
-        
-        # 9. Generate daily challenge
-        from src.utils.gamification import DailyChallengeManager
-        DailyChallengeManager.generate_daily_challenge()
-        
+        # 1. Apply pending schema migrations (no-op when already current)
+        logger.info("[DB] Checking schema migrations...")
+        applied = await run_migrations()
+        logger.info(f"[OK] Schema migrations applied: {applied}")
+
+        # 2. Load Essential/Parallel content into memory
+        from src.handlers.users.lughatlar.content_index import rebuild_content_index
+        await rebuild_content_index()
+        logger.info("[OK] Course content index loaded")
+
+        # 3. Start background timetable refresher
+        timetable_refresher.start()
+        logger.info("[OK] Timetable refresher started")
+
+        # 4. Today's daily challenge (cached, rolled over at midnight)
+        challenge = await challenge_service.rollover()
+        challenge_service.start()
+        logger.info(f"[OK] Daily challenge: {challenge.title if challenge else 'none'}")
+
+        # Today's streak check-ins (later events skip the DB)
+        checked_in = await streak_service.load()
+        logger.info(f"[OK] Streak check-ins loaded: {checked_in}")
+
+        # 5. In-memory session tracker (batched writes)
+        session_tracker.start()
+
+        # 6. XP ledger (awards applied in batches)
+        xp_ledger.start()
+
+        # 7. Periodic jobs (rankings, history trim, challenge rollover)
+        register_default_jobs(scheduler)
+        scheduler.start()
+        logger.info(f"[OK] Scheduler started: {', '.join(scheduler.jobs)}")
+
+        # 8. Prometheus metrics endpoint (METRICS_PORT=0 o'chiradi)
+        metrics_url = await start_metrics_server()
+        if metrics_url:
+            logger.info(f"[OK] Metrics endpoint: {metrics_url}")
+
+        # 9. Broadcast paused by the previous shutdown
+        if await resume_broadcast():
+            logger.info("[OK] Paused broadcast resumed")
+
         logger.info("[OK] Database initialization complete!")
         logger.info("[OK] Comprehensive analytics system ready!")
         
@@ -116,15 +112,29 @@ async def on_startup() -> None:
         raise
 
 
+def register_shutdown_hooks() -> None:
+    """Stop order: background jobs, then write-behind buffers, then connections"""
+    lifecycle.on_stop("jobs", "scheduler", scheduler.stop)
+    lifecycle.on_stop("jobs", "timetable refresher", timetable_refresher.stop)
+    lifecycle.on_stop("buffers", "session tracker", session_tracker.stop)
+    lifecycle.on_stop("buffers", "daily challenges", challenge_service.stop)
+    lifecycle.on_stop("buffers", "XP ledger", xp_ledger.stop)  # challenge mukofotlaridan keyin
+    lifecycle.on_stop("pools", "metrics server", stop_metrics_server)
+    lifecycle.on_stop("pools", "bot session", bot.session.close)
+    lifecycle.on_stop("pools", "database", db.close)
+
+
 async def on_shutdown() -> None:
-    """Cleanup on shutdown"""
+    """Drain in-flight updates, flush buffers, close connections"""
     logger.info("[STOP] Shutting down bot...")
     
     try:
-        await bot.session.close()
+        await lifecycle.shutdown(dp)
         logger.info("[OK] Shutdown complete")
     except Exception as e:
         logger.error(f"Shutdown error: {e}")
+    finally:
+        stop_logging()
 
 
 async def main():
@@ -132,43 +142,27 @@ async def main():
     
     # Startup
     await on_startup()
-    
 
-    
-    # Register middlewares
-    dp.update.middleware(ComprehensiveUserMiddleware())  # New comprehensive tracking
-    logger.info("[INIT] Comprehensive analytics middleware registered")
-    
-    # ==================== ROUTER REGISTRATION ====================
-    
-    # Admin routers (check admin privileges first)
-    logger.info("[INIT] Registering admin routers...")
-    dp.include_router(admin_complete_router)  # Complete working admin panel
-    dp.include_router(enhanced_admin_router)  # New enhanced admin panel
-    dp.include_router(admin_router)           # Original admin panel
-    dp.include_router(msg_router)             # Broadcasting
-    
-    # # User routers
-    # logger.info("[INIT] Registering user routers...")
-    # dp.include_router(enhanced_user_router)   # New enhanced user panel
-    # dp.include_router(callback_router)        # Callback handlers for inline keyboards
-    # dp.include_router(user_router)            # Original user handlers
-    # dp.include_router(inline_router)          # Inline mode
-    #
-    # # Vocabulary routers (combined router includes all vocabulary sub-routers)
-    # logger.info("[INIT] Registering vocabulary routers...")
-    # dp.include_router(lughatlar_router)       # Includes: vocabs, lughatlarim, mashqlar, ommaviylar, essential, parallel
-    #
-    #
-    # dp.include_router(translate_router)       # Translation handlers
-    #
-    # # Other routers
-    # logger.info("[INIT] Registering other routers...")
-    # dp.include_router(channel_router)         # Channel management
-    # dp.include_router(group_router)           # Group handlers
-    # dp.include_router(other_router)           # Miscellaneous
-    #
-    # logger.info("[OK] All routers registered successfully!")
+    profile_report = startup_profiler.finish_and_report()
+    if profile_report:
+        logger.info("\n" + profile_report)
+
+    # Shutdown hook (drain, flush buffers, close connections)
+    register_shutdown_hooks()
+    dp.shutdown.register(on_shutdown)
+
+    # Middlewares, admin gate, user routers, translate fast path
+    setup_dispatcher(dp, user_routers=(
+        # enhanced_user_router,   # New enhanced user panel
+        # callback_router,        # Callback handlers for inline keyboards
+        # user_router,            # Original user handlers
+        # inline_router,          # Inline mode
+        # lughatlar_router,       # Includes: vocabs, lughatlarim, mashqlar, ommaviylar, essential, parallel
+        # translate_router,       # Translation handlers
+        # channel_router,         # Channel management
+        # group_router,           # Group handlers
+        # other_router,           # Miscellaneous
+    ))
     
     # Start polling
     logger.info("[START] Starting polling...")
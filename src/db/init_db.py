@@ -162,6 +162,24 @@ async def create_all_base():
     )""")
     db.commit()
 
+    # 12) Vocab Review Queue - takrorlash navbati (spaced repetition)
+    sql.execute("""
+    CREATE TABLE IF NOT EXISTS vocab_review_queue (
+        user_id BIGINT NOT NULL,
+        entry_id INTEGER NOT NULL,
+        book_id INTEGER NOT NULL,
+        due_at TIMESTAMP NOT NULL,
+        interval_days INTEGER DEFAULT 0,
+        repetitions INTEGER DEFAULT 0,
+        lapses INTEGER DEFAULT 0,
+        last_reviewed_at TIMESTAMP,
+        PRIMARY KEY (user_id, entry_id),
+        CONSTRAINT fk_review_entry FOREIGN KEY (entry_id) REFERENCES vocab_entries(id) ON DELETE CASCADE
+    )""")
+    sql.execute("CREATE INDEX IF NOT EXISTS idx_review_queue_due ON vocab_review_queue(user_id, book_id, due_at)")
+    sql.execute("CREATE INDEX IF NOT EXISTS idx_vocab_entries_book_id ON vocab_entries(book_id, id)")
+    db.commit()
+
     print("[OK] Barcha jadvallar muvaffaqiyatli yaratildi!")
     try:
         await create_parallel_tables()
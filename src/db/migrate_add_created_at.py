@@ -1,19 +1,34 @@
 """
 Migration: Add missing columns to accounts table and create accounts_status table
-PostgreSQL version
+PostgreSQL version (SQLite: catalog lookups via sqlite_master / pragma_table_info)
 """
-from config import db, sql
+from config import db, sql, DB_TYPE
+
+
+def _table_exists(table: str) -> bool:
+    if DB_TYPE == "postgres":
+        sql.execute("SELECT table_name FROM information_schema.tables WHERE table_name = %s", (table,))
+    else:
+        sql.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    return sql.fetchone() is not None
+
+
+def _column_exists(table: str, column: str) -> bool:
+    if DB_TYPE == "postgres":
+        sql.execute("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = %s AND column_name = %s
+        """, (table, column))
+    else:
+        sql.execute("SELECT name FROM pragma_table_info(%s) WHERE name = %s", (table, column))
+    return sql.fetchone() is not None
 
 
 def create_accounts_status_table():
     """Create accounts_status table for daily statistics"""
     try:
-        sql.execute("""
-            SELECT table_name FROM information_schema.tables 
-            WHERE table_name = 'accounts_status'
-        """)
-        
-        if not sql.fetchone():
+        if not _table_exists('accounts_status'):
             print("[MIGRATION] Creating accounts_status table...")
             sql.execute("""
                 CREATE TABLE IF NOT EXISTS accounts_status (
@@ -46,13 +61,7 @@ def add_missing_columns_to_accounts():
     
     try:
         for col_name, col_type in columns_to_add:
-            sql.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'accounts' AND column_name = %s
-            """, (col_name,))
-            
-            if not sql.fetchone():
+            if not _column_exists('accounts', col_name):
                 print(f"[MIGRATION] Adding {col_name} column to accounts table...")
                 sql.execute(f"""
                     ALTER TABLE accounts 
@@ -0,0 +1,137 @@
+"""
+🧱 Versioned schema migrations for Tarjimon Bot
+
+Applied migrations are recorded in ``schema_version`` together with a
+checksum of the migration file. On startup a single SELECT compares the
+recorded versions with the files in ``src/db/migrations``; when nothing is
+pending no DDL is executed at all.
+"""
+
+import hashlib
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import db, sql, DB_TYPE
+
+import src.db.migrations as migrations_pkg
+
+# pg_advisory_lock kaliti (bir vaqtda ikki instance migratsiya qilmasligi uchun)
+MIGRATION_LOCK_KEY = 7_310_432
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    checksum: str
+    module: str
+
+
+def discover_migrations() -> List[Migration]:
+    """Find migration modules and compute their checksums (no imports yet)"""
+    pkg_dir = Path(migrations_pkg.__file__).parent
+    found = []
+    for info in pkgutil.iter_modules([str(pkg_dir)]):
+        if not info.name.startswith("m") or "_" not in info.name:
+            continue
+        prefix, _, name = info.name.partition("_")
+        try:
+            version = int(prefix[1:])
+        except ValueError:
+            continue
+        source = (pkg_dir / f"{info.name}.py").read_bytes()
+        found.append(Migration(
+            version=version,
+            name=name,
+            checksum=hashlib.sha256(source).hexdigest(),
+            module=f"{migrations_pkg.__name__}.{info.name}",
+        ))
+
+    found.sort(key=lambda m: m.version)
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return found
+
+
+def _applied_versions() -> Dict[int, str]:
+    """Read applied migrations; creates schema_version on first run"""
+    try:
+        sql.execute("SELECT version, checksum FROM schema_version")
+        return {row[0]: row[1] for row in sql.fetchall()}
+    except Exception:
+        if DB_TYPE == "postgres":
+            db.rollback()
+        sql.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(200) NOT NULL,
+                checksum VARCHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        db.commit()
+        return {}
+
+
+def pending_migrations() -> Tuple[List[Migration], List[Migration]]:
+    """
+    Returns:
+        (pending, changed) - not yet applied, and applied but edited since
+    """
+    applied = _applied_versions()
+    pending, changed = [], []
+    for migration in discover_migrations():
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            changed.append(migration)
+    return pending, changed
+
+
+async def run_migrations() -> int:
+    """
+    Apply pending migrations in order
+
+    Returns:
+        Number of migrations applied (0 when the schema is already current)
+    """
+    pending, changed = pending_migrations()
+
+    for migration in changed:
+        print(f"[MIGRATION WARN] m{migration.version:04d}_{migration.name} changed after it was applied "
+              f"(checksum mismatch) - add a new migration instead of editing it")
+
+    if not pending:
+        print("[MIGRATION] Schema is up to date")
+        return 0
+
+    locked = False
+    if DB_TYPE == "postgres":
+        sql.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        locked = True
+
+    try:
+        # Lock olinguncha boshqa instance qo'llagan bo'lishi mumkin
+        if locked:
+            pending, _ = pending_migrations()
+
+        for migration in pending:
+            print(f"[MIGRATION] Applying m{migration.version:04d}_{migration.name}...")
+            module = importlib.import_module(migration.module)
+            await module.upgrade()
+            sql.execute(
+                "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum)
+            )
+            db.commit()
+            print(f"[MIGRATION] m{migration.version:04d}_{migration.name} applied")
+    finally:
+        if locked:
+            sql.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+    return len(pending)
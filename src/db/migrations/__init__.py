@@ -0,0 +1,7 @@
+"""
+Ordered schema migrations
+
+Each module is named ``mNNNN_<name>.py`` (the number is the version) and
+defines ``async def upgrade()``. Migrations must be idempotent
+and are never edited after release - add a new file instead.
+"""
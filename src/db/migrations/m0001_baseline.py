@@ -0,0 +1,40 @@
+"""
+Baseline: the schema that used to be created on every startup
+
+Same tolerance as the old on_startup: core schema errors fail the
+migration, vocabulary table errors only warn.
+"""
+import logging
+
+from src.db.comprehensive_schema import create_comprehensive_schema, init_default_achievements
+from src.db.init_db import create_all_base, init_languages_table, create_indexes_and_constraints
+from src.db.migrate_add_created_at import run_all_migrations
+from src.db.enhanced_schema import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+async def upgrade():
+    await create_comprehensive_schema()
+    await init_default_achievements()
+    await create_all_base()
+    run_all_migrations()
+    await DatabaseManager.create_enhanced_tables()
+    init_languages_table()
+    create_indexes_and_constraints()
+
+    try:
+        from src.handlers.users.lughatlar.essential import create_essential_tables, init_essential_series
+        await create_essential_tables()
+        await init_essential_series()
+        logger.info("[OK] Essential tables created")
+    except Exception as e:
+        logger.warning(f"[WARN] Essential tables: {e}")
+
+    try:
+        from src.handlers.users.lughatlar.parallel import create_parallel_tables, init_parallel_series
+        await create_parallel_tables()
+        await init_parallel_series()
+        logger.info("[OK] Parallel tables created")
+    except Exception as e:
+        logger.warning(f"[WARN] Parallel tables: {e}")
@@ -0,0 +1,20 @@
+"""
+Job scheduler bookkeeping: the last run slot claimed for every job, so a
+slot runs on exactly one instance
+"""
+from config import db, sql
+
+
+async def upgrade():
+    sql.execute("""
+        CREATE TABLE IF NOT EXISTS scheduler_jobs (
+            job_name VARCHAR(100) PRIMARY KEY,
+            last_slot TIMESTAMP,
+            last_started_at TIMESTAMP,
+            last_finished_at TIMESTAMP,
+            last_status VARCHAR(20),
+            last_duration_ms INTEGER,
+            owner VARCHAR(100)
+        )
+    """)
+    db.commit()
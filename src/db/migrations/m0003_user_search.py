@@ -0,0 +1,111 @@
+"""
+Admin user search indexes (see src/utils/user_search.py): (lower(name),
+user_id) btree indexes for prefix matches and a trigram index for
+substrings - pg_trgm GIN on Postgres, an FTS5 trigram table kept in sync by
+triggers on SQLite
+
+The DDL is spelled out here (not imported from user_search) so the
+migration checksum covers everything it creates.
+"""
+from config import db, sql, DB_TYPE
+
+TABLES = ("users", "users_enhanced")
+
+# user_search.SEARCH_TEXT bilan bir xil bo'lishi shart (indeks ifodasi)
+SEARCH_TEXT = "lower(coalesce(username, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+NEW_SEARCH_TEXT = ("lower(coalesce(new.username, '') || ' ' || coalesce(new.first_name, '') || ' ' "
+                   "|| coalesce(new.last_name, ''))")
+
+
+# =====================================================
+# 📌 PostgreSQL
+# =====================================================
+
+def _create_index_concurrently(name: str, definition: str):
+    """
+    CONCURRENTLY: katta users jadvallariga yozish bloklanmaydi. Tranzaksiya
+    ichida ishlamaydi - ulanish autocommit (config.py)
+    """
+    # Oldingi CONCURRENTLY urinishi yiqilgan bo'lsa indeks INVALID bo'lib qoladi
+    sql.execute("""
+        SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = %s
+    """, (name,))
+    row = sql.fetchone()
+    if row and not row[0]:
+        sql.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    sql.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def _postgres():
+    if not db.autocommit:
+        db.commit()
+        db.autocommit = True
+
+    try:
+        sql.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        trigram = True
+    except Exception as e:
+        # Extension yaratish huquqi bo'lmasa substring qidiruv indeks'siz ishlaydi
+        trigram = False
+        print(f"[MIGRATION WARN] pg_trgm unavailable, substring user search will scan: {e}")
+
+    for table in TABLES:
+        _create_index_concurrently(f"idx_{table}_username_search",
+                                   f'{table} (lower(username) COLLATE "C", user_id)')
+        _create_index_concurrently(f"idx_{table}_first_name_search",
+                                   f'{table} (lower(first_name) COLLATE "C", user_id)')
+        _create_index_concurrently(f"idx_{table}_last_name_search",
+                                   f'{table} (lower(last_name) COLLATE "C", user_id)')
+        if trigram:
+            _create_index_concurrently(f"idx_{table}_search_trgm",
+                                       f"{table} USING gin (({SEARCH_TEXT}) gin_trgm_ops)")
+
+
+# =====================================================
+# 📌 SQLite
+# =====================================================
+
+def _sqlite():
+    for table in TABLES:
+        sql.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_username_search ON {table} (lower(username), user_id)")
+        sql.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_first_name_search ON {table} (lower(first_name), user_id)")
+        sql.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_name_search ON {table} (lower(last_name), user_id)")
+
+        search = f"{table}_search"
+        try:
+            sql.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {search} USING fts5(search_text, tokenize='trigram')")
+        except Exception as e:
+            # FTS5 trigram SQLite 3.34+ da bor
+            print(f"[MIGRATION WARN] FTS5 trigram unavailable, substring user search will scan: {e}")
+            continue
+
+        # rowid = user_id
+        sql.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {search}_insert AFTER INSERT ON {table} BEGIN
+                INSERT OR REPLACE INTO {search} (rowid, search_text) VALUES (new.user_id, {NEW_SEARCH_TEXT});
+            END
+        """)
+        sql.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {search}_update
+            AFTER UPDATE OF user_id, username, first_name, last_name ON {table} BEGIN
+                DELETE FROM {search} WHERE rowid = old.user_id;
+                INSERT OR REPLACE INTO {search} (rowid, search_text) VALUES (new.user_id, {NEW_SEARCH_TEXT});
+            END
+        """)
+        sql.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {search}_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {search} WHERE rowid = old.user_id;
+            END
+        """)
+        sql.execute(f"DELETE FROM {search}")
+        sql.execute(f"INSERT INTO {search} (rowid, search_text) SELECT user_id, {SEARCH_TEXT} FROM {table}")
+        db.commit()
+
+
+async def upgrade():
+    if DB_TYPE == "postgres":
+        _postgres()
+    else:
+        _sqlite()
+        db.commit()
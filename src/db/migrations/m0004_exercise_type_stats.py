@@ -0,0 +1,22 @@
+"""
+Per-user exercise type stats: ComprehensiveUserMiddleware seeds them for
+every new user and analytics reads them, but no step created the table
+"""
+from config import db, sql
+
+
+async def upgrade():
+    sql.execute("""
+        CREATE TABLE IF NOT EXISTS exercise_type_stats (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            exercise_type VARCHAR(50) NOT NULL,
+            session_count INTEGER DEFAULT 0,
+            total_questions INTEGER DEFAULT 0,
+            avg_accuracy REAL DEFAULT 0,
+            last_played_at TIMESTAMP,
+            preference_score REAL DEFAULT 0,
+            UNIQUE (user_id, exercise_type)
+        )
+    """)
+    db.commit()
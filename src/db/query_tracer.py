@@ -0,0 +1,220 @@
+"""
+🔎 Cursor-level query tracer
+
+Every statement executed through the shared connection (``sql`` and
+``db.cursor()``) is timed by a tracing cursor class. Statements are grouped
+by fingerprint (literals and IN/VALUES lists normalized) with count,
+total/p95/max time and rows (SQLite reports no rowcount for SELECT, so
+there the rows fetched are counted); statements slower than SLOW_QUERY_SECONDS are
+kept as samples with their parameters redacted. ``/adminqueries`` shows the
+top-N fingerprints since start.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from src.utils.metrics import observe_db_query, query_fingerprint
+
+logger = logging.getLogger("database")
+
+QUERY_TRACING = os.getenv("QUERY_TRACING", "1") not in ("0", "false", "no")
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+SLOW_SAMPLE_LIMIT = 50
+DURATION_WINDOW = 512  # p95 uchun har bir fingerprint bo'yicha oxirgi o'lchovlar
+
+
+@dataclass
+class QueryStats:
+    fingerprint: str
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    rows: int = 0
+    durations: Deque[float] = field(default_factory=lambda: deque(maxlen=DURATION_WINDOW))
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def p95(self) -> float:
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    at: float
+    fingerprint: str
+    seconds: float
+    params: str
+
+
+_lock = threading.Lock()
+_stats: Dict[str, QueryStats] = {}
+_slow: Deque[SlowQuery] = deque(maxlen=SLOW_SAMPLE_LIMIT)
+_since = time.time()
+
+
+def _redact(params) -> str:
+    """Only types and sizes of parameters are kept, never the values"""
+    if not params:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {_redact_value(v)}" for k, v in params.items()) + "}"
+    if not isinstance(params, (list, tuple)):
+        return f"<{type(params).__name__}>"
+    if isinstance(params[0], (list, tuple, dict)):  # executemany
+        return f"<{len(params)} rows>"
+    shown = ", ".join(_redact_value(v) for v in params[:10])
+    return f"({shown}{', ...' if len(params) > 10 else ''})"
+
+
+def _redact_value(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def record(query: str, params, seconds: float, rows: int = 0, failed: bool = False) -> str:
+    """Account one executed statement; returns its fingerprint"""
+    fingerprint = query_fingerprint(query)
+    with _lock:
+        stats = _stats.get(fingerprint)
+        if stats is None:
+            stats = _stats[fingerprint] = QueryStats(fingerprint)
+        stats.count += 1
+        stats.total += seconds
+        stats.durations.append(seconds)
+        if seconds > stats.max:
+            stats.max = seconds
+        if rows > 0:
+            stats.rows += rows
+        if failed:
+            stats.errors += 1
+        if seconds >= SLOW_QUERY_SECONDS:
+            _slow.append(SlowQuery(time.time(), fingerprint, seconds, _redact(params)))
+
+    observe_db_query(query, seconds, failed)
+    if seconds >= SLOW_QUERY_SECONDS:
+        logger.warning("Slow query (%.3fs, params %s): %s", seconds, _redact(params), fingerprint)
+    return fingerprint
+
+
+def record_fetched(fingerprint: str, rows: int) -> None:
+    """Add rows read by fetch*() to a statement without a rowcount"""
+    with _lock:
+        stats = _stats.get(fingerprint)
+        if stats is not None:
+            stats.rows += rows
+
+
+def top_queries(limit: int = 10, order_by: str = "total") -> List[QueryStats]:
+    """Most expensive fingerprints (order_by: total, p95, count, max, rows)"""
+    with _lock:
+        items = list(_stats.values())
+    return sorted(items, key=lambda s: getattr(s, order_by), reverse=True)[:limit]
+
+
+def slow_samples(limit: int = 10) -> List[SlowQuery]:
+    """Latest slow statements, newest first"""
+    with _lock:
+        return list(_slow)[-limit:][::-1]
+
+
+def summary() -> Dict[str, float]:
+    with _lock:
+        count = sum(s.count for s in _stats.values())
+        total = sum(s.total for s in _stats.values())
+        return {"since": _since, "fingerprints": len(_stats), "count": count, "total": total}
+
+
+def reset() -> None:
+    global _since
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+        _since = time.time()
+
+
+# =====================================================
+# 📌 Tracing cursor klasslari
+# =====================================================
+
+def _traced(execute, cursor, query, params):
+    started = time.perf_counter()
+    try:
+        result = execute(query, params) if params is not None else execute(query)
+    except Exception:
+        record(query, params, time.perf_counter() - started, failed=True)
+        raise
+    fingerprint = record(query, params, time.perf_counter() - started, rows=cursor.rowcount)
+    # rowcount -1 (SQLite SELECT): qatorlar fetch*() da sanaladi
+    cursor.fetch_fingerprint = fingerprint if cursor.rowcount < 0 else None
+    return result
+
+
+class TracingSQLiteCursor(sqlite3.Cursor):
+    fetch_fingerprint: Optional[str] = None
+
+    def execute(self, query, params=None):
+        return _traced(super().execute, self, query, params)
+
+    def executemany(self, query, seq_of_params):
+        return _traced(super().executemany, self, query, seq_of_params)
+
+    def _fetched(self, rows: int) -> None:
+        if self.fetch_fingerprint is not None and rows:
+            record_fetched(self.fetch_fingerprint, rows)
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._fetched(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._fetched(len(rows))
+        return rows
+
+
+class TracingSQLiteConnection(sqlite3.Connection):
+    def cursor(self, factory=TracingSQLiteCursor):
+        return super().cursor(factory)
+
+
+def psycopg2_cursor_factory() -> Optional[type]:
+    """Tracing cursor class for psycopg2.connect(cursor_factory=...)"""
+    if not QUERY_TRACING:
+        return None
+    import psycopg2.extensions
+
+    class TracingCursor(psycopg2.extensions.cursor):
+        def execute(self, query, params=None):
+            return _traced(super().execute, self, query, params)
+
+        def executemany(self, query, vars_list):
+            return _traced(super().executemany, self, query, vars_list)
+
+    return TracingCursor
+
+
+def sqlite_connection_factory() -> type:
+    """Connection class for sqlite3.connect(factory=...)"""
+    return TracingSQLiteConnection if QUERY_TRACING else sqlite3.Connection
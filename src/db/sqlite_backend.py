@@ -0,0 +1,256 @@
+"""
+🪶 High-performance SQLite backend (DBTYPE=sqlite)
+
+The code base is written against psycopg2 with autocommit. This module makes
+SQLite behave the same way for single-node deployments and benchmarks:
+
+- one connection per thread (asyncio.to_thread workers never share one),
+  opened in autocommit mode with WAL and tuned pragmas
+- Postgres dialect (``%s``, ``::date``, ``NOW() - INTERVAL '7 days'``,
+  ``SERIAL``, ``public.``, ``ILIKE`` ...) translated once per statement text
+  and cached
+- native ``RETURNING`` (SQLite >= 3.35), rows buffered so the write
+  completes immediately
+- ``transaction()`` to group many writes into a single commit
+"""
+
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from src.db import query_tracer
+
+NATIVE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",       # 64 MB
+    "PRAGMA mmap_size=268435456",     # 256 MB
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+# (pattern, replacement) - tartib muhim
+_DIALECT_RULES = [
+    (re.compile(r"\bpublic\."), ""),
+    (re.compile(r"('[^']*')::(?:jsonb|json|text)\b", re.IGNORECASE), r"\1"),
+    (re.compile(r"([\w.]+)::date\b", re.IGNORECASE), r"date(\1)"),
+    (re.compile(r"([\w.]+)::(?:text|varchar)\b", re.IGNORECASE), r"CAST(\1 AS TEXT)"),
+    (re.compile(r"([\w.]+)::(?:integer|int|bigint)\b", re.IGNORECASE), r"CAST(\1 AS INTEGER)"),
+    (re.compile(r"\bNOW\s*\(\s*\)\s*([-+])\s*INTERVAL\s*'(%s|\d+)\s*(\w+)'", re.IGNORECASE),
+     lambda m: _interval("datetime", m)),
+    (re.compile(r"\bCURRENT_DATE\s*([-+])\s*INTERVAL\s*'(%s|\d+)\s*(\w+)'", re.IGNORECASE),
+     lambda m: _interval("date", m)),
+    (re.compile(r"\bNOW\s*\(\s*\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bILIKE\b", re.IGNORECASE), "LIKE"),
+    (re.compile(r"\b(?:BIG)?SERIAL\s+PRIMARY\s+KEY\b", re.IGNORECASE), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\b(?:BIG)?SERIAL\b", re.IGNORECASE), "INTEGER"),
+    (re.compile(r"\bLEAST\s*\(", re.IGNORECASE), "MIN("),
+    (re.compile(r"\bGREATEST\s*\(", re.IGNORECASE), "MAX("),
+    (re.compile(r"^(\s*DROP\s+(?:TABLE|INDEX)\s+(?:IF\s+EXISTS\s+)?[\w.]+)\s+CASCADE\b", re.IGNORECASE), r"\1"),
+]
+_RETURNING = re.compile(r"\bRETURNING\b.*$", re.IGNORECASE | re.DOTALL)
+
+
+def _interval(func: str, match) -> str:
+    sign, amount, unit = match.group(1), match.group(2), match.group(3)
+    if amount == "%s":
+        return f"{func}('now', '{sign}' || %s || ' {unit}')"
+    return f"{func}('now', '{sign}{amount} {unit}')"
+
+
+@lru_cache(maxsize=2048)
+def translate_sql(query: str, has_params: bool = True) -> Tuple[str, bool]:
+    """
+    Translate a Postgres statement to SQLite (cached per statement text)
+
+    Returns:
+        (statement, has_returning)
+    """
+    statement = query
+    for pattern, replacement in _DIALECT_RULES:
+        statement = pattern.sub(replacement, statement)
+    if has_params:
+        statement = statement.replace("%s", "?").replace("%%", "%")
+
+    returning = bool(_RETURNING.search(statement))
+    if returning and not NATIVE_RETURNING:
+        statement = _RETURNING.sub("", statement).rstrip()
+        returning = False
+    return statement, returning
+
+
+@lru_cache(maxsize=256)
+def split_script(statement: str) -> Tuple[str, ...]:
+    """
+    Split a multi-statement DDL script (psycopg2 runs them in one execute,
+    sqlite3 does not); ``;`` inside literals and trigger bodies is kept
+    """
+    parts, buffer = [], ""
+    for chunk in statement.split(";"):
+        buffer += chunk + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \t\r\n;"):
+                parts.append(buffer.strip())
+            buffer = ""
+    if buffer.strip(" \t\r\n;"):
+        parts.append(buffer.strip())
+    return tuple(parts)
+
+
+class SQLiteCursor:
+    """psycopg2-style cursor over a sqlite3 cursor"""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+        self._rows: Optional[List[tuple]] = None
+
+    def execute(self, query, params=None):
+        statement, returning = translate_sql(query, bool(params))
+        self._rows = None
+        if not params and ";" in statement.rstrip(" \t\r\n;"):
+            for part in split_script(statement):
+                self.cursor.execute(part)
+            return self
+        self.cursor.execute(statement, params or ())
+        if returning:
+            # Yozuv darhol yakunlansin (autocommit) - natija buferga olinadi
+            self._rows = self.cursor.fetchall()
+        return self
+
+    def executemany(self, query, seq_of_params):
+        statement, _ = translate_sql(query, True)
+        self._rows = None
+        self.cursor.executemany(statement, seq_of_params)
+        return self
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        if self._rows is not None:
+            size = size or 1
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self.cursor.fetchmany(size or self.cursor.arraysize)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self.cursor.close()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+
+class SQLiteDatabase:
+    """
+    Drop-in for the psycopg2 connection object (``db``): cursor(), commit(),
+    rollback(), close(), backed by one sqlite3 connection per thread
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,  # autocommit, psycopg2 autocommit=True kabi
+                check_same_thread=False,
+                cached_statements=512,
+                factory=query_tracer.sqlite_connection_factory(),
+            )
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self.connection().cursor())
+
+    def shared_cursor(self) -> SQLiteCursor:
+        """Per-thread cursor behind the global ``sql`` object"""
+        cursor = getattr(self._local, "shared", None)
+        if cursor is None:
+            cursor = self._local.shared = self.cursor()
+        return cursor
+
+    def commit(self):
+        conn = self.connection()
+        # transaction() ichida commit tashqi blok oxirigacha kechiktiriladi
+        if conn.in_transaction and not self._local.depth:
+            conn.commit()
+
+    def rollback(self):
+        conn = self.connection()
+        if conn.in_transaction and not self._local.depth:
+            conn.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into one transaction (nested blocks join the outer one)"""
+        conn = self.connection()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.rollback()
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class SharedCursor:
+    """Global ``sql`` object: forwards to the calling thread's cursor"""
+
+    def __init__(self, database: SQLiteDatabase):
+        self._database = database
+
+    def __getattr__(self, name):
+        return getattr(self._database.shared_cursor(), name)
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta
+from html import escape
 
 import psycopg2
 import pytz
 from aiogram import Router, F
 from aiogram.exceptions import AiogramError
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, KeyboardButton as RButton, \
     KeyboardButtonRequestChat, ChatInviteLink
@@ -12,6 +13,7 @@ from aiogram.enums import ChatType
 from aiogram.fsm.state import StatesGroup, State
 from dateutil.relativedelta import relativedelta
 
+from src.db import query_tracer
 from src.db.init_db import init_languages_table
 from src.keyboards.buttons import AdminPanel
 from config import sql, ADMIN_ID, bot, DB_CONFIG
@@ -426,4 +428,55 @@ async def admin_view_logs(message: Message):
             f"❌ <b>Loglarni o'qishda xatolik:</b>\n\n"
             f"<code>{str(e)}</code>",
             parse_mode="HTML"
-        )
\ No newline at end of file
+        )
+
+@admin_router.message(Command("adminqueries"), F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
+async def admin_view_queries(message: Message, command: CommandObject):
+    """
+    Eng qimmat SQL so'rovlar (ishga tushgandan beri)
+
+    /adminqueries [N] [total|p95|count|max|rows|slow|reset]
+    """
+    args = (command.args or "").split()
+    limit = next((int(a) for a in args if a.isdigit()), 10)
+    mode = next((a for a in args if not a.isdigit()), "total")
+
+    if mode == "reset":
+        query_tracer.reset()
+        await message.answer("🔄 So'rov statistikasi tozalandi")
+        return
+
+    if mode == "slow":
+        samples = query_tracer.slow_samples(limit)
+        if not samples:
+            await message.answer(f"✅ {query_tracer.SLOW_QUERY_SECONDS}s dan sekin so'rovlar yo'q")
+            return
+        lines = [f"🐢 <b>SEKIN SO'ROVLAR</b> (≥ {query_tracer.SLOW_QUERY_SECONDS}s)\n"]
+        for s in samples:
+            at = datetime.fromtimestamp(s.at).strftime("%H:%M:%S")
+            lines.append(f"<b>{at}</b> {s.seconds * 1000:.0f} ms {escape(s.params)}\n"
+                         f"<code>{escape(s.fingerprint[:300])}</code>\n")
+    else:
+        if mode not in ("total", "p95", "count", "max", "rows"):
+            mode = "total"
+        info = query_tracer.summary()
+        since = datetime.fromtimestamp(info["since"]).strftime("%d.%m %H:%M")
+        lines = [
+            f"🔎 <b>TOP {limit} SO'ROVLAR</b> ({mode} bo'yicha)\n"
+            f"📅 {since} dan beri: {info['count']} ta so'rov, {info['fingerprints']} xil, "
+            f"{info['total']:.1f}s\n"
+        ]
+        for i, s in enumerate(query_tracer.top_queries(limit, mode), 1):
+            lines.append(
+                f"<b>{i}.</b> {s.count}× · jami {s.total * 1000:.0f} ms · p95 {s.p95 * 1000:.1f} ms · "
+                f"max {s.max * 1000:.0f} ms · {s.rows} qator{f' · ❌{s.errors}' if s.errors else ''}\n"
+                f"<code>{escape(s.fingerprint[:300])}</code>\n"
+            )
+
+    # Qatorlar butunligicha qo'shiladi - HTML teglari o'rtasidan kesilmaydi
+    text = lines[0]
+    for line in lines[1:]:
+        if len(text) + 1 + len(line) > 4000:
+            break
+        text += "\n" + line
+    await message.answer(text, parse_mode="HTML")
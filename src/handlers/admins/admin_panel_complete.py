@@ -17,6 +17,10 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.enums import ChatType
 
 from config import sql, db, bot, ADMIN_ID, DB_CONFIG
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import BroadcastConfirm, UserSearchPage
+from src.utils.lifecycle import lifecycle
+from src.utils.user_search import normalize_query, search_users
 
 admin_complete_router = Router()
 
@@ -89,12 +93,19 @@ def get_broadcast_confirm_menu(msg_type: str) -> InlineKeyboardMarkup:
     """Broadcast confirmation menu"""
     return InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="✅ Ha, yuborish", callback_data=f"admin:broadcast:confirm:yes:{msg_type}"),
-            InlineKeyboardButton(text="❌ Yo'q, bekor qilish", callback_data="admin:broadcast:confirm:no")
+            InlineKeyboardButton(text="✅ Ha, yuborish", callback_data=BroadcastConfirm(True, msg_type).pack()),
+            InlineKeyboardButton(text="❌ Yo'q, bekor qilish", callback_data=BroadcastConfirm(False).pack())
         ]
     ])
 
 
+def get_user_search_more_menu(panel: str, page: int) -> InlineKeyboardMarkup:
+    """Next page of user search results"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="➡️ Yana ko'rsatish", callback_data=UserSearchPage(panel, page).pack())]
+    ])
+
+
 def get_channels_menu() -> InlineKeyboardMarkup:
     """Channels inline menu"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -673,44 +684,62 @@ async def users_search_prompt(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@admin_complete_router.message(AdminStates.user_search, F.from_user.id.in_(ADMIN_ID))
-async def users_search_execute(message: Message, state: FSMContext):
-    """Execute user search"""
-    query = message.text.strip()
-    
-    try:
-        # Try as ID first
-        try:
-            user_id = int(query)
-            sql.execute("SELECT user_id, first_name, username, created_at FROM users WHERE user_id = %s", (user_id,))
-        except ValueError:
-            # Search by username
-            sql.execute("""
-                SELECT user_id, first_name, username, created_at 
-                FROM users 
-                WHERE username ILIKE %s
-                LIMIT 5
-            """, (f"%{query}%",))
-        
-        results = sql.fetchall()
-        
-        if not results:
-            await message.answer("❌ Foydalanuvchi topilmadi")
-        else:
-            for user_id, name, username, created in results:
-                date_str = created.strftime('%d.%m.%Y %H:%M') if created else "N/A"
-                text = f"""
+USER_SEARCH_COLUMNS = ("user_id", "first_name", "username", "created_at")
+
+
+async def send_user_search_page(message: Message, state: FSMContext, query: str, page: int = 1, after=None):
+    """Send one page of search results; the cursor of the next page is kept in FSM data"""
+    results, next_after = await search_users(query, USER_SEARCH_COLUMNS, after=after)
+
+    if not results:
+        await message.answer("❌ Foydalanuvchi topilmadi")
+        return
+
+    for user_id, name, username, created in results:
+        date_str = created.strftime('%d.%m.%Y %H:%M') if created else "N/A"
+        text = f"""
 👤 <b>Foydalanuvchi</b>
 🆔 ID: <code>{user_id}</code>
 👤 Ism: {name or 'N/A'}
 📱 Username: {'@' + username if username else 'N/A'}
 📅 Qo'shilgan: {date_str}
 """
-                await message.answer(text, parse_mode="HTML")
+        await message.answer(text, parse_mode="HTML")
+
+    if next_after is None:
+        await state.update_data(user_search=None)
+        return
+    await state.update_data(user_search={"query": query, "after": next_after, "page": page + 1})
+    await message.answer(
+        f"🔍 {page}-sahifa",
+        reply_markup=get_user_search_more_menu("complete", page + 1)
+    )
+
+
+@admin_complete_router.message(AdminStates.user_search, F.from_user.id.in_(ADMIN_ID))
+async def users_search_execute(message: Message, state: FSMContext):
+    """Execute user search (ID prefix, username, first/last name)"""
+    await state.clear()
+
+    try:
+        await send_user_search_page(message, state, normalize_query(message.text))
     except Exception as e:
         await message.answer(f"❌ Xatolik: {str(e)}")
-    
-    await state.clear()
+
+
+@admin_complete_router.callback_query(OnCallback(UserSearchPage, panel="complete"), F.from_user.id.in_(ADMIN_ID))
+async def users_search_next(callback: CallbackQuery, state: FSMContext, callback_data: UserSearchPage):
+    """Next page of the last search"""
+    search = (await state.get_data()).get("user_search")
+    if not search or search["page"] != callback_data.page:
+        await callback.answer("⌛ Qidiruv eskirgan, qaytadan qidiring", show_alert=True)
+        return
+
+    await callback.answer()
+    try:
+        await send_user_search_page(callback.message, state, search["query"], search["page"], tuple(search["after"]))
+    except Exception as e:
+        await callback.message.answer(f"❌ Xatolik: {str(e)}")
 
 
 # ==========================================
@@ -808,15 +837,13 @@ async def broadcast_forward_received(message: Message, state: FSMContext):
 
 
 @admin_complete_router.callback_query(
-    F.data.startswith("admin:broadcast:confirm:"), 
+    OnCallback(BroadcastConfirm),
     AdminStates.broadcast_confirm,
     F.from_user.id.in_(ADMIN_ID)
 )
-async def broadcast_confirm_handler(callback: CallbackQuery, state: FSMContext):
+async def broadcast_confirm_handler(callback: CallbackQuery, state: FSMContext, callback_data: BroadcastConfirm):
     """Handle broadcast confirmation (yes/no)"""
-    action = callback.data.split(":")[3]  # yes or no
-    
-    if action == "no":
+    if not callback_data.confirmed:
         # Cancel broadcast
         await state.clear()
         await callback.message.edit_text(
@@ -834,7 +861,7 @@ async def broadcast_confirm_handler(callback: CallbackQuery, state: FSMContext):
         return
     
     # User confirmed - proceed with broadcast
-    msg_type = callback.data.split(":")[4]  # simple or forward
+    msg_type = callback_data.msg_type  # simple or forward
     
     # Get stored message data
     data = await state.get_data()
@@ -879,67 +906,68 @@ async def broadcast_confirm_handler(callback: CallbackQuery, state: FSMContext):
     )
     await callback.answer("Yuborish boshlandi")
     
-    # Send broadcast
-    status_msg = await callback.message.answer(
-        f"📤 Yuborilmoqda... 0/{len(users)}\n✅ 0 | ❌ 0"
-    )
+    # Fonda yuboriladi - admin'ning keyingi update'lari navbatda kutib qolmaydi
+    async def send_all():
+        status_msg = await callback.message.answer(
+            f"📤 Yuborilmoqda... 0/{len(users)}\n✅ 0 | ❌ 0"
+        )
     
-    success = 0
-    failed = 0
+        success = 0
+        failed = 0
     
-    for i, user_id in enumerate(users):
-        try:
-            if msg_type == 'simple':
-                # Copy message (simple broadcast)
-                await bot.copy_message(
-                    chat_id=user_id,
-                    from_chat_id=chat_id,
-                    message_id=msg_id
-                )
-            else:
-                # Forward message
-                await bot.forward_message(
-                    chat_id=user_id,
-                    from_chat_id=chat_id,
-                    message_id=msg_id
-                )
-            success += 1
-        except Exception as e:
-            failed += 1
-            # Log failed users for potential retry
-            print(f"[BROADCAST] Failed to send to {user_id}: {e}")
-        
-        # Update status every 50 users
-        if i % 50 == 0 or i == len(users) - 1:
+        for i, user_id in enumerate(users):
             try:
-                await status_msg.edit_text(
-                    f"📤 Yuborilmoqda... {i+1}/{len(users)}\n"
-                    f"✅ {success} | ❌ {failed}"
-                )
-            except:
-                pass
+                if msg_type == 'simple':
+                    # Copy message (simple broadcast)
+                    await bot.copy_message(
+                        chat_id=user_id,
+                        from_chat_id=chat_id,
+                        message_id=msg_id
+                    )
+                else:
+                    # Forward message
+                    await bot.forward_message(
+                        chat_id=user_id,
+                        from_chat_id=chat_id,
+                        message_id=msg_id
+                    )
+                success += 1
+            except Exception as e:
+                failed += 1
+                # Log failed users for potential retry
+                print(f"[BROADCAST] Failed to send to {user_id}: {e}")
         
-        # Small delay to avoid rate limits
-        await asyncio.sleep(0.05)
-    
-    # Final status
-    await status_msg.edit_text(
-        f"✅ <b>TUGADI!</b>\n\n"
-        f"📤 Yuborildi: {success}\n"
-        f"❌ Yuborilmadi: {failed}\n"
-        f"📊 Jami: {len(users)}"
-    )
+            # Update status every 50 users
+            if i % 50 == 0 or i == len(users) - 1:
+                try:
+                    await status_msg.edit_text(
+                        f"📤 Yuborilmoqda... {i+1}/{len(users)}\n"
+                        f"✅ {success} | ❌ {failed}"
+                    )
+                except:
+                    pass
+        
+            # Small delay to avoid rate limits
+            await asyncio.sleep(0.05)
     
-    # Clear state
+        # Final status
+        await status_msg.edit_text(
+            f"✅ <b>TUGADI!</b>\n\n"
+            f"📤 Yuborildi: {success}\n"
+            f"❌ Yuborilmadi: {failed}\n"
+            f"📊 Jami: {len(users)}"
+        )
+
+        # Return to broadcast menu
+        await callback.message.answer(
+            "📢 <b>XABAR YUBORISH</b>\n\n"
+            "Yana xabar yuborish uchun turini tanlang:",
+            reply_markup=get_broadcast_menu(),
+            parse_mode="HTML"
+        )
+
     await state.clear()
-    
-    # Return to broadcast menu
-    await callback.message.answer(
-        "📢 <b>XABAR YUBORISH</b>\n\n"
-        "Yana xabar yuborish uchun turini tanlang:",
-        reply_markup=get_broadcast_menu(),
-        parse_mode="HTML"
-    )
+    lifecycle.track(send_all(), name="broadcast")
 
 
 @admin_complete_router.message(F.text == "❌ Bekor qilish", F.from_user.id.in_(ADMIN_ID))
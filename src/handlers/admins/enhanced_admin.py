@@ -16,7 +16,11 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.enums import ChatType
 
 from config import sql, db, bot, ADMIN_ID, DB_CONFIG
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import UserSearchPage
 from src.keyboards.sophisticated_keyboards import admin_kb, FancyButtons
+from src.utils.lifecycle import lifecycle
+from src.utils.user_search import normalize_query, search_users
 
 enhanced_admin_router = Router()
 
@@ -365,44 +369,30 @@ async def search_user_prompt(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@enhanced_admin_router.message(AdminStates.user_search, F.from_user.id.in_(ADMIN_ID))
-async def search_user(message: Message, state: FSMContext):
-    """Search for user"""
-    query = message.text.strip()
-    
-    # Try to search by different criteria
-    try:
-        user_id = int(query)
-        sql.execute("""
-            SELECT user_id, first_name, username, created_at, last_active_at, 
-                   is_blocked, is_premium, streak_days, user_level
-            FROM users_enhanced WHERE user_id = %s
-        """, (user_id,))
-    except ValueError:
-        # Search by username or name
-        sql.execute("""
-            SELECT user_id, first_name, username, created_at, last_active_at,
-                   is_blocked, is_premium, streak_days, user_level
-            FROM users_enhanced 
-            WHERE username ILIKE %s OR first_name ILIKE %s
-            LIMIT 5
-        """, (f"%{query}%", f"%{query}%"))
-    
-    results = sql.fetchall()
-    
+USER_SEARCH_COLUMNS = (
+    "user_id", "first_name", "username", "created_at", "last_active_at",
+    "is_blocked", "is_premium", "streak_days", "user_level",
+)
+
+
+async def send_user_search_page(message: Message, state: FSMContext, query: str, page: int = 1, after=None):
+    """Send one page of search results; the cursor of the next page is kept in FSM data"""
+    results, next_after = await search_users(query, USER_SEARCH_COLUMNS, table="users_enhanced", after=after)
+
     if not results:
         await message.answer("❌ Foydalanuvchi topilmadi")
-    else:
-        for user in results:
-            user_id, name, username, created, last_active, blocked, premium, streak, level = user
-            
-            status_badges = []
-            if blocked:
-                status_badges.append("🚫 BLOKLAGAN")
-            if premium:
-                status_badges.append("💎 PREMIUM")
-            
-            text = f"""
+        return
+
+    for user in results:
+        user_id, name, username, created, last_active, blocked, premium, streak, level = user
+        
+        status_badges = []
+        if blocked:
+            status_badges.append("🚫 BLOKLAGAN")
+        if premium:
+            status_badges.append("💎 PREMIUM")
+        
+        text = f"""
 👤 <b>Foydalanuvchi ma'lumotlari</b>
 
 🆔 <b>ID:</b> <code>{user_id}</code>
@@ -414,30 +404,58 @@ async def search_user(message: Message, state: FSMContext):
 🔥 <b>Izchillik:</b> {streak} kun
 {" | ".join(status_badges) if status_badges else ''}
 """
-            
-            # Action buttons
-            builder = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="✉️ Xabar yuborish", 
-                        callback_data=f"admin:msg:{user_id}"
-                    ),
-                    InlineKeyboardButton(
-                        text="🚫 Bloklash" if not blocked else "✅ Blokdan chiqarish",
-                        callback_data=f"admin:block:{user_id}:{int(not blocked)}"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="💎 Premium berish" if not premium else "❌ Premium olib tashlash",
-                        callback_data=f"admin:premium:{user_id}:{int(not premium)}"
-                    )
-                ]
-            ])
-            
-            await message.answer(text, reply_markup=builder, parse_mode="HTML")
-    
+        
+        # Action buttons
+        builder = InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="✉️ Xabar yuborish", 
+                    callback_data=f"admin:msg:{user_id}"
+                ),
+                InlineKeyboardButton(
+                    text="🚫 Bloklash" if not blocked else "✅ Blokdan chiqarish",
+                    callback_data=f"admin:block:{user_id}:{int(not blocked)}"
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    text="💎 Premium berish" if not premium else "❌ Premium olib tashlash",
+                    callback_data=f"admin:premium:{user_id}:{int(not premium)}"
+                )
+            ]
+        ])
+        
+        await message.answer(text, reply_markup=builder, parse_mode="HTML")
+
+    if next_after is None:
+        await state.update_data(user_search=None)
+        return
+    await state.update_data(user_search={"query": query, "after": next_after, "page": page + 1})
+    await message.answer(
+        f"🔍 {page}-sahifa",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="➡️ Yana ko'rsatish", callback_data=UserSearchPage("enhanced", page + 1).pack())]
+        ])
+    )
+
+
+@enhanced_admin_router.message(AdminStates.user_search, F.from_user.id.in_(ADMIN_ID))
+async def search_user(message: Message, state: FSMContext):
+    """Search for user by ID prefix, username or first/last name"""
     await state.clear()
+    await send_user_search_page(message, state, normalize_query(message.text))
+
+
+@enhanced_admin_router.callback_query(OnCallback(UserSearchPage, panel="enhanced"), F.from_user.id.in_(ADMIN_ID))
+async def search_user_next(callback: CallbackQuery, state: FSMContext, callback_data: UserSearchPage):
+    """Next page of the last search"""
+    search = (await state.get_data()).get("user_search")
+    if not search or search["page"] != callback_data.page:
+        await callback.answer("⌛ Qidiruv eskirgan, qaytadan qidiring", show_alert=True)
+        return
+
+    await callback.answer()
+    await send_user_search_page(callback.message, state, search["query"], search["page"], tuple(search["after"]))
 
 
 # ==========================================
@@ -509,40 +527,44 @@ async def execute_broadcast(callback: CallbackQuery, state: FSMContext):
     sql.execute("SELECT user_id FROM users_enhanced WHERE is_blocked = FALSE")
     users = [row[0] for row in sql.fetchall()]
     
-    status_message = await callback.message.answer(
-        f"📤 Yuborish boshlandi...\n👥 Jami: {len(users)}"
-    )
+    # Fonda yuboriladi - admin'ning keyingi update'lari navbatda kutib qolmaydi
+    async def send_all():
+        status_message = await callback.message.answer(
+            f"📤 Yuborish boshlandi...\n👥 Jami: {len(users)}"
+        )
     
-    success = 0
-    failed = 0
+        success = 0
+        failed = 0
     
-    for i, user_id in enumerate(users):
-        try:
-            await message_to_send.copy_to(user_id)
-            success += 1
-        except Exception as e:
-            failed += 1
-            print(f"Failed to send to {user_id}: {e}")
-        
-        # Update status every 50 users
-        if i % 50 == 0:
+        for i, user_id in enumerate(users):
             try:
-                await status_message.edit_text(
-                    f"📤 Yuborilmoqda...\n"
-                    f"✅ {success} | ❌ {failed}\n"
-                    f"📊 {i+1}/{len(users)}"
-                )
-            except:
-                pass
+                await message_to_send.copy_to(user_id)
+                success += 1
+            except Exception as e:
+                failed += 1
+                print(f"Failed to send to {user_id}: {e}")
         
-        await asyncio.sleep(0.05)  # Rate limiting
+            # Update status every 50 users
+            if i % 50 == 0:
+                try:
+                    await status_message.edit_text(
+                        f"📤 Yuborilmoqda...\n"
+                        f"✅ {success} | ❌ {failed}\n"
+                        f"📊 {i+1}/{len(users)}"
+                    )
+                except:
+                    pass
+        
+            await asyncio.sleep(0.05)  # Rate limiting
     
-    await status_message.edit_text(
-        f"✅ <b>YUBORISH TUGADI</b>\n\n"
-        f"✅ Muvaffaqiyatli: {success}\n"
-        f"❌ Muvaffaqiyatsiz: {failed}\n"
-        f"📊 Jami: {len(users)}"
-    )
+        await status_message.edit_text(
+            f"✅ <b>YUBORISH TUGADI</b>\n\n"
+            f"✅ Muvaffaqiyatli: {success}\n"
+            f"❌ Muvaffaqiyatsiz: {failed}\n"
+            f"📊 Jami: {len(users)}"
+        )
+
+    lifecycle.track(send_all(), name="broadcast")
     
     await state.clear()
     await callback.answer()
@@ -1,28 +1,27 @@
 import asyncio
+import json
 import os
+import time
+from datetime import datetime
+from typing import Optional
+
 import aiofiles
-import logging
 from aiogram import Router, F, Bot
 from aiogram.enums import ChatType
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.types import Message, KeyboardButton, ReplyKeyboardMarkup, BufferedInputFile
+from aiogram.types import Message, Chat, KeyboardButton, ReplyKeyboardMarkup, BufferedInputFile
 from aiogram.exceptions import (
     TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
 )
 from config import ADMIN_ID, sql, bot
 from src.keyboards.buttons import AdminPanel
+from src.utils.logger import setup_logger
+from src.utils.metrics import BROADCAST_MESSAGES, BROADCAST_SECONDS
+from src.utils.lifecycle import lifecycle
 
-# Logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('broadcast.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# Logging: logs/broadcast.log (queue orqali, event loop bloklanmaydi)
+logger = setup_logger('broadcast')
 
 msg_router = Router()
 
@@ -34,6 +33,9 @@ FAILED_USERS_FILE = "failed_users.txt"
 TEST_FAILED_COPY_FILE = "test_failed_copy.txt"
 TEST_FAILED_FORWARD_FILE = "test_failed_forward.txt"
 
+# Shutdown paytida to'xtatilgan yuborish shu yerga yoziladi va keyingi ishga tushishda davom etadi
+BROADCAST_CHECKPOINT_FILE = "broadcast_checkpoint.json"
+
 # === STATES (FSM) === #
 class MsgState(StatesGroup):
     forward_msg = State()
@@ -145,12 +147,66 @@ async def send_forward_safe(user_id: int, message: Message, semaphore: asyncio.S
         await asyncio.sleep(0.5)
         return False
 
+SEND_FUNCS = {"copy": send_copy_safe, "forward": send_forward_safe}
+
+
+# === CHECKPOINT === #
+def _write_checkpoint(state: dict) -> None:
+    tmp_path = BROADCAST_CHECKPOINT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, BROADCAST_CHECKPOINT_FILE)
+
+
+def _pop_checkpoint() -> Optional[dict]:
+    if not os.path.exists(BROADCAST_CHECKPOINT_FILE):
+        return None
+    try:
+        with open(BROADCAST_CHECKPOINT_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(BROADCAST_CHECKPOINT_FILE)
+
+
+async def resume_broadcast() -> bool:
+    """Continue a broadcast that was paused by a shutdown (called on startup)"""
+    try:
+        state = await asyncio.to_thread(_pop_checkpoint)
+    except Exception as e:
+        logger.error(f"Broadcast checkpoint could not be read: {e}")
+        return False
+    if not state or not state.get("remaining"):
+        return False
+
+    # copy/forward faqat chat.id va message_id dan foydalanadi
+    message = Message(
+        message_id=state["message_id"],
+        date=datetime.now(),
+        chat=Chat(id=state["chat_id"], type=ChatType.PRIVATE),
+    ).as_(bot)
+    logger.info(f"Resuming broadcast: {len(state['remaining'])} of {state['total']} users left")
+    lifecycle.track(
+        broadcast(state["remaining"], message, SEND_FUNCS[state["mode"]],
+                  state["is_test"], state["test_filename"], checkpoint=state),
+        name="broadcast-resume"
+    )
+    return True
+
+
 # === BROADCAST FUNCTION === #
-async def broadcast(user_ids: list[int], message: Message, send_func, is_test: bool = False, test_filename: str = None):
-    total = len(user_ids)
-    success = 0
-    failed = 0
-    status_msg = await message.answer("📤 Yuborish boshlandi...")
+async def broadcast(user_ids: list[int], message: Message, send_func, is_test: bool = False, test_filename: str = None,
+                    checkpoint: Optional[dict] = None):
+    """
+    Send ``message`` to ``user_ids`` in batches. On shutdown the loop stops at
+    the next batch boundary and saves the remaining users to a checkpoint;
+    ``checkpoint`` (from resume_broadcast) restores the counters.
+    """
+    done_before = checkpoint["done"] if checkpoint else 0
+    total = checkpoint["total"] if checkpoint else len(user_ids)
+    success = checkpoint["success"] if checkpoint else 0
+    failed = checkpoint["failed"] if checkpoint else 0
+    status_msg = await message.answer("▶️ Yuborish davom ettirildi..." if checkpoint else "📤 Yuborish boshlandi...")
+    started = time.perf_counter()
     batch_size = 100
     update_interval = 1000  # Update every 1000 users
     # For more frequent updates, use update_interval = 100 and increase sleep to 1 second:
@@ -158,36 +214,58 @@ async def broadcast(user_ids: list[int], message: Message, send_func, is_test: b
 
     # Clear the log file at the start if it exists
     filename = test_filename if is_test else FAILED_USERS_FILE
-    if os.path.exists(filename):
+    if not checkpoint and os.path.exists(filename):
         os.remove(filename)
         logger.info(f"Cleared log file: {filename}")
 
-    for i in range(0, total, batch_size):
+    for i in range(0, len(user_ids), batch_size):
+        if lifecycle.stopping:
+            remaining = user_ids[i:]
+            await asyncio.to_thread(_write_checkpoint, {
+                "mode": next(mode for mode, func in SEND_FUNCS.items() if func is send_func),
+                "chat_id": message.chat.id,
+                "message_id": message.message_id,
+                "is_test": is_test,
+                "test_filename": test_filename,
+                "remaining": remaining,
+                "done": done_before + i,
+                "total": total,
+                "success": success,
+                "failed": failed,
+            })
+            logger.warning(f"Broadcast paused by shutdown: {len(remaining)} users saved to {BROADCAST_CHECKPOINT_FILE}")
+            await message.answer(
+                f"⏸ Bot qayta ishga tushirilmoqda - yuborish to'xtatildi ({done_before + i}/{total}).\n"
+                f"Qolgan {len(remaining)} ta foydalanuvchiga bot ishga tushgach davom ettiriladi."
+            )
+            return success, failed
+
         batch = user_ids[i:i + batch_size]
         tasks = [send_func(uid, message, semaphore, is_test, test_filename) for uid in batch]
         results = await asyncio.gather(*tasks, return_exceptions=True)
-        for result in results:
-            if result is True:
-                success += 1
-            else:
-                failed += 1
+        batch_sent = sum(1 for result in results if result is True)
+        success += batch_sent
+        failed += len(results) - batch_sent
+        BROADCAST_MESSAGES.inc("sent", amount=batch_sent)
+        BROADCAST_MESSAGES.inc("failed", amount=len(results) - batch_sent)
 
         # Update progress
-        if (i + batch_size) % update_interval == 0 or (i + batch_size) >= total:
+        done = done_before + min(i + batch_size, len(user_ids))
+        if (i + batch_size) % update_interval == 0 or done >= total:
             try:
                 await status_msg.edit_text(
                     f"📬 {'Sinov' if is_test else 'Xabar'} yuborilmoqda...\n\n"
                     f"✅ Yuborilgan: {success} ta\n"
                     f"❌ Yuborilmagan: {failed} ta\n"
                     f"📦 Jami: {total} ta\n"
-                    f"📊 Progres: {min(i + batch_size, total)}/{total}"
+                    f"📊 Progres: {done}/{total}"
                 )
             except Exception as e:
                 logger.error(f"Failed to update status message: {e}")
 
         # Sleep between batches (optional, as per-user delays are handled in send functions)
         await asyncio.sleep(0.1)
-        logger.info(f"Processed batch {i//batch_size + 1}/{total//batch_size + 1}")
+        logger.info(f"Processed batch {i//batch_size + 1}/{len(user_ids)//batch_size + 1}")
 
     # Final status message
     await message.answer(
@@ -196,6 +274,7 @@ async def broadcast(user_ids: list[int], message: Message, send_func, is_test: b
         f"❌ Yuborilmagan: {failed} ta",
         reply_markup=await AdminPanel.admin_msg()
     )
+    BROADCAST_SECONDS.observe(time.perf_counter() - started)
     logger.info(f"Broadcast completed: {success} successful, {failed} failed, total: {total}")
 
     # Send the failed users file if it exists
@@ -225,6 +304,24 @@ async def get_user_ids_paginated(batch_size: int = 1000):
         logger.info(f"Fetched {len(rows)} user IDs at offset {offset}")
     return user_ids
 
+def start_broadcast(message: Message, send_func, **kwargs) -> None:
+    """
+    Run the broadcast as tracked background work: the handler returns at
+    once, so the admin's next updates (cancel, panel) are not queued behind
+    the per-user ordering lock for the hours a broadcast can take
+    """
+    async def run():
+        try:
+            user_ids = await get_user_ids_paginated()
+            await broadcast(user_ids, message, send_func, **kwargs)
+            logger.info(f"Admin {message.from_user.id} completed {send_func.__name__} broadcast")
+        except Exception as e:
+            logger.error(f"Broadcast failed: {e}")
+            await message.answer(f"❌ Yuborishda xatolik: {e}")
+
+    lifecycle.track(run(), name="broadcast")
+
+
 # === HANDLERS === #
 @msg_router.message(F.text == "✍Xabarlar", F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def panel_handler(message: Message) -> None:
@@ -240,9 +337,7 @@ async def start_forward(message: Message, state: FSMContext):
 @msg_router.message(MsgState.forward_msg, F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def send_forward_to_all(message: Message, state: FSMContext):
     await state.clear()
-    user_ids = await get_user_ids_paginated()
-    await broadcast(user_ids, message, send_forward_safe)
-    logger.info(f"Admin {message.from_user.id} completed forward broadcast")
+    start_broadcast(message, send_forward_safe)
 
 @msg_router.message(F.text == "📬Oddiy xabar yuborish", F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def start_text_send(message: Message, state: FSMContext):
@@ -253,9 +348,7 @@ async def start_text_send(message: Message, state: FSMContext):
 @msg_router.message(MsgState.send_msg, F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def send_text_to_all(message: Message, state: FSMContext):
     await state.clear()
-    user_ids = await get_user_ids_paginated()
-    await broadcast(user_ids, message, send_copy_safe)
-    logger.info(f"Admin {message.from_user.id} completed copy broadcast")
+    start_broadcast(message, send_copy_safe)
 
 @msg_router.message(F.text == "🧪Sinov: Copy yuborish", F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def test_copy_broadcast(message: Message, state: FSMContext):
@@ -266,9 +359,7 @@ async def test_copy_broadcast(message: Message, state: FSMContext):
 @msg_router.message(MsgState.test_copy_msg, F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def handle_test_copy(message: Message, state: FSMContext):
     await state.clear()
-    user_ids = await get_user_ids_paginated()
-    await broadcast(user_ids, message, send_copy_safe, is_test=True, test_filename=TEST_FAILED_COPY_FILE)
-    logger.info(f"Admin {message.from_user.id} completed test copy broadcast")
+    start_broadcast(message, send_copy_safe, is_test=True, test_filename=TEST_FAILED_COPY_FILE)
 
 @msg_router.message(F.text == "🧪Sinov: Forward yuborish", F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def test_forward_broadcast(message: Message, state: FSMContext):
@@ -279,9 +370,7 @@ async def test_forward_broadcast(message: Message, state: FSMContext):
 @msg_router.message(MsgState.test_forward_msg, F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def handle_test_forward(message: Message, state: FSMContext):
     await state.clear()
-    user_ids = await get_user_ids_paginated()
-    await broadcast(user_ids, message, send_forward_safe, is_test=True, test_filename=TEST_FAILED_FORWARD_FILE)
-    logger.info(f"Admin {message.from_user.id} completed test forward broadcast")
+    start_broadcast(message, send_forward_safe, is_test=True, test_filename=TEST_FAILED_FORWARD_FILE)
 
 @msg_router.message(F.text == "🔙Orqaga qaytish", F.chat.type == ChatType.PRIVATE, F.from_user.id.in_(ADMIN_ID))
 async def back_to_menu(message: Message, state: FSMContext):
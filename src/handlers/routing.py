@@ -0,0 +1,187 @@
+"""
+🧭 Message routing fast path
+
+Admin routers sit behind one ``AdminGate``: a single set lookup skips all
+of them for normal users instead of evaluating every admin filter.
+
+``RouteTable`` precompiles the message handlers registered ahead of the
+translate catch-all: ``F.text == ...`` buttons go into a hash table,
+commands and FSM states into sets, and handlers it cannot read are kept as
+residual filters checked at runtime. A plain text that none of them can
+claim is sent straight to the catch-all router (see FastPathMiddleware).
+"""
+
+import operator
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, List, Optional, Set
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.filters import BaseFilter, Command, StateFilter
+from aiogram.fsm.state import State
+from aiogram.types import Message, TelegramObject, User
+from magic_filter.operations import ComparatorOperation, GetAttributeOperation
+
+from config import ADMIN_ID
+
+
+class IsAdmin(BaseFilter):
+    def __init__(self, admin_ids: Iterable[int] = ADMIN_ID):
+        self.admin_ids = frozenset(admin_ids)
+
+    async def __call__(self, event: TelegramObject, event_from_user: Optional[User] = None) -> bool:
+        return event_from_user is not None and event_from_user.id in self.admin_ids
+
+
+class AdminGate(Router):
+    """Router whose sub-routers only see messages and callbacks from admins"""
+
+    def __init__(self, *routers: Router, name: str = "admin_gate", admin_ids: Iterable[int] = ADMIN_ID):
+        super().__init__(name=name)
+        self.is_admin = IsAdmin(admin_ids)
+        self.message.filter(self.is_admin)
+        self.callback_query.filter(self.is_admin)
+        self.include_routers(*routers)
+
+
+# =====================================================
+# 📌 Filtrlarni o'qish
+# =====================================================
+
+def _exact_text(filter_object) -> Optional[str]:
+    """The constant of an ``F.text == "..."`` filter, else None"""
+    magic = getattr(filter_object, "magic", None)
+    operations = getattr(magic, "_operations", ())
+    if len(operations) != 2:
+        return None
+    attribute, comparison = operations
+    if (isinstance(attribute, GetAttributeOperation) and attribute.name == "text"
+            and isinstance(comparison, ComparatorOperation)
+            and comparison.comparator is operator.eq
+            and isinstance(comparison.right, str)):
+        return comparison.right
+    return None
+
+
+def _state_names(callback) -> Optional[Set[str]]:
+    """States a State/StateFilter accepts; None if it also accepts "no state" or any state"""
+    states = callback.states if isinstance(callback, StateFilter) else (callback,)
+    names = set()
+    for state in states:
+        name = state.state if isinstance(state, State) else state
+        if not isinstance(name, str) or name == "*":
+            return None
+        names.add(name)
+    return names
+
+
+@dataclass
+class RouteTable:
+    target: Router
+    texts: Set[str] = field(default_factory=set)
+    commands: Set[str] = field(default_factory=set)
+    command_prefixes: str = ""
+    any_command: bool = False  # regex buyruqlar - prefiksli har qanday matn
+    states: Set[str] = field(default_factory=set)
+    residual: List[HandlerObject] = field(default_factory=list)
+    admin_ids: FrozenSet[int] = frozenset()
+    disabled_reason: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.disabled_reason is None
+
+    # =====================================================
+    # 📌 Kompilyatsiya (startup'da, routerlar ulangandan keyin)
+    # =====================================================
+
+    @classmethod
+    def compile(cls, root: Router, target: Router) -> "RouteTable":
+        """
+        Read every message handler a non-admin text passes before ``target``
+
+        Args:
+            root: The dispatcher
+            target: Catch-all router; must be included directly in ``root``
+        """
+        table = cls(target=target)
+        if target.parent_router is not root:
+            table.disabled_reason = f"{target.name} is not included directly in the dispatcher"
+            return table
+        if not table._visit(root, root):
+            table.disabled_reason = f"{target.name} was not reached"
+        return table
+
+    def _visit(self, router: Router, root: Router) -> bool:
+        """Walk in propagation order; True once the target is reached"""
+        if router is self.target:
+            return True
+        if isinstance(router, AdminGate):
+            # Oddiy foydalanuvchi uchun bu shox yopiq
+            self.admin_ids |= router.is_admin.admin_ids
+            return False
+        if router is not root and len(router.message.outer_middleware):
+            self.disabled_reason = f"router {router.name} has message outer middlewares"
+        for handler in router.message.handlers:
+            self._add(handler)
+        return any(self._visit(sub_router, root) for sub_router in router.sub_routers)
+
+    def _add(self, handler: HandlerObject) -> None:
+        # Filtrlar "va" bilan ulanadi: bittasini o'qiy olsak yetarli
+        for filter_object in handler.filters or ():
+            callback = filter_object.callback
+            if isinstance(callback, Command):
+                self._add_command(callback)
+                return
+            if isinstance(callback, (State, StateFilter)):
+                names = _state_names(callback)
+                if names:
+                    self.states |= names
+                    return
+            text = _exact_text(filter_object)
+            if text is not None:
+                self.texts.add(text)
+                return
+        self.residual.append(handler)
+
+    def _add_command(self, command: Command) -> None:
+        self.command_prefixes = "".join(sorted(set(self.command_prefixes) | set(command.prefix)))
+        for name in command.commands:
+            if isinstance(name, str):
+                self.commands.add(name.casefold())
+            else:
+                self.any_command = True
+
+    # =====================================================
+    # 📌 Runtime
+    # =====================================================
+
+    def _claims_command(self, text: str) -> bool:
+        if not self.command_prefixes or text[0] not in self.command_prefixes:
+            return False
+        if self.any_command:
+            return True
+        head = text.split(maxsplit=1)[0]
+        return head[1:].split("@", 1)[0].casefold() in self.commands
+
+    async def passthrough(self, message: Message, data: dict) -> bool:
+        """True if no handler ahead of the target can take this message"""
+        text = message.text
+        if not text or text in self.texts:
+            return False
+        user = data.get("event_from_user")
+        if user is None or user.id in self.admin_ids:
+            return False
+        if self.states and data.get("raw_state") in self.states:
+            return False
+        if self._claims_command(text):
+            return False
+        for handler in self.residual:
+            passed, _ = await handler.check(message, **data)
+            if passed:
+                return False
+        return True
+
+    def describe(self) -> str:
+        return (f"{len(self.texts)} texts, {len(self.commands)} commands, "
+                f"{len(self.states)} states, {len(self.residual)} residual filters")
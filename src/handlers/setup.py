@@ -0,0 +1,78 @@
+"""
+🧩 Dispatcher wiring shared by main.py and the benchmarks
+
+Middlewares in their required order, the admin routers behind one
+AdminGate, then the user routers, then the translate fast path compiled
+over the final router tree.
+"""
+
+import logging
+from typing import Sequence
+
+from aiogram import Dispatcher, Router
+
+from src.handlers.admins.admin import admin_router
+from src.handlers.admins.messages import msg_router
+from src.handlers.admins.enhanced_admin import enhanced_admin_router
+from src.handlers.admins.admin_panel_complete import admin_complete_router
+from src.handlers.users.translate import translate_router
+from src.handlers.routing import AdminGate, RouteTable
+from src.middlewares.middleware import RegisterUserMiddleware
+from src.middlewares.comprehensive_middleware import ComprehensiveUserMiddleware
+from src.middlewares.metrics_middleware import UpdateMetricsMiddleware, HandlerMetricsMiddleware
+from src.middlewares.lifecycle_middleware import InFlightMiddleware
+from src.middlewares.ordering_middleware import UserOrderingMiddleware
+from src.middlewares.fast_path_middleware import FastPathMiddleware
+from src.middlewares.callback_middleware import CallbackDecodeMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+def register_middlewares(dp: Dispatcher) -> None:
+    dp.update.outer_middleware(InFlightMiddleware())  # Birinchi: shutdown in-flight update'larni kutadi
+    dp.update.outer_middleware(UserOrderingMiddleware())  # Turli foydalanuvchilar parallel, bittasiniki ketma-ket
+    dp.update.middleware(RegisterUserMiddleware())  # users upsert (keshlangan), Comprehensive'dan oldin
+    dp.update.middleware(ComprehensiveUserMiddleware())  # New comprehensive tracking
+    dp.callback_query.outer_middleware(CallbackDecodeMiddleware())  # callback_data bir marta decode qilinadi
+    logger.info("[INIT] Comprehensive analytics middleware registered")
+
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    for event_name in ("message", "callback_query", "inline_query"):
+        dp.observers[event_name].middleware(HandlerMetricsMiddleware(event_name))
+    logger.info("[INIT] Metrics middleware registered")
+
+
+def setup_dispatcher(dp: Dispatcher, user_routers: Sequence[Router] = ()) -> RouteTable:
+    """
+    Register middlewares and routers on ``dp``
+
+    Args:
+        user_routers: Included after the admin gate, in order
+
+    Returns:
+        The compiled fast path table (disabled if translate_router is not
+        among ``user_routers``)
+    """
+    register_middlewares(dp)
+
+    # Admin routers (one admin-id check skips all of them for normal users)
+    logger.info("[INIT] Registering admin routers...")
+    dp.include_router(AdminGate(
+        admin_complete_router,  # Complete working admin panel
+        enhanced_admin_router,  # New enhanced admin panel
+        admin_router,           # Original admin panel
+        msg_router,             # Broadcasting
+    ))
+
+    if user_routers:
+        logger.info("[INIT] Registering user routers...")
+        dp.include_routers(*user_routers)
+
+    # Plain texts go straight to the translate catch-all (routers must all be included by now)
+    route_table = RouteTable.compile(dp, translate_router)
+    if route_table.enabled:
+        dp.message.outer_middleware(FastPathMiddleware(route_table))
+        logger.info(f"[INIT] Translate fast path: {route_table.describe()}")
+    else:
+        logger.info(f"[INIT] Translate fast path off: {route_table.disabled_reason}")
+    return route_table
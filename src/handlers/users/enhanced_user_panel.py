@@ -18,6 +18,7 @@ from src.keyboards.sophisticated_keyboards import (
     FancyButtons, VisualLanguageSelector
 )
 from src.db.enhanced_schema import get_user_stats, get_leaderboard
+from src.utils.user_langs import get_user_langs, set_user_lang, swap_user_langs
 
 enhanced_user_router = Router()
 
@@ -131,8 +132,7 @@ async def language_selection(message: Message):
     user_id = message.from_user.id
     
     # Get current language preferences
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id = %s", (user_id,))
-    result = sql.fetchone()
+    result = get_user_langs(user_id)
     current_from = result[0] if result else 'auto'
     current_to = result[1] if result else 'uz'
     
@@ -685,21 +685,14 @@ async def set_language(callback: CallbackQuery):
     _, _, direction, lang_code = callback.data.split(":")
     user_id = callback.from_user.id
     
-    # Update database
+    # Update database (single upsert, cache refreshed from the result)
     try:
-        field = "from_lang" if direction == "from" else "to_lang"
-        sql.execute(f"""
-            INSERT INTO user_languages (user_id, {field})
-            VALUES (%s, %s)
-            ON CONFLICT (user_id) DO UPDATE SET {field} = EXCLUDED.{field}
-        """, (user_id, lang_code))
-        db.commit()
+        result = set_user_lang(user_id, lang_code, direction)
     except Exception as e:
         print(f"Language update error: {e}")
+        result = get_user_langs(user_id)
     
     # Refresh the keyboard
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id = %s", (user_id,))
-    result = sql.fetchone()
     current_from = result[0] if result else 'auto'
     current_to = result[1] if result else 'uz'
     
@@ -714,19 +707,13 @@ async def switch_languages(callback: CallbackQuery):
     """Switch source and target languages"""
     user_id = callback.from_user.id
     
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id = %s", (user_id,))
-    result = sql.fetchone()
+    result = get_user_langs(user_id)
     
     if result:
         from_lang, to_lang = result
         # Don't switch if source is auto
         if from_lang != 'auto':
-            sql.execute("""
-                UPDATE user_languages 
-                SET from_lang = %s, to_lang = %s 
-                WHERE user_id = %s
-            """, (to_lang, from_lang, user_id))
-            db.commit()
+            swap_user_langs(user_id)
             
             await callback.message.edit_reply_markup(
                 reply_markup=lang_selector.dual_language_selector(user_id, to_lang, from_lang)
@@ -743,8 +730,7 @@ async def language_selection_done(callback: CallbackQuery):
     
     # Show confirmation
     user_id = callback.from_user.id
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id = %s", (user_id,))
-    result = sql.fetchone()
+    result = get_user_langs(user_id)
     
     if result:
         from_lang, to_lang = result
@@ -0,0 +1,241 @@
+"""
+📦 Essential va Parallel kurslar uchun xotiradagi indeks
+
+Essential/Parallel lug'atlari faqat admin importi orqali o'zgaradi, shuning
+uchun ular startup'da bir marta yuklanadi va import'dan keyin butunlay qayta
+quriladi. Indeks o'zgarmas: yangi snapshot to'liq qurilgandan keyingina
+bitta havola almashtiriladi, o'qiyotgan handlerlar hech qachon yarim
+tayyor holatni ko'rmaydi.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from config import DB_TYPE
+from src.handlers.users.lughatlar.vocabs import db_exec
+
+
+# =====================================================
+# 📌 Ma'lumot tuzilmalari
+# =====================================================
+@dataclass(frozen=True)
+class CourseItem:
+    """Bitta unit (Essential) yoki mavzu (Parallel) va uning so'zlari."""
+    id: int
+    series_code: str
+    series_name: str
+    icon: str
+    number: int
+    title: str
+    display_name: Optional[str]
+    difficulty_level: int
+    word_count: int
+    # So'zlar ustunlar bo'yicha saqlanadi (position tartibida)
+    words_src: Tuple[str, ...]
+    words_trg: Tuple[str, ...]
+    words_trg2: Tuple[Optional[str], ...]
+    categories: Tuple[Optional[str], ...]
+
+    def __len__(self) -> int:
+        return len(self.words_src)
+
+    def word_dicts(self, with_extra: bool = False) -> List[Dict]:
+        """FSM state'ga yoziladigan yangi (mutable) so'zlar ro'yxati."""
+        if not with_extra:
+            return [{"word_src": s, "word_trg": t} for s, t in zip(self.words_src, self.words_trg)]
+        return [
+            {"word_src": s, "word_trg": t, "word_trg2": t2, "category": c}
+            for s, t, t2, c in zip(self.words_src, self.words_trg, self.words_trg2, self.categories)
+        ]
+
+
+@dataclass(frozen=True)
+class CourseSeries:
+    """Seriya va uning tartiblangan unit/mavzulari."""
+    id: int
+    code: str
+    name: str
+    icon: str
+    items: Tuple[CourseItem, ...]
+
+    def page(self, page: int, per_page: int) -> Tuple[CourseItem, ...]:
+        offset = page * per_page
+        return self.items[offset:offset + per_page]
+
+
+@dataclass(frozen=True)
+class ContentIndex:
+    """Essential va Parallel kurslarining to'liq snapshot'i."""
+    essential_series: Mapping[str, CourseSeries]
+    essential_units: Mapping[int, CourseItem]
+    parallel_series: Mapping[str, CourseSeries]
+    parallel_topics: Mapping[int, CourseItem]
+
+
+EMPTY_INDEX = ContentIndex(
+    essential_series=MappingProxyType({}),
+    essential_units=MappingProxyType({}),
+    parallel_series=MappingProxyType({}),
+    parallel_topics=MappingProxyType({}),
+)
+
+_index: ContentIndex = EMPTY_INDEX
+_rebuild_lock = asyncio.Lock()
+
+
+# =====================================================
+# 📌 Yuklash
+# =====================================================
+def _group_entries(rows: List[Dict], key: str, extra: bool) -> Dict[int, Tuple[tuple, tuple, tuple, tuple]]:
+    """Entry qatorlarini parent id bo'yicha ustunlarga ajratish."""
+    grouped: Dict[int, Tuple[list, list, list, list]] = {}
+    for row in rows:
+        cols = grouped.setdefault(row[key], ([], [], [], []))
+        cols[0].append(row["word_src"])
+        cols[1].append(row["word_trg"])
+        cols[2].append(row.get("word_trg2") if extra else None)
+        cols[3].append(row.get("category") if extra else None)
+    return {pid: tuple(tuple(c) for c in cols) for pid, cols in grouped.items()}
+
+
+def _build_series(series_rows: List[Dict], item_rows: List[Dict],
+                  words: Dict[int, tuple]) -> Tuple[Dict[str, CourseSeries], Dict[int, CourseItem]]:
+    """Series va item qatorlaridan o'zgarmas tuzilma yasash."""
+    by_series: Dict[int, List[CourseItem]] = {}
+    series_by_id = {s["id"]: s for s in series_rows}
+    items: Dict[int, CourseItem] = {}
+
+    for row in item_rows:
+        series = series_by_id.get(row["series_id"])
+        if not series:
+            continue
+        src, trg, trg2, cats = words.get(row["id"], ((), (), (), ()))
+        item = CourseItem(
+            id=row["id"],
+            series_code=series["code"],
+            series_name=series["name"],
+            icon=series.get("icon") or "",
+            number=row.get("number") or 0,
+            title=row.get("title") or "",
+            display_name=row.get("display_name"),
+            difficulty_level=row.get("difficulty_level") or 0,
+            word_count=row.get("word_count") or 0,
+            words_src=src,
+            words_trg=trg,
+            words_trg2=trg2,
+            categories=cats,
+        )
+        items[item.id] = item
+        by_series.setdefault(row["series_id"], []).append(item)
+
+    result = {
+        s["code"]: CourseSeries(
+            id=s["id"], code=s["code"], name=s["name"], icon=s.get("icon") or "",
+            items=tuple(by_series.get(s["id"], ())),
+        )
+        for s in series_rows
+    }
+    return result, items
+
+
+async def _table_exists(table: str) -> bool:
+    if DB_TYPE == "postgres":
+        row = await db_exec("SELECT 1 FROM information_schema.tables WHERE table_name = %s",
+                            (table,), fetch=True)
+    else:
+        row = await db_exec("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                            (table,), fetch=True)
+    return row is not None
+
+
+async def _load_essential() -> Tuple[Dict[str, CourseSeries], Dict[int, CourseItem]]:
+    series = await db_exec("""
+                           SELECT id, code, name
+                           FROM essential_series
+                           WHERE is_active = TRUE
+                           ORDER BY level_order
+                           """, fetch=True, many=True)
+    units = await db_exec("""
+                          SELECT id, series_id, unit_number AS number, title, word_count
+                          FROM essential_books
+                          WHERE is_active = TRUE
+                          ORDER BY series_id, unit_number
+                          """, fetch=True, many=True)
+    entries = await db_exec("""
+                            SELECT book_id, word_src, word_trg
+                            FROM essential_entries
+                            WHERE is_active = TRUE
+                            ORDER BY book_id, position
+                            """, fetch=True, many=True)
+    return _build_series(series or [], units or [], _group_entries(entries or [], "book_id", extra=False))
+
+
+async def _load_parallel() -> Tuple[Dict[str, CourseSeries], Dict[int, CourseItem]]:
+    # "qaytatdan" jadvallarni o'chiradi - bu holda kurs bo'sh, eski snapshot emas
+    for table in ("parallel_series", "parallel_topics", "parallel_entries"):
+        if not await _table_exists(table):
+            return {}, {}
+    series = await db_exec("""
+                           SELECT id, code, name, icon
+                           FROM parallel_series
+                           WHERE is_active = TRUE
+                           ORDER BY id
+                           """, fetch=True, many=True)
+    topics = await db_exec("""
+                           SELECT id, series_id, topic_name AS title, display_name,
+                                  difficulty_level, word_count
+                           FROM parallel_topics
+                           WHERE is_active = TRUE
+                           ORDER BY series_id, topic_name
+                           """, fetch=True, many=True)
+    entries = await db_exec("""
+                            SELECT topic_id, word_src, word_trg, word_trg2, category
+                            FROM parallel_entries
+                            WHERE is_active = TRUE
+                            ORDER BY topic_id, position
+                            """, fetch=True, many=True)
+    return _build_series(series or [], topics or [], _group_entries(entries or [], "topic_id", extra=True))
+
+
+async def rebuild_content_index() -> ContentIndex:
+    """
+    Indeksni bazadan qayta qurish va atomik almashtirish.
+
+    Biror kurs yuklanmasa (DB xatosi), o'sha kurs uchun eski snapshot
+    saqlanib qoladi. Parallel jadvallari yo'q bo'lsa kurs bo'sh hisoblanadi.
+    """
+    global _index
+    async with _rebuild_lock:
+        current = _index
+
+        try:
+            essential_series, essential_units = await _load_essential()
+        except Exception as e:
+            logging.warning(f"Essential indeksini yuklashda xato: {e}")
+            essential_series, essential_units = current.essential_series, current.essential_units
+
+        try:
+            parallel_series, parallel_topics = await _load_parallel()
+        except Exception as e:
+            logging.warning(f"Parallel indeksini yuklashda xato: {e}")
+            parallel_series, parallel_topics = current.parallel_series, current.parallel_topics
+
+        _index = ContentIndex(
+            essential_series=MappingProxyType(dict(essential_series)),
+            essential_units=MappingProxyType(dict(essential_units)),
+            parallel_series=MappingProxyType(dict(parallel_series)),
+            parallel_topics=MappingProxyType(dict(parallel_topics)),
+        )
+        logging.info(
+            f"Kontent indeksi qurildi: {len(_index.essential_units)} essential unit, "
+            f"{len(_index.parallel_topics)} parallel mavzu"
+        )
+        return _index
+
+
+def get_content_index() -> ContentIndex:
+    """Joriy snapshot (DB so'rovisiz)."""
+    return _index
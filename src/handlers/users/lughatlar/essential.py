@@ -13,6 +13,12 @@ from src.handlers.users.lughatlar.vocabs import (
     get_user_data, db_exec, get_locale, safe_edit_or_send,
     cabinet_kb, BOOKS_PER_PAGE
 )
+from src.handlers.users.lughatlar.content_index import get_content_index, rebuild_content_index
+from src.handlers.users.lughatlar.quiz import build_quiz, option_matches
+from src.utils.session_tracker import session_tracker
+from src.handlers.users.lughatlar.review_queue import flush_session_reviews
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import QuizAnswer
 from config import ADMIN_ID
 
 essential_router = Router()
@@ -305,8 +311,8 @@ def essential_units_kb(series_code: str, units: list, page: int, total_pages: in
         for j in range(2):
             if i + j < len(units):
                 unit = units[i + j]
-                text = f"Unit {unit['unit_number']} ({unit['word_count']})"
-                callback = f"essential:unit:{unit['id']}"
+                text = f"Unit {unit.number} ({unit.word_count})"
+                callback = f"essential:unit:{unit.id}"
                 row.append(InlineKeyboardButton(text=text, callback_data=callback))
         unit_rows.append(row)
 
@@ -351,16 +357,9 @@ def essential_practice_kb(lang: str) -> InlineKeyboardMarkup:
 # 📌 Practice functions
 # =====================================================
 async def get_unit_words(unit_id: int) -> list:
-    """Unit so'zlarini olish."""
-    words = await db_exec("""
-                          SELECT word_src, word_trg
-                          FROM essential_entries
-                          WHERE book_id = %s
-                            AND is_active = TRUE
-                          ORDER BY position
-                          """, (unit_id,), fetch=True, many=True)
-
-    return words or []
+    """Unit so'zlarini olish (kontent indeksidan)."""
+    unit = get_content_index().essential_units.get(unit_id)
+    return unit.word_dicts() if unit else []
 
 
 async def send_next_essential_question(msg: Message, state: FSMContext, lang: str):
@@ -379,27 +378,17 @@ async def send_next_essential_question(msg: Message, state: FSMContext, lang: st
         })
         random.shuffle(words)
         await state.update_data(
-            words=words, index=0, cycles=cycles, cycles_stats=cycles_stats,
+            words=words, quiz=build_quiz(words), index=0, cycles=cycles, cycles_stats=cycles_stats,
             current_cycle_correct=0, current_cycle_wrong=0
         )
         data = await state.get_data()
         index = 0
 
     current = data["words"][index]
-    correct_answer = current["word_trg"]
-    options = [correct_answer]
-    seen = set(options)
-
-    # Noto'g'ri javoblar qo'shish
-    while len(options) < 4 and len(options) < len(data["words"]):
-        candidate = random.choice(data["words"])["word_trg"]
-        if candidate not in seen:
-            options.append(candidate)
-            seen.add(candidate)
 
-    random.shuffle(options)
-
-    kb_rows = [[InlineKeyboardButton(text=o, callback_data=f"essential_ans:{index}:{o}")] for o in options]
+    kb_rows = [[InlineKeyboardButton(text=data["words"][o]["word_trg"],
+                                     callback_data=QuizAnswer("essential", index, o).pack())]
+               for o in data["quiz"][index]]
     kb_rows.extend([
         [InlineKeyboardButton(text=L["finish"], callback_data="essential:finish")],
         [InlineKeyboardButton(text=L["main_menu"], callback_data="cab:back")]
@@ -469,6 +458,9 @@ async def cmd_import_essentials(msg: Message):
     result_text += "\n".join(imported_files)
     result_text += f"\n\n📊 Jami: {total_units} unit, {total_words} so'z"
 
+    # Kontent indeksini yangilash
+    await rebuild_content_index()
+
     await msg.answer(result_text)
 
 
@@ -496,34 +488,15 @@ async def cb_essential_series(cb: CallbackQuery):
     lang = user_data["lang"]
 
     # Series mavjudligini tekshirish
-    series = await db_exec(
-        "SELECT id, name FROM essential_series WHERE code = %s AND is_active = TRUE",
-        (series_code,), fetch=True
-    )
+    series = get_content_index().essential_series.get(series_code)
 
     if not series:
         await cb.answer("❌ Series topilmadi!", show_alert=True)
         return
 
     # Units ro'yxatini olish
-    offset = page * BOOKS_PER_PAGE
-    units = await db_exec("""
-                          SELECT id, unit_number, word_count, title
-                          FROM essential_books
-                          WHERE series_id = %s
-                            AND is_active = TRUE
-                          ORDER BY unit_number
-                              LIMIT %s
-                          OFFSET %s
-                          """, (series['id'], BOOKS_PER_PAGE, offset), fetch=True, many=True)
-
-    # Umumiy soni
-    total_count = await db_exec(
-        "SELECT COUNT(*) as count FROM essential_books WHERE series_id = %s AND is_active = TRUE",
-        (series['id'],), fetch=True
-    )
-
-    total = total_count.get('count', 0) if total_count else 0
+    units = series.page(page, BOOKS_PER_PAGE)
+    total = len(series.items)
 
     if not units and page == 0:
         await cb.answer("❌ Bu seriyada unitlar mavjud emas!", show_alert=True)
@@ -536,7 +509,7 @@ async def cb_essential_series(cb: CallbackQuery):
     total_pages = ceil(total / BOOKS_PER_PAGE)
     kb = essential_units_kb(series_code, units, page, total_pages, lang)
 
-    header_text = f"📚 {series['name']}\n📊 Jami {total} ta unit"
+    header_text = f"📚 {series.name}\n📊 Jami {total} ta unit"
     if total_pages > 1:
         header_text += f"\n📄 {page + 1}/{total_pages} sahifa"
 
@@ -551,20 +524,14 @@ async def cb_essential_unit_practice(cb: CallbackQuery, state: FSMContext):
     user_id = cb.from_user.id
 
     # Unit ma'lumotlarini olish
-    unit_info = await db_exec("""
-                              SELECT eb.unit_number, eb.title, eb.word_count, es.name as series_name
-                              FROM essential_books eb
-                                       JOIN essential_series es ON eb.series_id = es.id
-                              WHERE eb.id = %s
-                                AND eb.is_active = TRUE
-                              """, (unit_id,), fetch=True)
+    unit_info = get_content_index().essential_units.get(unit_id)
 
     if not unit_info:
         await cb.answer("❌ Unit topilmadi!", show_alert=True)
         return
 
     # So'zlarni olish
-    words = await get_unit_words(unit_id)
+    words = unit_info.word_dicts()
 
     if len(words) < 4:
         await cb.answer("❌ Bu unitda yetarli so'z yo'q (kamida 4 ta kerak)!", show_alert=True)
@@ -574,7 +541,7 @@ async def cb_essential_unit_practice(cb: CallbackQuery, state: FSMContext):
     lang = user_data["lang"]
 
     # So'zlar ro'yxatini tayyorlash
-    unit_title = f"{unit_info['series_name']} - Unit {unit_info['unit_number']}"
+    unit_title = f"{unit_info.series_name} - Unit {unit_info.number}"
     words_list = []
     for idx, word in enumerate(words, 1):
         words_list.append(f"{idx}. <b>{word['word_src']}</b> - {word['word_trg']}")
@@ -584,12 +551,16 @@ async def cb_essential_unit_practice(cb: CallbackQuery, state: FSMContext):
     words_text += "\n".join(words_list)
     words_text += "\n\n💡 So'zlarni ko'rib chiqing va tayyor bo'lganingizda mashqni boshlang!"
 
+    # Shaxsiy lug'at mashqidan qolgan javoblar (state almashtiriladi)
+    await flush_session_reviews(cb.from_user.id, state)
+
     # So'zlarni state'ga saqlash
     random.shuffle(words)
     await state.update_data(
         unit_id=unit_id,
         unit_title=unit_title,
         words=words,
+        quiz=build_quiz(words),
         index=0,
         correct=0,
         wrong=0,
@@ -629,25 +600,25 @@ async def cb_begin_essential_practice(cb: CallbackQuery, state: FSMContext):
     await cb.answer()
 
 
-@essential_router.callback_query(lambda c: c.data and c.data.startswith("essential_ans:"))
-async def cb_essential_answer(cb: CallbackQuery, state: FSMContext):
+@essential_router.callback_query(OnCallback(QuizAnswer, mode="essential"))
+async def cb_essential_answer(cb: CallbackQuery, state: FSMContext, callback_data: QuizAnswer):
     """Essential mashq javobini tekshirish."""
     data = await state.get_data()
-    _, idx_str, chosen = cb.data.split(":", 2)
-    idx = int(idx_str)
+    idx = callback_data.index
 
-    if idx >= len(data["words"]):
+    if not (0 <= idx < len(data["words"]) and 0 <= callback_data.option < len(data["words"])):
         await cb.answer("❌ Xato", show_alert=True)
         return
 
     current = data["words"][idx]
     correct_answer = current["word_trg"]
     data["answers"] = data.get("answers", 0) + 1
+    session_tracker.note(cb.from_user.id, "exercises")
 
     user_data = await get_user_data(cb.from_user.id)
     L = get_locale(user_data["lang"])
 
-    if chosen == correct_answer:
+    if option_matches(data["words"], idx, callback_data.option):
         data["correct"] = data.get("correct", 0) + 1
         data["current_cycle_correct"] = data.get("current_cycle_correct", 0) + 1
         await cb.answer(L["correct"])
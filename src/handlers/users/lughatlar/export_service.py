@@ -0,0 +1,117 @@
+"""
+📤 Lug'at eksport xizmati
+
+Fayllar worker thread'da xotiradagi buferga quriladi (diskka yozilmaydi)
+va (book_id, format, kontent versiyasi) bo'yicha keshlanadi: o'zgarmagan
+lug'atni qayta eksport qilish faqat bitta yengil versiya so'rovini talab
+qiladi.
+"""
+
+import asyncio
+import csv
+import io
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.handlers.users.lughatlar.vocabs import db_exec
+from src.utils.lazy_imports import lazy_import
+from src.utils.metrics import cache_hit
+
+openpyxl = lazy_import("openpyxl")
+
+EXPORT_FORMATS = {
+    "xlsx": "📊 Excel (.xlsx)",
+    "csv": "📄 CSV (.csv)",
+    "tsv": "📄 TSV (.tsv)",
+}
+EXPORT_HEADER = ["Word", "Translation"]
+EXPORT_CACHE_SIZE = 64
+
+# (book_id, fmt) -> (version, data)
+_export_cache: "OrderedDict[Tuple[int, str], Tuple[tuple, bytes]]" = OrderedDict()
+
+
+# =====================================================
+# 📌 Fayl quruvchilar (worker thread'da ishlaydi)
+# =====================================================
+def _build_xlsx(rows: List[Dict]) -> bytes:
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Vocabulary")
+    ws.append(EXPORT_HEADER)
+    for r in rows:
+        ws.append([r["word_src"], r["word_trg"]])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _build_delimited(rows: List[Dict], delimiter: str) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(EXPORT_HEADER)
+    writer.writerows((r["word_src"], r["word_trg"]) for r in rows)
+    # BOM - Excel UTF-8 ni to'g'ri ochishi uchun
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def _build(rows: List[Dict], fmt: str) -> bytes:
+    if fmt == "xlsx":
+        return _build_xlsx(rows)
+    return _build_delimited(rows, "\t" if fmt == "tsv" else ",")
+
+
+# =====================================================
+# 📌 Public API
+# =====================================================
+async def get_book_version(book_id: int) -> tuple:
+    """Lug'at kontent versiyasi: so'zlar soni va oxirgi id."""
+    row = await db_exec(
+        "SELECT COUNT(*) AS cnt, MAX(id) AS max_id FROM vocab_entries WHERE book_id=%s",
+        (book_id,), fetch=True
+    )
+    return (row["cnt"], row["max_id"]) if row else (0, None)
+
+
+async def export_book(book_id: int, fmt: str = "xlsx") -> Optional[Tuple[bytes, str]]:
+    """
+    Lug'atni berilgan formatda eksport qilish.
+
+    Returns:
+        (fayl baytlari, fayl nomi) yoki lug'at bo'sh bo'lsa None
+    """
+    if fmt not in EXPORT_FORMATS:
+        fmt = "xlsx"
+
+    version = await get_book_version(book_id)
+    if not version[0]:
+        return None
+
+    filename = f"vocab_{book_id}.{fmt}"
+    key = (book_id, fmt)
+    cached = _export_cache.get(key)
+    cache_hit("vocab_export", bool(cached and cached[0] == version))
+    if cached and cached[0] == version:
+        _export_cache.move_to_end(key)
+        return cached[1], filename
+
+    rows = await db_exec(
+        "SELECT word_src, word_trg FROM vocab_entries WHERE book_id=%s ORDER BY id",
+        (book_id,), fetch=True, many=True
+    )
+    if not rows:
+        return None
+
+    data = await asyncio.to_thread(_build, rows, fmt)
+
+    _export_cache[key] = (version, data)
+    _export_cache.move_to_end(key)
+    while len(_export_cache) > EXPORT_CACHE_SIZE:
+        _export_cache.popitem(last=False)
+
+    return data, filename
+
+
+def invalidate_book_exports(book_id: int) -> None:
+    """Lug'at o'chirilganda uning keshlangan fayllarini tashlash."""
+    for fmt in EXPORT_FORMATS:
+        _export_cache.pop((book_id, fmt), None)
@@ -1,16 +1,21 @@
 from aiogram import Router
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-import os
 from math import ceil
 import logging
 
 from src.handlers.users.lughatlar.vocabs import (
     get_user_data, db_exec, get_locale, two_col_rows,
-    safe_edit_or_send, export_book_to_excel, cabinet_kb,
+    safe_edit_or_send, cabinet_kb,
     get_paginated_books, create_paginated_kb, BOOKS_PER_PAGE
 )
+from src.handlers.users.lughatlar.review_queue import flush_session_reviews
+from src.handlers.users.lughatlar.export_service import (
+    export_book, invalidate_book_exports, EXPORT_FORMATS
+)
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import LughatExport
 
 # Gamification imports
 try:
@@ -47,7 +52,7 @@ def book_detail_kb(book_id: int, is_public: bool, lang: str) -> InlineKeyboardMa
     L = get_locale(lang)
     buttons = [
         [InlineKeyboardButton(text="➕ So'z qo'shish", callback_data=f"lughat:add:{book_id}")],
-        [InlineKeyboardButton(text="📤 Export", callback_data=f"lughat:export:{book_id}")],
+        [InlineKeyboardButton(text="📤 Export", callback_data=LughatExport(book_id).pack())],
     ]
 
     # Ommaviylik tugmasi
@@ -63,6 +68,15 @@ def book_detail_kb(book_id: int, is_public: bool, lang: str) -> InlineKeyboardMa
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def export_format_kb(book_id: int, lang: str) -> InlineKeyboardMarkup:
+    """Eksport formatini tanlash klaviaturasi."""
+    L = get_locale(lang)
+    rows = [[InlineKeyboardButton(text=title, callback_data=LughatExport(book_id, fmt).pack())]
+            for fmt, title in EXPORT_FORMATS.items()]
+    rows.append([InlineKeyboardButton(text=L["back"], callback_data=f"lughat:open:{book_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
 def confirm_delete_kb(book_id: int, lang: str) -> InlineKeyboardMarkup:
     L = get_locale(lang)
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -132,6 +146,8 @@ async def cb_new_book(cb: CallbackQuery, state: FSMContext):
     lang = data["lang"]
     L = get_locale(lang)
 
+    # Lug'at yaratish oxirida state tozalanadi
+    await flush_session_reviews(cb.from_user.id, state)
     await safe_edit_or_send(cb, L["enter_book_name"], new_book_cancel_kb(lang), lang)
     await state.set_state(LughatStates.waiting_book_name)
     await cb.answer()
@@ -165,8 +181,6 @@ async def add_book(msg: Message, state: FSMContext):
             xp_result = GamificationEngine.add_xp(user_id, XPRewards.VOCAB_BOOK_CREATE, "Created vocabulary book")
             if xp_result.get("success"):
                 xp_text = f"\n\n💎 <b>+{xp_result['xp_added']} XP</b> lug'at yaratish uchun!"
-                if xp_result.get("level_up"):
-                    xp_text += f"\n🎉 <b>Level up!</b> Siz {xp_result['new_level']}-leveldasiz!"
                 
                 # Check for new achievements
                 new_achievements = check_user_achievements(user_id)
@@ -357,8 +371,6 @@ async def add_words(msg: Message, state: FSMContext):
                 xp_result = GamificationEngine.add_xp(msg.from_user.id, total_xp, f"Added {added_count} words")
                 if xp_result.get("success"):
                     xp_text = f"\n\n💎 <b>+{total_xp} XP</b> so'zlar qo'shish uchun!"
-                    if xp_result.get("level_up"):
-                        xp_text += f"\n🎉 <b>Level up!</b> Siz {xp_result['new_level']}-leveldasiz!"
                     
                     # Update daily challenge progress
                     if DailyChallengeManager:
@@ -376,28 +388,33 @@ async def add_words(msg: Message, state: FSMContext):
         await msg.answer("❌ Hech qanday yangi so'z qo'shilmadi", reply_markup=add_words_back_kb(book_id, lang))
 
 
-@lughatlarim_router.callback_query(lambda c: c.data and c.data.startswith("lughat:export:"))
-async def cb_book_export(cb: CallbackQuery):
+@lughatlarim_router.callback_query(OnCallback(LughatExport))
+async def cb_book_export(cb: CallbackQuery, callback_data: LughatExport):
     """Lug'atni export qilish."""
-    book_id = int(cb.data.split(":")[2])
+    book_id = callback_data.book_id
     user_id = cb.from_user.id
     data = await get_user_data(user_id)
     lang = data["lang"]
     L = get_locale(lang)
 
-    await cb.answer("⏳ Fayl tayyorlanmoqda...")
-    file_path = await export_book_to_excel(book_id, user_id)
-    if not file_path:
+    # Format hali tanlanmagan - tanlash menyusini ko'rsatish
+    if callback_data.fmt is None:
+        await safe_edit_or_send(cb, "📤 " + L["export"], export_format_kb(book_id, lang), lang)
+        await cb.answer()
+        return
+
+    result = await export_book(book_id, callback_data.fmt)
+    if not result:
         await cb.answer("❌ " + L["empty_book"], show_alert=True)
         return
+    await cb.answer("⏳ Fayl tayyorlanmoqda...")
 
+    file_bytes, filename = result
     try:
         await cb.message.delete()
-        file = FSInputFile(file_path)
-        await cb.message.answer_document(file, caption="📤 " + L["export"])
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    except Exception:
+        pass
+    await cb.message.answer_document(BufferedInputFile(file_bytes, filename=filename), caption="📤 " + L["export"])
 
     # Lug'atlar ro'yxatiga qaytish
     books, total_count = await get_paginated_books(user_id, 0, BOOKS_PER_PAGE, min_words=0)
@@ -430,6 +447,7 @@ async def cb_book_delete(cb: CallbackQuery):
 
     await db_exec("DELETE FROM vocab_entries WHERE book_id=%s", (book_id,))
     await db_exec("DELETE FROM vocab_books WHERE id=%s AND user_id=%s", (book_id, user_id))
+    invalidate_book_exports(book_id)
 
     # Lug'atlar ro'yxatiga qaytish
     books, total_count = await get_paginated_books(user_id, 0, BOOKS_PER_PAGE, min_words=0)
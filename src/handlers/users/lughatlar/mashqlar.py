@@ -11,6 +11,13 @@ from src.handlers.users.lughatlar.vocabs import (
     safe_edit_or_send, cabinet_kb, BOOKS_PER_PAGE, get_book_emoji,
     get_paginated_books
 )
+from src.handlers.users.lughatlar.review_queue import (
+    get_due_words, save_reviews, record_answer, flush_session_reviews
+)
+from src.handlers.users.lughatlar.quiz import build_quiz, option_matches
+from src.utils.session_tracker import session_tracker
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import QuizAnswer
 
 # Gamification imports
 try:
@@ -142,10 +149,8 @@ async def cb_start_practice(cb: CallbackQuery, state: FSMContext):
         await cb.answer("Lug'at topilmadi yoki sizga tegishli emas!", show_alert=True)
         return
 
-    rows = await db_exec(
-        "SELECT word_src, word_trg FROM vocab_entries WHERE book_id=%s",
-        (book_id,), fetch=True, many=True
-    )
+    # Faqat keyingi takrorlanadigan so'zlar (butun lug'at emas)
+    rows = await get_due_words(user_id, book_id)
 
     data = await get_user_data(user_id)
     lang = data["lang"]
@@ -162,16 +167,20 @@ async def cb_start_practice(cb: CallbackQuery, state: FSMContext):
         words_list.append(f"{idx}. <b>{word['word_src']}</b> - {word['word_trg']}")
     
     words_text = f"📖 <b>{book_name}</b>\n"
-    words_text += f"📊 Jami: {len(rows)} ta so'z\n\n"
+    words_text += f"📊 Takrorlash uchun: {len(rows)} ta so'z\n\n"
     words_text += "\n".join(words_list)
     words_text += "\n\n💡 So'zlarni ko'rib chiqing va tayyor bo'lganingizda mashqni boshlang!"
 
+    # Oldingi (tashlab ketilgan) mashqning javoblari
+    await flush_session_reviews(user_id, state)
+
     # So'zlarni state'ga saqlash
     random.shuffle(rows)
     await state.update_data(
         book_id=book_id,
         book_name=book_name,
         words=rows,
+        quiz=build_quiz(rows),
         index=0,
         correct=0,
         wrong=0,
@@ -180,7 +189,9 @@ async def cb_start_practice(cb: CallbackQuery, state: FSMContext):
         cycles=0,
         current_cycle_correct=0,
         current_cycle_wrong=0,
-        cycles_stats=[]
+        cycles_stats=[],
+        pending_reviews={},
+        graded_entries=[]
     )
     await state.set_state(MashqStates.ready_to_start)
     
@@ -227,6 +238,7 @@ async def send_next_question(msg: Message, state: FSMContext, lang: str):
         random.shuffle(words)
         await state.update_data(
             words=words,
+            quiz=build_quiz(words),
             index=0,
             cycles=cycles,
             cycles_stats=cycles_stats,
@@ -237,21 +249,11 @@ async def send_next_question(msg: Message, state: FSMContext, lang: str):
         index = 0
 
     current = data["words"][index]
-    correct_answer = current["word_trg"]
-    options = [correct_answer]
-    seen = set(options)
-
-    # Noto'g'ri variantlarni qo'shish
-    while len(options) < 4 and len(options) < len(data["words"]):
-        candidate = random.choice(data["words"])["word_trg"]
-        if candidate not in seen:
-            options.append(candidate)
-            seen.add(candidate)
-
-    random.shuffle(options)
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
-                            [InlineKeyboardButton(text=o, callback_data=f"ans:{index}:{o}")] for o in options] +
+                            [InlineKeyboardButton(text=data["words"][o]["word_trg"],
+                                                  callback_data=QuizAnswer("mashq", index, o).pack())]
+                            for o in data["quiz"][index]] +
                         [
                             [InlineKeyboardButton(text=L["finish"], callback_data="mashq:finish")],
                             [InlineKeyboardButton(text=L["main_menu"], callback_data="mashq:back_to_cabinet")]
@@ -271,25 +273,26 @@ async def send_next_question(msg: Message, state: FSMContext, lang: str):
     await msg.answer(question_text, reply_markup=kb)
 
 
-@mashqlar_router.callback_query(lambda c: c.data and c.data.startswith("ans:"))
-async def cb_practice_answer(cb: CallbackQuery, state: FSMContext):
+@mashqlar_router.callback_query(OnCallback(QuizAnswer, mode="mashq"))
+async def cb_practice_answer(cb: CallbackQuery, state: FSMContext, callback_data: QuizAnswer):
     """Javobni tekshirish."""
     data = await state.get_data()
-    _, idx_str, chosen = cb.data.split(":", 2)
-    idx = int(idx_str)
+    idx = callback_data.index
 
-    if idx >= len(data["words"]):
+    if not (0 <= idx < len(data["words"]) and 0 <= callback_data.option < len(data["words"])):
         await cb.answer("Xato", show_alert=True)
         return
 
     current = data["words"][idx]
     correct_answer = current["word_trg"]
     data["answers"] = data.get("answers", 0) + 1
+    session_tracker.note(cb.from_user.id, "exercises")
 
     user_data = await get_user_data(cb.from_user.id)
     L = get_locale(user_data["lang"])
 
-    if chosen == correct_answer:
+    is_correct = option_matches(data["words"], idx, callback_data.option)
+    if is_correct:
         data["correct"] = data.get("correct", 0) + 1
         data["current_cycle_correct"] = data.get("current_cycle_correct", 0) + 1
         await cb.answer(L["correct"])
@@ -298,6 +301,14 @@ async def cb_practice_answer(cb: CallbackQuery, state: FSMContext):
         data["current_cycle_wrong"] = data.get("current_cycle_wrong", 0) + 1
         await cb.answer(L["wrong"].format(correct=correct_answer), show_alert=True)
 
+    # Takrorlash navbatini yangilash (faqat birinchi javob, batch bilan yoziladi)
+    if "entry_id" in current and record_answer(data, current, is_correct):
+        try:
+            await save_reviews(cb.from_user.id, data["book_id"], data["pending_reviews"])
+            data["pending_reviews"] = {}
+        except Exception as e:
+            logging.error(f"Review queue flush error: {e}")
+
     data["index"] = idx + 1
     await state.update_data(**data)
     await send_next_question(cb.message, state, user_data["lang"])
@@ -320,6 +331,9 @@ async def cb_practice_finish(cb: CallbackQuery, state: FSMContext):
     L = get_locale(user_data["lang"])
     user_id = cb.from_user.id
 
+    # Qolgan javoblarni takrorlash navbatiga yozish
+    await flush_session_reviews(user_id, state)
+
     full_text = f"📖 {book_name}\n"
     full_text += f"{L['results_header']}\n\n"
     full_text += f"{L['results_lines'].format(unique=total_unique, answers=total_answers, correct=total_correct, wrong=total_wrong, percent=percent)}"
@@ -346,9 +360,6 @@ async def cb_practice_finish(cb: CallbackQuery, state: FSMContext):
             xp_result = award_practice_xp(user_id, total_correct, total_answers)
             if xp_result.get("success"):
                 full_text += f"\n\n💎 <b>+{xp_result['xp_added']} XP</b> mashq uchun!"
-                
-                if xp_result.get("level_up"):
-                    full_text += f"\n🎉 <b>Level up!</b> Siz {xp_result['new_level']}-leveldasiz!"
             
             # Update daily challenge progress
             if DailyChallengeManager:
@@ -10,6 +10,11 @@ from src.handlers.users.lughatlar.vocabs import (
     safe_edit_or_send, cabinet_kb, get_paginated_books,
     create_paginated_kb, BOOKS_PER_PAGE
 )
+from src.handlers.users.lughatlar.quiz import build_quiz, option_matches
+from src.utils.session_tracker import session_tracker
+from src.handlers.users.lughatlar.review_queue import flush_session_reviews
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import QuizAnswer
 
 ommaviylar_router = Router()
 
@@ -276,12 +281,16 @@ async def cb_start_public_practice(cb: CallbackQuery, state: FSMContext):
     words_text += "\n".join(words_list)
     words_text += "\n\n💡 So'zlarni ko'rib chiqing va tayyor bo'lganingizda mashqni boshlang!"
 
+    # Shaxsiy lug'at mashqidan qolgan javoblar (state almashtiriladi)
+    await flush_session_reviews(cb.from_user.id, state)
+
     # So'zlarni state'ga saqlash
     random.shuffle(rows)
     await state.update_data(
         book_id=book_id,
         book_name=book_name,
         words=rows,
+        quiz=build_quiz(rows),
         index=0,
         correct=0,
         wrong=0,
@@ -338,6 +347,7 @@ async def send_next_public_question(msg: Message, state: FSMContext, lang: str):
         random.shuffle(words)
         await state.update_data(
             words=words,
+            quiz=build_quiz(words),
             index=0,
             cycles=cycles,
             cycles_stats=cycles_stats,
@@ -348,23 +358,11 @@ async def send_next_public_question(msg: Message, state: FSMContext, lang: str):
         index = 0
 
     current = data["words"][index]
-    correct_answer = current["word_trg"]
-    options = [correct_answer]
-    seen = set(options)
-
-    # To'g'ri javobdan boshqa variantlar tanlash
-    while len(options) < 4 and len(options) < len(data["words"]):
-        candidate = random.choice(data["words"])["word_trg"]
-        if candidate not in seen:
-            options.append(candidate)
-            seen.add(candidate)
-
-    random.shuffle(options)
 
     kb = InlineKeyboardMarkup(inline_keyboard=[
-                                                  [InlineKeyboardButton(text=o,
-                                                                        callback_data=f"ommaviy_ans:{index}:{o}")] for o
-                                                  in options
+                                                  [InlineKeyboardButton(text=data["words"][o]["word_trg"],
+                                                                        callback_data=QuizAnswer("ommaviy", index, o).pack())]
+                                                  for o in data["quiz"][index]
                                               ] + [
                                                   [InlineKeyboardButton(text=L["finish"],
                                                                         callback_data="ommaviy:finish")],
@@ -385,25 +383,25 @@ async def send_next_public_question(msg: Message, state: FSMContext, lang: str):
     await msg.answer(question_text, reply_markup=kb)
 
 
-@ommaviylar_router.callback_query(lambda c: c.data and c.data.startswith("ommaviy_ans:"))
-async def cb_public_practice_answer(cb: CallbackQuery, state: FSMContext):
+@ommaviylar_router.callback_query(OnCallback(QuizAnswer, mode="ommaviy"))
+async def cb_public_practice_answer(cb: CallbackQuery, state: FSMContext, callback_data: QuizAnswer):
     """Ommaviy mashq javobini tekshirish."""
     data = await state.get_data()
-    _, idx_str, chosen = cb.data.split(":", 2)
-    idx = int(idx_str)
+    idx = callback_data.index
 
-    if idx >= len(data["words"]):
+    if not (0 <= idx < len(data["words"]) and 0 <= callback_data.option < len(data["words"])):
         await cb.answer("❌", show_alert=True)
         return
 
     current = data["words"][idx]
     correct_answer = current["word_trg"]
     data["answers"] = data.get("answers", 0) + 1
+    session_tracker.note(cb.from_user.id, "exercises")
 
     user_data = await get_user_data(cb.from_user.id)
     L = get_locale(user_data["lang"])
 
-    if chosen == correct_answer:
+    if option_matches(data["words"], idx, callback_data.option):
         data["correct"] = data.get("correct", 0) + 1
         data["current_cycle_correct"] = data.get("current_cycle_correct", 0) + 1
         await cb.answer(L["correct"])
@@ -12,7 +12,13 @@ from src.handlers.users.lughatlar.vocabs import (
     get_user_data, db_exec, get_locale, safe_edit_or_send,
     cabinet_kb, BOOKS_PER_PAGE
 )
+from src.handlers.users.lughatlar.content_index import get_content_index, rebuild_content_index
 from config import ADMIN_ID, DB_TYPE
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import ParallelSeries, ParallelTopic, QuizAnswer
+from src.handlers.users.lughatlar.quiz import build_quiz, option_matches
+from src.utils.session_tracker import session_tracker
+from src.handlers.users.lughatlar.review_queue import flush_session_reviews
 
 parallel_router = Router()
 
@@ -37,7 +43,6 @@ TOPIC_DIFFICULTY = {
 }
 
 # Telegram cheklovlari
-MAX_CALLBACK_DATA_LENGTH = 64
 MAX_BUTTON_TEXT_LENGTH = 40
 MAX_MESSAGE_LENGTH = 4096
 
@@ -53,14 +58,6 @@ class ParallelStates(StatesGroup):
 # =====================================================
 # 📌 Utility functions (Xatoliklarni oldini olish)
 # =====================================================
-def safe_callback_data(data: str, max_length: int = MAX_CALLBACK_DATA_LENGTH) -> str:
-    """Callback datani xavfsiz formatda qaytarish."""
-    if len(data) > max_length:
-        # Agar uzun bo'lsa, oxirgi qismini olib tashlaymiz
-        return data[:max_length - 3] + "..."
-    return data
-
-
 def safe_button_text(text: str, max_length: int = MAX_BUTTON_TEXT_LENGTH) -> str:
     """Tugma matnini xavfsiz formatda qaytarish."""
     if len(text) > max_length:
@@ -402,7 +399,7 @@ def parallel_main_kb(lang: str) -> InlineKeyboardMarkup:
     buttons = []
     for code, info in PARALLEL_SERIES.items():
         text = safe_button_text(f"{info['icon']} {info['name']}")
-        callback_data = safe_callback_data(f"parallel:series:{code}")
+        callback_data = ParallelSeries(code).pack()
         buttons.append([InlineKeyboardButton(text=text, callback_data=callback_data)])
 
     buttons.append([InlineKeyboardButton(text=L["back"], callback_data="parallel:back_to_cabinet")])
@@ -417,10 +414,10 @@ def parallel_topics_kb(series_code: str, topics: list, page: int, total_pages: i
 
     # Topics tugmalari
     for topic in topics:
-        difficulty_icon = get_difficulty_icon(topic['difficulty_level'])
-        display_name = topic['display_name'] or get_topic_display_name(topic['topic_name'])
-        text = safe_button_text(f"{difficulty_icon} {display_name} ({topic['word_count']})")
-        callback = safe_callback_data(f"parallel:topic:{topic['id']}")
+        difficulty_icon = get_difficulty_icon(topic.difficulty_level)
+        display_name = topic.display_name or get_topic_display_name(topic.title)
+        text = safe_button_text(f"{difficulty_icon} {display_name} ({topic.word_count})")
+        callback = ParallelTopic(topic.id).pack()
         rows.append([InlineKeyboardButton(text=text, callback_data=callback)])
 
     # Sahifalash
@@ -429,12 +426,12 @@ def parallel_topics_kb(series_code: str, topics: list, page: int, total_pages: i
         if page > 0:
             nav_row.append(InlineKeyboardButton(
                 text=L["prev_page"],
-                callback_data=safe_callback_data(f"parallel:series:{series_code}:{page - 1}")
+                callback_data=ParallelSeries(series_code, page - 1).pack()
             ))
         if page < total_pages - 1:
             nav_row.append(InlineKeyboardButton(
                 text=L["next_page"],
-                callback_data=safe_callback_data(f"parallel:series:{series_code}:{page + 1}")
+                callback_data=ParallelSeries(series_code, page + 1).pack()
             ))
         if nav_row:
             rows.append(nav_row)
@@ -457,15 +454,15 @@ def start_parallel_practice_kb(lang: str) -> InlineKeyboardMarkup:
     ])
 
 
-def create_question_kb(options: list, current_index: int, lang: str) -> InlineKeyboardMarkup:
+def create_question_kb(words: list, options: list, current_index: int, lang: str) -> InlineKeyboardMarkup:
     """Savol uchun klaviatura yaratish (xavfsiz versiya)."""
     L = get_locale(lang)
     kb_rows = []
 
-    # Variant tugmalari
-    for i, option in enumerate(options):
-        option_text = safe_button_text(option)
-        callback_data = safe_callback_data(f"parallel_ans:{current_index}:{i}")
+    # Variant tugmalari (options - words dagi indekslar)
+    for option in options:
+        option_text = safe_button_text(words[option]["word_trg"])
+        callback_data = QuizAnswer("parallel", current_index, option).pack()
         kb_rows.append([InlineKeyboardButton(text=option_text, callback_data=callback_data)])
 
     # Boshqaruv tugmalari
@@ -481,16 +478,9 @@ def create_question_kb(options: list, current_index: int, lang: str) -> InlineKe
 # 📌 Practice functions
 # =====================================================
 async def get_topic_words(topic_id: int) -> list:
-    """Topic so'zlarini olish."""
-    words = await db_exec("""
-                          SELECT word_src, word_trg, word_trg2, category
-                          FROM parallel_entries
-                          WHERE topic_id = %s
-                            AND is_active = TRUE
-                          ORDER BY position
-                          """, (topic_id,), fetch=True, many=True)
-
-    return words or []
+    """Topic so'zlarini olish (kontent indeksidan)."""
+    topic = get_content_index().parallel_topics.get(topic_id)
+    return topic.word_dicts(with_extra=True) if topic else []
 
 
 async def send_next_parallel_question(msg: Message, state: FSMContext, lang: str):
@@ -509,31 +499,14 @@ async def send_next_parallel_question(msg: Message, state: FSMContext, lang: str
             })
             random.shuffle(words)
             await state.update_data(
-                words=words, index=0, cycles=cycles, cycles_stats=cycles_stats,
+                words=words, quiz=build_quiz(words), index=0, cycles=cycles, cycles_stats=cycles_stats,
                 current_cycle_correct=0, current_cycle_wrong=0
             )
             data = await state.get_data()
             index = 0
 
         current = data["words"][index]
-        correct_answer = current["word_trg"]
-        options = [correct_answer]
-        seen = set(options)
-
-        # Noto'g'ri javoblar qo'shish
-        while len(options) < 4 and len(options) < len(data["words"]):
-            candidate = random.choice(data["words"])["word_trg"]
-            if candidate not in seen:
-                options.append(candidate)
-                seen.add(candidate)
-
-        random.shuffle(options)
-
-        # Saqlash uchun to'g'ri javob indeksini topish
-        correct_index = options.index(correct_answer)
-        await state.update_data(current_options=options, correct_index=correct_index)
-
-        kb = create_question_kb(options, index, lang)
+        kb = create_question_kb(data["words"], data["quiz"][index], index, lang)
 
         # Progress ko'rsatish
         progress_text = f"📊 {data.get('correct', 0)}/{data.get('answers', 0)} to'g'ri"
@@ -606,6 +579,9 @@ async def cmd_import_parallels(msg: Message):
     result_text += "\n".join(results)
     result_text += f"\n\n📊 Jami: {total_topics} mavzu, {total_words} so'z"
 
+    # Kontent indeksini yangilash
+    await rebuild_content_index()
+
     await msg.answer(safe_message_text(result_text))
 
 
@@ -617,6 +593,8 @@ async def cmd_recreate_tables(msg: Message):
         await db_exec("DROP TABLE IF EXISTS parallel_entries CASCADE")
         await db_exec("DROP TABLE IF EXISTS parallel_topics CASCADE")
         await db_exec("DROP TABLE IF EXISTS parallel_series CASCADE")
+        await create_parallel_tables()
+        await rebuild_content_index()
 
         await msg.answer("✅ Jadvallar muvaffaqiyatli qayta yaratildi!")
     except Exception as e:
@@ -643,44 +621,25 @@ async def cb_parallel_main(cb: CallbackQuery):
         await cb.answer("❌ Xatolik yuz berdi", show_alert=True)
 
 
-@parallel_router.callback_query(lambda c: c.data and c.data.startswith("parallel:series:"))
-async def cb_parallel_series(cb: CallbackQuery):
+@parallel_router.callback_query(OnCallback(ParallelSeries))
+async def cb_parallel_series(cb: CallbackQuery, callback_data: ParallelSeries):
     """Parallel seriya topics ro'yxati."""
     try:
-        parts = cb.data.split(":")
-        series_code = parts[2]
-        page = int(parts[3]) if len(parts) > 3 else 0
+        series_code = callback_data.code
+        page = callback_data.page
 
         user_data = await get_user_data(cb.from_user.id)
         lang = user_data["lang"]
 
-        series = await db_exec(
-            "SELECT id, name, icon FROM parallel_series WHERE code = %s AND is_active = TRUE",
-            (series_code,), fetch=True
-        )
+        series = get_content_index().parallel_series.get(series_code)
 
         if not series:
             await cb.answer("❌ Series topilmadi!", show_alert=True)
             return
 
         # Topics ro'yxatini olish
-        offset = page * BOOKS_PER_PAGE
-        topics = await db_exec("""
-                               SELECT id, topic_name, display_name, word_count, difficulty_level
-                               FROM parallel_topics
-                               WHERE series_id = %s
-                                 AND is_active = TRUE
-                               ORDER BY topic_name
-                                   LIMIT %s
-                               OFFSET %s
-                               """, (series['id'], BOOKS_PER_PAGE, offset), fetch=True, many=True)
-
-        total_count = await db_exec(
-            "SELECT COUNT(*) as count FROM parallel_topics WHERE series_id = %s AND is_active = TRUE",
-            (series['id'],), fetch=True
-        )
-
-        total = total_count.get('count', 0) if total_count else 0
+        topics = series.page(page, BOOKS_PER_PAGE)
+        total = len(series.items)
 
         if not topics and page == 0:
             await cb.answer("❌ Bu seriyada mavzular mavjud emas!", show_alert=True)
@@ -689,7 +648,7 @@ async def cb_parallel_series(cb: CallbackQuery):
         total_pages = ceil(total / BOOKS_PER_PAGE)
         kb = parallel_topics_kb(series_code, topics, page, total_pages, lang)
 
-        header_text = f"{series['icon']} {series['name']}\n📊 Jami {total} ta mavzu"
+        header_text = f"{series.icon} {series.name}\n📊 Jami {total} ta mavzu"
         if total_pages > 1:
             header_text += f"\n📄 {page + 1}/{total_pages} sahifa"
 
@@ -700,31 +659,20 @@ async def cb_parallel_series(cb: CallbackQuery):
         await cb.answer("❌ Xatolik yuz berdi", show_alert=True)
 
 
-@parallel_router.callback_query(lambda c: c.data and c.data.startswith("parallel:topic:"))
-async def cb_parallel_topic_practice(cb: CallbackQuery, state: FSMContext):
+@parallel_router.callback_query(OnCallback(ParallelTopic))
+async def cb_parallel_topic_practice(cb: CallbackQuery, state: FSMContext, callback_data: ParallelTopic):
     """Parallel topic bilan mashq boshlash."""
     try:
-        topic_id = int(cb.data.split(":")[2])
+        topic_id = callback_data.topic_id
         user_id = cb.from_user.id
 
-        topic_info = await db_exec("""
-                                   SELECT pt.topic_name,
-                                          pt.display_name,
-                                          pt.word_count,
-                                          pt.difficulty_level,
-                                          ps.name as series_name,
-                                          ps.icon
-                                   FROM parallel_topics pt
-                                            JOIN parallel_series ps ON pt.series_id = ps.id
-                                   WHERE pt.id = %s
-                                     AND pt.is_active = TRUE
-                                   """, (topic_id,), fetch=True)
+        topic_info = get_content_index().parallel_topics.get(topic_id)
 
         if not topic_info:
             await cb.answer("❌ Mavzu topilmadi!", show_alert=True)
             return
 
-        words = await get_topic_words(topic_id)
+        words = topic_info.word_dicts(with_extra=True)
 
         if len(words) < 4:
             await cb.answer("❌ Bu mavzuda yetarli so'z yo'q (kamida 4 ta kerak)!", show_alert=True)
@@ -734,9 +682,9 @@ async def cb_parallel_topic_practice(cb: CallbackQuery, state: FSMContext):
         lang = user_data["lang"]
 
         # So'zlar ro'yxatini tayyorlash (matn uzunligini cheklash)
-        difficulty_icon = get_difficulty_icon(topic_info['difficulty_level'])
-        display_name = topic_info['display_name'] or get_topic_display_name(topic_info['topic_name'])
-        topic_title = f"{topic_info['icon']} {topic_info['series_name']} - {display_name}"
+        difficulty_icon = get_difficulty_icon(topic_info.difficulty_level)
+        display_name = topic_info.display_name or get_topic_display_name(topic_info.title)
+        topic_title = f"{topic_info.icon} {topic_info.series_name} - {display_name}"
 
         words_list = []
         max_words_to_show = 15  # Ko'rsatiladigan maksimal so'zlar soni
@@ -748,7 +696,7 @@ async def cb_parallel_topic_practice(cb: CallbackQuery, state: FSMContext):
             words_list.append(f"{idx}. <b>{word['word_src']}</b> - {trg_text}")
 
         words_text = f"📖 <b>{topic_title}</b>\n"
-        words_text += f"{difficulty_icon} Daraja: {topic_info['difficulty_level']}\n"
+        words_text += f"{difficulty_icon} Daraja: {topic_info.difficulty_level}\n"
         words_text += f"📊 Jami: {len(words)} ta so'z\n\n"
         words_text += "\n".join(words_list)
 
@@ -757,11 +705,15 @@ async def cb_parallel_topic_practice(cb: CallbackQuery, state: FSMContext):
 
         words_text += "\n\n💡 So'zlarni ko'rib chiqing va tayyor bo'lganingizda mashqni boshlang!"
 
+        # Shaxsiy lug'at mashqidan qolgan javoblar (state almashtiriladi)
+        await flush_session_reviews(cb.from_user.id, state)
+
         random.shuffle(words)
         await state.update_data(
             topic_id=topic_id,
             topic_title=topic_title,
             words=words,
+            quiz=build_quiz(words),
             index=0,
             correct=0,
             wrong=0,
@@ -803,35 +755,27 @@ async def cb_begin_parallel_practice(cb: CallbackQuery, state: FSMContext):
         await cb.answer("❌ Xatolik yuz berdi", show_alert=True)
 
 
-@parallel_router.callback_query(lambda c: c.data and c.data.startswith("parallel_ans:"))
-async def cb_parallel_answer(cb: CallbackQuery, state: FSMContext):
+@parallel_router.callback_query(OnCallback(QuizAnswer, mode="parallel"))
+async def cb_parallel_answer(cb: CallbackQuery, state: FSMContext, callback_data: QuizAnswer):
     """Javobni tekshirish."""
     try:
         data = await state.get_data()
-        _, idx_str, option_idx_str = cb.data.split(":", 2)
-        word_idx = int(idx_str)
-        option_idx = int(option_idx_str)
-
-        if word_idx >= len(data["words"]):
-            await cb.answer("❌ Xato", show_alert=True)
-            return
-
-        current_options = data.get("current_options", [])
-        correct_index = data.get("correct_index", 0)
+        word_idx = callback_data.index
+        option_idx = callback_data.option
 
-        if option_idx >= len(current_options):
+        if not (0 <= word_idx < len(data["words"]) and 0 <= option_idx < len(data["words"])):
             await cb.answer("❌ Xato", show_alert=True)
             return
 
-        chosen_option = current_options[option_idx]
-        correct_answer = current_options[correct_index]
+        correct_answer = data["words"][word_idx]["word_trg"]
 
         data["answers"] = data.get("answers", 0) + 1
+        session_tracker.note(cb.from_user.id, "exercises")
 
         user_data = await get_user_data(cb.from_user.id)
         L = get_locale(user_data["lang"])
 
-        if option_idx == correct_index:
+        if option_matches(data["words"], word_idx, option_idx):
             data["correct"] = data.get("correct", 0) + 1
             data["current_cycle_correct"] = data.get("current_cycle_correct", 0) + 1
             await cb.answer(L["correct"])
@@ -0,0 +1,52 @@
+"""
+🎲 Mashq savollari to'plami
+
+Tsikl boshida butun savollar matritsasi bir marta tuziladi: har bir so'z
+uchun variantlar - so'zning o'zi va tarjimasi boshqa bo'lgan 3 tagacha
+chalg'ituvchi so'z indeksi (takrorlanmasdan tanlanadi). Bir xil tarjimali
+so'zlar oldindan guruhlanadi, shuning uchun bitta savolda bir xil variant
+ikki marta chiqmaydi va kichik lug'atlarda tanlash sikli osilib qolmaydi.
+Savol ko'rsatish va javobni tekshirish faqat indekslar bilan ishlaydi -
+lug'at hajmiga bog'liq emas.
+
+NumPy o'rniga ``random.sample(range(n), k)`` ishlatiladi: u O(k) va
+4 ta variant uchun alohida bog'liqlik shart emas.
+"""
+
+import random
+from typing import Dict, List
+
+OPTIONS_PER_QUESTION = 4
+
+
+def build_quiz(words: List[Dict], options: int = OPTIONS_PER_QUESTION, rng: random.Random = random) -> List[List[int]]:
+    """
+    Tsikl uchun savollar matritsasi.
+
+    Returns:
+        ``quiz[i]`` - ``words[i]`` savolining variantlari (``words`` dagi
+        indekslar, aralashtirilgan); to'g'ri variant - ``i`` ning o'zi
+    """
+    group_of: List[int] = []       # so'z -> tarjima guruhi
+    first_word: List[int] = []     # guruh -> birinchi so'z indeksi
+    groups: Dict[str, int] = {}
+    for i, word in enumerate(words):
+        group = groups.setdefault(word["word_trg"], len(groups))
+        if group == len(first_word):
+            first_word.append(i)
+        group_of.append(group)
+
+    distractors = min(options, len(first_word)) - 1
+    quiz = []
+    for i, group in enumerate(group_of):
+        # O'z guruhini chiqarib tashlash: [0, n-1) dan olib, >= group larni bittaga suramiz
+        picks = rng.sample(range(len(first_word) - 1), distractors)
+        row = [i] + [first_word[g + (g >= group)] for g in picks]
+        rng.shuffle(row)
+        quiz.append(row)
+    return quiz
+
+
+def option_matches(words: List[Dict], index: int, option: int) -> bool:
+    """Tanlangan variant savol so'zining tarjimasimi"""
+    return words[option]["word_trg"] == words[index]["word_trg"]
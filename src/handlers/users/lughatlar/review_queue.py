@@ -0,0 +1,170 @@
+"""
+🔁 Spaced repetition navbati (shaxsiy lug'atlar mashqi uchun)
+
+Har bir foydalanuvchi va so'z uchun keyingi takrorlash vaqti
+`vocab_review_queue` jadvalida saqlanadi. Mashq boshlanganda butun lug'at
+emas, faqat keyingi N ta so'z bitta indeksli so'rov bilan olinadi:
+avval vaqti kelganlar, keyin hali ko'rilmaganlar, ular ham yetmasa eng
+yaqin kelajakdagilar. Javoblar state'da yig'ilib, bitta batch bilan
+yoziladi; sessiya tugaganda yoki almashtirilganda qolgani ham yoziladi.
+
+Sessiya ichida so'z bir necha tsiklda qayta chiqadi, lekin navbat faqat
+birinchi javob bo'yicha baholanadi - aks holda har tsiklda interval
+ikki baravar o'sib ketardi.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from aiogram.fsm.context import FSMContext
+
+from src.handlers.users.lughatlar.vocabs import db_exec
+
+# Bitta mashq sessiyasidagi so'zlar soni
+PRACTICE_SESSION_SIZE = 20
+# Shuncha javob yig'ilganda navbat bazaga yoziladi
+REVIEW_FLUSH_SIZE = 10
+# Xato javobdan keyin so'z qayta chiqadigan vaqt
+RELEARN_DELAY = timedelta(minutes=10)
+MAX_INTERVAL_DAYS = 180
+
+
+async def get_due_words(user_id: int, book_id: int, limit: int = PRACTICE_SESSION_SIZE) -> List[Dict]:
+    """
+    Lug'atdan keyingi `limit` ta takrorlanadigan so'zni olish.
+
+    Returns:
+        [{"entry_id", "word_src", "word_trg", "interval_days", "repetitions", "lapses"}, ...]
+    """
+    now = datetime.now()
+    query = """
+            SELECT * FROM (
+                SELECT ve.id AS entry_id, ve.word_src, ve.word_trg,
+                       q.interval_days, q.repetitions, q.lapses, 0 AS bucket
+                FROM vocab_review_queue q
+                JOIN vocab_entries ve ON ve.id = q.entry_id
+                WHERE q.user_id = %s AND q.book_id = %s AND q.due_at <= %s
+                ORDER BY q.due_at
+                LIMIT %s
+            ) AS due_items
+            UNION ALL
+            SELECT * FROM (
+                SELECT ve.id AS entry_id, ve.word_src, ve.word_trg,
+                       0 AS interval_days, 0 AS repetitions, 0 AS lapses, 1 AS bucket
+                FROM vocab_entries ve
+                WHERE ve.book_id = %s
+                  AND NOT EXISTS (SELECT 1 FROM vocab_review_queue q
+                                  WHERE q.user_id = %s AND q.entry_id = ve.id)
+                ORDER BY ve.id
+                LIMIT %s
+            ) AS new_items
+            UNION ALL
+            SELECT * FROM (
+                SELECT ve.id AS entry_id, ve.word_src, ve.word_trg,
+                       q.interval_days, q.repetitions, q.lapses, 2 AS bucket
+                FROM vocab_review_queue q
+                JOIN vocab_entries ve ON ve.id = q.entry_id
+                WHERE q.user_id = %s AND q.book_id = %s AND q.due_at > %s
+                ORDER BY q.due_at
+                LIMIT %s
+            ) AS upcoming_items
+            """
+    params = (user_id, book_id, now, limit,
+              book_id, user_id, limit,
+              user_id, book_id, now, limit)
+
+    rows = await db_exec(query, params, fetch=True, many=True) or []
+    rows.sort(key=lambda r: r["bucket"])
+    words = []
+    for row in rows[:limit]:
+        row.pop("bucket", None)
+        words.append(row)
+    return words
+
+
+def grade_word(word: Dict, correct: bool, now: datetime = None) -> list:
+    """
+    So'zga javobni qo'llash va navbat uchun yangi qatorni qaytarish.
+
+    Sessiyada har bir so'z uchun bir marta chaqiriladi (birinchi javob),
+    qarang: `record_answer`.
+
+    Returns:
+        [entry_id, due_at, interval_days, repetitions, lapses, reviewed_at]
+    """
+    now = now or datetime.now()
+    if correct:
+        interval = word.get("interval_days") or 0
+        interval = min(MAX_INTERVAL_DAYS, max(1, interval * 2))
+        word["interval_days"] = interval
+        word["repetitions"] = (word.get("repetitions") or 0) + 1
+        due_at = now + timedelta(days=interval)
+    else:
+        word["interval_days"] = 0
+        word["lapses"] = (word.get("lapses") or 0) + 1
+        due_at = now + RELEARN_DELAY
+    return [word["entry_id"], due_at.isoformat(sep=" "), word["interval_days"],
+            word.get("repetitions") or 0, word.get("lapses") or 0, now.isoformat(sep=" ")]
+
+
+async def save_reviews(user_id: int, book_id: int, pending: Dict) -> None:
+    """Yig'ilgan javoblarni bitta tranzaksiyada navbatga yozish."""
+    if not pending:
+        return
+
+    values = []
+    params = []
+    for entry_id, due_at, interval, reps, lapses, reviewed_at in pending.values():
+        values.append("(%s, %s, %s, %s, %s, %s, %s, %s)")
+        params.extend((user_id, entry_id, book_id, due_at, interval, reps, lapses, reviewed_at))
+
+    # Bitta ko'p qatorli upsert - bitta statement, bitta commit
+    query = f"""
+            INSERT INTO vocab_review_queue
+                (user_id, entry_id, book_id, due_at, interval_days, repetitions, lapses, last_reviewed_at)
+            VALUES {", ".join(values)}
+            ON CONFLICT (user_id, entry_id) DO UPDATE
+                SET due_at = EXCLUDED.due_at,
+                    interval_days = EXCLUDED.interval_days,
+                    repetitions = EXCLUDED.repetitions,
+                    lapses = EXCLUDED.lapses,
+                    last_reviewed_at = EXCLUDED.last_reviewed_at
+            """
+
+    await db_exec(query, tuple(params))
+
+
+def record_answer(data: Dict, word: Dict, correct: bool) -> bool:
+    """
+    Sessiyadagi birinchi javobni navbatga qo'shish (`data` - FSM ma'lumoti).
+
+    Returns:
+        Navbatni bazaga yozish vaqti kelganmi (REVIEW_FLUSH_SIZE)
+    """
+    entry_id = str(word["entry_id"])
+    graded = data.setdefault("graded_entries", [])
+    if entry_id in graded:
+        return False
+    graded.append(entry_id)
+    pending = data.setdefault("pending_reviews", {})
+    pending[entry_id] = grade_word(word, correct)
+    return len(pending) >= REVIEW_FLUSH_SIZE
+
+
+async def flush_session_reviews(user_id: int, state: FSMContext) -> None:
+    """
+    State'da qolgan javoblarni yozish. Mashq tugaganda, yangisi boshlanganda
+    va kabinetga qaytganda chaqiriladi - foydalanuvchi sessiyani tashlab
+    ketsa ham javoblar yo'qolmaydi.
+    """
+    data = await state.get_data()
+    pending = data.get("pending_reviews")
+    if not pending or not data.get("book_id"):
+        return
+    try:
+        await save_reviews(user_id, data["book_id"], pending)
+    except Exception as e:
+        logging.error(f"Review queue flush error: {e}")
+        return
+    await state.update_data(pending_reviews={})
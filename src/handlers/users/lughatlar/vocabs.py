@@ -8,7 +8,6 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from openpyxl import Workbook
 from config import db
 
 vocabs_router = Router()
@@ -343,29 +342,6 @@ def create_paginated_kb(books: List[Dict], current_page: int, total_pages: int,
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-# =====================================================
-# 📌 Export helper (optimized)
-# =====================================================
-async def export_book_to_excel(book_id: int, user_id: int) -> Optional[str]:
-    rows = await db_exec(
-        "SELECT word_src, word_trg FROM vocab_entries WHERE book_id=%s ORDER BY id",
-        (book_id,), fetch=True, many=True
-    )
-    if len(rows) < 1:
-        return None
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Vocabulary"
-    ws.append(["Word", "Translation"])
-    for r in rows:
-        ws.append([r["word_src"], r["word_trg"]])
-
-    file_path = f"export_{user_id}_{book_id}.xlsx"
-    wb.save(file_path)
-    return file_path
-
-
 # =====================================================
 # 📌 Helper to send message
 # =====================================================
@@ -402,6 +378,9 @@ async def cmd_cabinet(msg: Message):
                                                                  "parallel:back_to_cabinet"]))
 async def cb_cabinet(cb: CallbackQuery, state: FSMContext):
     user_id = cb.from_user.id
+    # Mashqdan chiqib ketilsa ham javoblar takrorlash navbatiga yoziladi
+    from src.handlers.users.lughatlar.review_queue import flush_session_reviews
+    await flush_session_reviews(user_id, state)
     data = await get_user_data(user_id)
     lang = data["lang"]
     L = get_locale(lang)
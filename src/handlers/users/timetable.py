@@ -1,20 +1,71 @@
-import asyncio, datetime, os
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-
-
-async def save_timetable():
-    group_name = "MMF 2/56-24 MexM (o'z)"
-    base_name = "56-24"
-    save_dir = "./timetables"
-    os.makedirs(save_dir, exist_ok=True)
-    svg_path = f"{save_dir}/{base_name}.svg"
-    # --- 2. Yangi SVG yuklab olish ---
-    if os.path.exists(svg_path):
-        return svg_path
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(device_scale_factor=3)
+import asyncio, datetime, html, os, json, tempfile
+from bisect import bisect_right
+
+from config import TIMETABLE_GROUPS, TIMETABLE_REFRESH_HOURS
+from src.utils.lazy_imports import lazy_import
+from src.utils.metrics import cache_hit
+
+# Og'ir kutubxonalar faqat birinchi ishlatilganda yuklanadi
+bs4 = lazy_import("bs4")
+playwright_api = lazy_import("playwright.async_api")
+
+# Kunlar
+DAYS_UZ = ["Dushanba", "Seshanba", "Chorshanba", "Payshanba", "Juma", "Shanba"]
+
+# Kunlar va ularning y koordinatalari
+DAY_COORDINATES = {
+    "Dushanba": (420, 675),
+    "Seshanba": (675, 930),
+    "Chorshanba": (930, 1185),
+    "Payshanba": (1185, 1440),
+    "Juma": (1440, 1695),
+    "Shanba": (1695, 1950)
+}
+
+# Dars vaqtlari
+LESSON_TIMES = {
+    0: "8:00 - 8:25",
+    1: "8:30 - 9:50",
+    2: "10:00 - 11:20",
+    3: "11:30 - 12:50",
+    4: "13:20 - 14:40",
+    5: "14:50 - 16:10",
+    6: "16:20 - 17:40",
+    7: "17:50 - 19:10",
+    8: "19:20 - 20:40"
+}
+
+# Ustun koordinatalari (x)
+COLUMN_COORDINATES = [
+    (237.5975876048103, 534.5311889820537),  # 0-ustun
+    (534.5311889820537, 831.464790359297),  # 1-ustun
+    (831.464790359297, 1128.3983917365404),  # 2-ustun
+    (1128.3983917365404, 1425.3319931137837),  # 3-ustun
+    (1425.3319931137837, 1722.265594491027),  # 4-ustun
+    (1722.265594491027, 2019.1991958682704),  # 5-ustun
+    (2019.1991958682704, 2316.1327972455133),  # 6-ustun
+    (2316.1327972455133, 2613.066398622757),  # 7-ustun
+    (2613.066398622757, 2910.0000000000005)  # 8-ustun
+]
+
+# Binary search uchun chegaralar
+_DAY_STARTS = [start for start, _ in DAY_COORDINATES.values()]
+_DAY_NAMES = list(DAY_COORDINATES.keys())
+_COLUMN_STARTS = [start for start, _ in COLUMN_COORDINATES]
+
+# Indeks fayli versiyasi (format o'zgarsa eski fayllar qayta quriladi)
+INDEX_VERSION = 1
+
+# svg_path -> (index_mtime, index)
+_index_cache = {}
+# (svg_path, index_mtime, day) -> tayyor matn
+_daily_text_cache = {}
+
+
+async def fetch_timetable_svg(context, group_name, svg_path):
+    """Guruh jadvalini mavjud browser context orqali yuklab, faylni atomik almashtiradi."""
+    page = await context.new_page()
+    try:
         await page.goto("https://tdtu.edupage.org/timetable/", timeout=90000)
 
         await page.click("span[title='Классы']")
@@ -25,130 +76,309 @@ async def save_timetable():
             if (await el.inner_text()).strip() == group_name:
                 await el.click()
                 break
+        else:
+            raise ValueError(f"Guruh topilmadi: {group_name}")
 
         await page.wait_for_selector("svg")
         await page.wait_for_timeout(2000)
 
         svg_element = await page.query_selector("svg")
         svg_content = await svg_element.evaluate("(el) => el.outerHTML")
+    finally:
+        await page.close()
 
-        with open(svg_path, "w", encoding="utf-8") as f:
-            f.write(svg_content)
-
-        await browser.close()
+    await asyncio.to_thread(_save_svg, svg_path, svg_content)
     print(f"[OK] Yangi SVG saqlandi: {svg_path}")
     return svg_path
 
 
-def get_daily_timetable(svg_path):
+def _temp_file(path):
+    """`path` yonida noyob vaqtinchalik fayl - ikki yozuvchi bir-birining .tmp faylini buzmaydi."""
+    return tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+
+
+def _atomic_write(path, write):
+    fd, tmp_path = _temp_file(path)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_svg(svg_path, svg_content):
     """
-    Hozirgi kunlik dars jadvalini matn shaklida qaytaradi.
-    Bir vaqt oralig'ida ikkita dars bo'lsa, ikkalasini ham ko'rsatadi.
+    Indeks yangi SVG dan u almashtirilishidan OLDIN quriladi: /jadval hech
+    qachon SVG dan eski indeksni ko'rmaydi va uni event loop'da qayta qurmaydi.
     """
+    fd, tmp_svg = _temp_file(svg_path)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(svg_content)
+        build_timetable_index(svg_path, source_path=tmp_svg)
+        # rename mtime'ni saqlaydi - SVG indeksdan eski bo'lib qoladi
+        os.replace(tmp_svg, svg_path)
+    except BaseException:
+        if os.path.exists(tmp_svg):
+            os.remove(tmp_svg)
+        raise
+
+
+class TimetableRefresher:
+    """
+    Fon rejimida jadvallarni yangilab turuvchi servis.
+    Bitta uzoq yashovchi Chromium context ishlatiladi, guruhlar orasida
+    kechikish bilan navbatma-navbat yuklanadi.
+    """
+
+    def __init__(self, groups, save_dir="./timetables", interval_hours=6.0, stagger_seconds=15.0):
+        self.groups = dict(groups)
+        self.save_dir = save_dir
+        self.interval = interval_hours * 3600
+        self.stagger = stagger_seconds
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    def get_path(self, base_name):
+        return f"{self.save_dir}/{base_name}.svg"
+
+    def start(self):
+        """Fon vazifasini ishga tushirish."""
+        os.makedirs(self.save_dir, exist_ok=True)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def request_refresh(self):
+        """Keyingi yangilashni darhol boshlash (masalan fayl hali yo'q bo'lsa)."""
+        self._wakeup.set()
+
+    async def stop(self):
+        """Vazifani to'xtatish va brauzerni yopish."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_browser()
+
+    async def _ensure_context(self):
+        if self._context is None:
+            self._playwright = await playwright_api.async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._context = await self._browser.new_context(device_scale_factor=3)
+        return self._context
+
+    async def _close_browser(self):
+        for closer in (self._context, self._browser):
+            if closer is not None:
+                try:
+                    await closer.close()
+                except Exception:
+                    pass
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+        self._context = self._browser = self._playwright = None
+
+    async def refresh_all(self):
+        """Barcha guruhlarni bir marta yangilash."""
+        for i, (group_name, base_name) in enumerate(self.groups.items()):
+            if i:
+                await asyncio.sleep(self.stagger)
+            try:
+                context = await self._ensure_context()
+                await fetch_timetable_svg(context, group_name, self.get_path(base_name))
+            except Exception as e:
+                print(f"[ERROR] Jadvalni yangilashda xato ({group_name}): {e}")
+                # Keyingi urinishda brauzer qaytadan ochiladi
+                await self._close_browser()
+
+    async def _run(self):
+        while True:
+            await self.refresh_all()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+timetable_refresher = TimetableRefresher(TIMETABLE_GROUPS, interval_hours=TIMETABLE_REFRESH_HOURS)
+
+
+def find_timetable_group(query=None):
+    """
+    Foydalanuvchi yozgan guruh (to'liq nomi yoki fayl nomi, masalan 56-24) -> fayl nomi.
+    Guruh yozilmasa faqat bitta guruh sozlangan bo'lsagina o'sha qaytadi, aks holda None.
+    """
+    groups = timetable_refresher.groups
+    if not query or not query.strip():
+        return next(iter(groups.values())) if len(groups) == 1 else None
+    query = query.strip().lower()
+    for group_name, base_name in groups.items():
+        if query in (group_name.lower(), base_name.lower()):
+            return base_name
+    return None
+
+
+def timetable_groups_text():
+    """Guruh tanlanmaganda yuboriladigan ro'yxat."""
+    lines = ["📅 <b>Guruhni tanlang:</b>\n"]
+    for group_name, base_name in timetable_refresher.groups.items():
+        lines.append(f"/jadval {html.escape(base_name)} — {html.escape(group_name)}")
+    return "\n".join(lines)
+
+
+def get_timetable_path(base_name):
+    """
+    Guruh jadvali faylining keshdagi yo'li (tarmoqqa murojaat qilmaydi).
+    Fayl hali yo'q bo'lsa, fon yangilanishi darhol so'raladi.
+    """
+    svg_path = timetable_refresher.get_path(base_name)
     if not os.path.exists(svg_path):
-        return "❌ Jadval fayli topilmadi. Avval jadvalni yuklab oling."
+        timetable_refresher.request_refresh()
+    return svg_path
 
-    with open(svg_path, 'r', encoding='utf-8') as f:
-        svg_content = f.read()
 
-    soup = BeautifulSoup(svg_content, 'xml')
+def _locate(value, starts, bounds):
+    """Koordinata qaysi oraliqqa tushishini topish (topilmasa -1)."""
+    i = bisect_right(starts, value) - 1
+    if i >= 0 and value < bounds[i][1]:
+        return i
+    return -1
 
-    # Kunlar
-    today = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=5))).weekday()
-    days_uz = ["Dushanba", "Seshanba", "Chorshanba", "Payshanba", "Juma", "Shanba"]
 
-    if today >= len(days_uz):
-        return "🕒 Bugun dam olish kuni 😊"
+def parse_timetable_svg(svg_path):
+    """
+    SVG jadvalni bir marta parse qilib, kunlar bo'yicha darslar indeksini qaytaradi.
+    Har bir dars: time, name, teacher, classroom, y, week_type.
+    """
+    with open(svg_path, 'r', encoding='utf-8') as f:
+        soup = bs4.BeautifulSoup(f.read(), 'xml')
+
+    day_bounds = list(DAY_COORDINATES.values())
+    days = {day: [] for day in DAYS_UZ}
 
-    current_day = days_uz[today]
-
-    # Kunlar va ularning y koordinatalari
-    day_coordinates = {
-        "Dushanba": (420, 675),
-        "Seshanba": (675, 930),
-        "Chorshanba": (930, 1185),
-        "Payshanba": (1185, 1440),
-        "Juma": (1440, 1695),
-        "Shanba": (1695, 1950)
-    }
-
-    # Dars vaqtlari
-    lesson_times = {
-        0: "8:00 - 8:25",
-        1: "8:30 - 9:50",
-        2: "10:00 - 11:20",
-        3: "11:30 - 12:50",
-        4: "13:20 - 14:40",
-        5: "14:50 - 16:10",
-        6: "16:20 - 17:40",
-        7: "17:50 - 19:10",
-        8: "19:20 - 20:40"
-    }
-
-    # Ustun koordinatalari (x)
-    column_coordinates = [
-        (237.5975876048103, 534.5311889820537),  # 0-ustun
-        (534.5311889820537, 831.464790359297),  # 1-ustun
-        (831.464790359297, 1128.3983917365404),  # 2-ustun
-        (1128.3983917365404, 1425.3319931137837),  # 3-ustun
-        (1425.3319931137837, 1722.265594491027),  # 4-ustun
-        (1722.265594491027, 2019.1991958682704),  # 5-ustun
-        (2019.1991958682704, 2316.1327972455133),  # 6-ustun
-        (2316.1327972455133, 2613.066398622757),  # 7-ustun
-        (2613.066398622757, 2910.0000000000005)  # 8-ustun
-    ]
-
-    day_y_start, day_y_end = day_coordinates[current_day]
-
-    # Bugungi darslarni to'plash
-    todays_lessons = []
-
-    # Barcha dars kataklarini olish
     for rect in soup.find_all('rect'):
         if rect.get('stroke') == 'none' and rect.get('style') and 'fill: rgb(255, 255, 255)' in rect.get('style', ''):
             try:
                 x = float(rect.get('x', 0))
                 y = float(rect.get('y', 0))
                 height = float(rect.get('height', 0))
-
-                if day_y_start <= y < day_y_end:
-                    # Qaysi vaqt oralig'iga tegishli
-                    lesson_time = None
-                    for col_num, (col_start, col_end) in enumerate(column_coordinates):
-                        if col_start <= x < col_end:
-                            lesson_time = lesson_times.get(col_num)
-                            break
-
-                    if lesson_time:
-                        title_elem = rect.find_next('title')
-                        if title_elem:
-                            lesson_info = title_elem.text.strip()
-                            lines = lesson_info.split('\n')
-
-                            if len(lines) >= 3:
-                                lesson_name = lines[0].strip()
-                                teacher = lines[1].strip()
-                                classroom = lines[2].strip()
-
-                                # Katak balandligi va joylashuviga qarab hafta navbatini aniqlash
-                                week_type = detect_week_type(y, height, day_y_start)
-
-                                todays_lessons.append({
-                                    'time': lesson_time,
-                                    'name': lesson_name,
-                                    'teacher': teacher,
-                                    'classroom': classroom,
-                                    'y': y,
-                                    'height': height,
-                                    'week_type': week_type
-                                })
             except (ValueError, AttributeError):
                 continue
 
+            day_idx = _locate(y, _DAY_STARTS, day_bounds)
+            col_num = _locate(x, _COLUMN_STARTS, COLUMN_COORDINATES)
+            if day_idx < 0 or col_num < 0:
+                continue
+
+            lesson_time = LESSON_TIMES.get(col_num)
+            title_elem = rect.find_next('title')
+            if not lesson_time or not title_elem:
+                continue
+
+            lines = title_elem.text.strip().split('\n')
+            if len(lines) < 3:
+                continue
+
+            day_y_start = day_bounds[day_idx][0]
+            days[_DAY_NAMES[day_idx]].append({
+                'time': lesson_time,
+                'name': lines[0].strip(),
+                'teacher': lines[1].strip(),
+                'classroom': lines[2].strip(),
+                'y': y,
+                # Katak balandligi va joylashuviga qarab hafta navbatini aniqlash
+                'week_type': detect_week_type(y, height, day_y_start)
+            })
+
     # Darslarni tartiblash (vaqt bo'yicha, keyin joylashuv bo'yicha)
-    todays_lessons.sort(key=lambda x: (x['time'], x['y']))
+    for lessons in days.values():
+        lessons.sort(key=lambda x: (parse_time(x['time']), x['y']))
+
+    return {"version": INDEX_VERSION, "days": days}
+
+
+def get_index_path(svg_path):
+    """Indeks fayli SVG yonida saqlanadi: 56-24.svg -> 56-24.json"""
+    return os.path.splitext(svg_path)[0] + ".json"
+
+
+def build_timetable_index(svg_path, source_path=None):
+    """SVG dan (yoki hali almashtirilmagan `source_path` dan) indeks qurib, uni SVG yoniga atomik yozish."""
+    index = parse_timetable_svg(source_path or svg_path)
+    _atomic_write(get_index_path(svg_path), lambda f: json.dump(index, f, ensure_ascii=False))
+    return index
+
+
+def load_timetable_index(svg_path):
+    """
+    Indeksni xotiradan olish. Fayl o'zgargan bo'lsa qayta o'qiladi,
+    indeks yo'q yoki SVG dan eski bo'lsa qayta quriladi.
+    """
+    index_path = get_index_path(svg_path)
+    try:
+        index_mtime = os.stat(index_path).st_mtime
+    except FileNotFoundError:
+        index_mtime = None
+
+    cached = _index_cache.get(svg_path)
+    if cached and index_mtime is not None and cached[0] == index_mtime:
+        return cached
+
+    index = None
+    if index_mtime is not None and index_mtime >= os.stat(svg_path).st_mtime:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            index = None
+
+    if index is None:
+        index = build_timetable_index(svg_path)
+        index_mtime = os.stat(index_path).st_mtime
+
+    _index_cache[svg_path] = (index_mtime, index)
+    return _index_cache[svg_path]
+
+
+def get_daily_timetable(svg_path):
+    """
+    Hozirgi kunlik dars jadvalini matn shaklida qaytaradi.
+    Bir vaqt oralig'ida ikkita dars bo'lsa, ikkalasini ham ko'rsatadi.
+    Matn oldindan qurilgan indeksdan olinadi va har bir kun uchun keshlanadi.
+    """
+    if not os.path.exists(svg_path):
+        return "⏳ Jadval hali yuklanmoqda. Birozdan so'ng qayta urinib ko'ring."
+
+    today = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=5))).weekday()
+
+    if today >= len(DAYS_UZ):
+        return "🕒 Bugun dam olish kuni 😊"
+
+    current_day = DAYS_UZ[today]
 
-    return format_timetable(current_day, todays_lessons)
+    index_mtime, index = load_timetable_index(svg_path)
+    key = (svg_path, index_mtime, current_day)
+    text = _daily_text_cache.get(key)
+    cache_hit("timetable_daily", text is not None)
+    if text is None:
+        # Eski versiyalarni tozalash
+        for old_key in [k for k in _daily_text_cache if k[0] == svg_path and k[1] != index_mtime]:
+            del _daily_text_cache[old_key]
+        text = format_timetable(current_day, [dict(lesson) for lesson in index["days"].get(current_day, [])])
+        _daily_text_cache[key] = text
+    return text
 
 
 def detect_week_type(y, height, day_start):
@@ -241,4 +471,4 @@ def get_week_info(week_type, current_index, total_count):
 
 # Test code - commented out to prevent execution on import
 # if __name__ == "__main__":
-#     print(get_daily_timetable(asyncio.run(save_timetable())))
\ No newline at end of file
+#     print(get_daily_timetable(get_timetable_path(find_timetable_group())))
\ No newline at end of file
@@ -5,12 +5,21 @@ from aiogram import Router, F
 from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
-from deep_translator import GoogleTranslator
-from googletrans import Translator as GoogleTransFallback
 
 from config import sql, db, bot, ADMIN_ID, LANGUAGES
 from src.keyboards.buttons import UserPanels
 from src.keyboards.keyboard_func import CheckData
+from src.keyboards.language_keyboard import render_language_keyboard
+from src.keyboards.callback_codec import OnCallback
+from src.keyboards.callbacks import SetLang
+from src.utils.user_langs import get_user_langs as cached_user_langs, set_user_lang, swap_user_langs
+from src.utils.lazy_imports import lazy_import
+from src.utils.metrics import TRANSLATION_SECONDS, TRANSLATION_ERRORS
+from src.utils.session_tracker import session_tracker
+
+# Tarjimon kutubxonalari birinchi tarjimada yuklanadi
+deep_translator = lazy_import("deep_translator")
+googletrans = lazy_import("googletrans")
 
 # Optional imports - graceful fallback if modules not available
 try:
@@ -67,63 +76,27 @@ except ImportError:
 
 translate_router = Router()
 
-# Fallback translator instance
-fallback_translator = GoogleTransFallback()
+# Fallback translator instance (birinchi kerak bo'lganda yaratiladi)
+_fallback_translator = None
+
+
+def get_fallback_translator():
+    global _fallback_translator
+    if _fallback_translator is None:
+        _fallback_translator = googletrans.Translator()
+    return _fallback_translator
 
 # --- Database helpers ---
 def get_user_langs(user_id: int):
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id=%s", (user_id,))
-    return sql.fetchone()
+    return cached_user_langs(user_id)
 
 def update_user_lang(user_id: int, lang_code: str, direction: str):
-    field = "from_lang" if direction == "from" else "to_lang"
-    sql.execute("SELECT 1 FROM user_languages WHERE user_id=%s", (user_id,))
-    if sql.fetchone():
-        sql.execute(f"UPDATE user_languages SET {field}=%s WHERE user_id=%s", (lang_code, user_id))
-    else:
-        from_lang = lang_code if direction == "from" else None
-        to_lang = lang_code if direction == "to" else None
-        sql.execute(
-            "INSERT INTO user_languages (user_id, from_lang, to_lang) VALUES (%s, %s, %s)",
-            (user_id, from_lang, to_lang),
-        )
-    db.commit()
+    return set_user_lang(user_id, lang_code, direction)
 
 # --- UI helpers ---
 def get_language_keyboard(user_id: int):
     from_lang, to_lang = get_user_langs(user_id) or (None, None)
-    buttons = []
-    # Header row
-    buttons.append([
-        InlineKeyboardButton(
-            text=f"{'✅ ' if from_lang == 'auto' else ''}🌐 Avto",
-            callback_data="setlang:from:auto"
-        ),
-        InlineKeyboardButton(text=" ", callback_data="setlang:ignore"),
-        InlineKeyboardButton(
-            text=f"{'✅ ' if to_lang == 'auto' else ''}🌐 Avto",
-            callback_data="setlang:to:auto"
-        )
-    ])
-    # Language rows
-    for code, data in LANGUAGES.items():
-        if code == "auto": continue
-        buttons.append([
-            InlineKeyboardButton(
-                text=f"{'✅ ' if from_lang == code else ''}{data['flag']} {data['name']}",
-                callback_data=f"setlang:from:{code}"
-            ),
-            InlineKeyboardButton(text=" ", callback_data="setlang:ignore"),
-            InlineKeyboardButton(
-                text=f"{'✅ ' if to_lang == code else ''}{data['flag']} {data['name']}",
-                callback_data=f"setlang:to:{code}"
-            )
-        ])
-    # Back button
-    buttons.append([
-        InlineKeyboardButton(text="⬅️ Orqaga / Back", callback_data="setlang:back")
-    ])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return render_language_keyboard(from_lang, to_lang)
 
 def get_translation_keyboard():
     return InlineKeyboardMarkup(
@@ -139,32 +112,26 @@ def get_translation_keyboard():
 def translate_text(from_lang: str, to_lang: str, text: str):
     try:
         # Asosiy tarjimon
-        result = GoogleTranslator(source=from_lang, target=to_lang).translate(text)
+        with TRANSLATION_SECONDS.time("deep_translator"):
+            result = deep_translator.GoogleTranslator(source=from_lang, target=to_lang).translate(text)
         return result if result else f"⚠️ Tarjima xatosi: Bo'sh natija"
     except Exception:
+        TRANSLATION_ERRORS.inc("deep_translator")
         try:
             # Fallback — googletrans
-            res = fallback_translator.translate(
-                text, src=from_lang if from_lang != "auto" else "auto", dest=to_lang
-            )
+            with TRANSLATION_SECONDS.time("googletrans"):
+                res = get_fallback_translator().translate(
+                    text, src=from_lang if from_lang != "auto" else "auto", dest=to_lang
+                )
             return res.text if res and res.text else f"⚠️ Tarjima xatosi: Bo'sh natija"
         except Exception as e:
+            TRANSLATION_ERRORS.inc("googletrans")
             return f"⚠️ Tarjima xatosi: {str(e)}"
 
 
 # --- Switch tillar funksiyasi ---
 def switch_user_langs(user_id: int):
-    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id=%s", (user_id,))
-    langs = sql.fetchone()
-    if langs:
-        from_lang, to_lang = langs
-        sql.execute(
-            "UPDATE user_languages SET from_lang=%s, to_lang=%s WHERE user_id=%s",
-            (to_lang, from_lang, user_id)
-        )
-        db.commit()
-        return True
-    return False
+    return swap_user_langs(user_id)
 
 # --- Helper: uzun matnlarni bo‘lib yuborish ---
 async def split_and_send(msg: Message, text: str, reply_markup=None):
@@ -206,19 +173,19 @@ async def cmd_help(msg: Message):
     )
     await msg.answer(help_text, parse_mode="HTML")
 
-@translate_router.callback_query(F.data.startswith("setlang:"))
-async def cb_lang(callback: CallbackQuery):
-    if callback.data == "setlang:ignore":
+@translate_router.callback_query(OnCallback(SetLang))
+async def cb_lang(callback: CallbackQuery, callback_data: SetLang):
+    if callback_data.action == "ignore":
         await callback.answer("🛑 Mumkin emas / Not allowed")
-    elif callback.data == "setlang:back":
+    elif callback_data.action == "back":
         await callback.message.delete()
         await callback.answer()
     else:
         try:
-            _, direction, lang_code = callback.data.split(":")
-            update_user_lang(callback.from_user.id, lang_code, direction)
+            direction, lang_code = callback_data.action, callback_data.code
+            from_lang, to_lang = update_user_lang(callback.from_user.id, lang_code, direction) or (None, None)
             await callback.message.edit_reply_markup(
-                reply_markup=get_language_keyboard(callback.from_user.id)
+                reply_markup=render_language_keyboard(from_lang, to_lang)
             )
         except:
             pass
@@ -328,6 +295,7 @@ async def handle_text(msg: Message):
                     translated_text=result[:500]
                 )
                 log_translation(msg.from_user.id, from_lang, to_lang, len(msg.text))
+                session_tracker.note(msg.from_user.id, "translations")
                 translate_logger.info(f"Translation saved for user {msg.from_user.id}: {from_lang}->{to_lang}")
             except Exception as e:
                 log_error(e, "save_translation_history")
@@ -339,14 +307,8 @@ async def handle_text(msg: Message):
             # Award XP for translation
             if GAMIFICATION_ENABLED:
                 try:
-                    xp_result = award_translation_xp(msg.from_user.id, len(msg.text))
-                    if xp_result and xp_result.get("level_up"):
-                        await msg.answer(
-                            f"🎉 <b>Level up!</b>\n"
-                            f"Siz {xp_result.get('new_level', '?')}-levelga ko'tarildingiz!\n"
-                            f"💎 Jami XP: {xp_result.get('total_xp', 0)}",
-                            parse_mode="HTML"
-                        )
+                    # XP ledger'ga navbatga qo'yiladi, level-up xabarini ledger yuboradi
+                    award_translation_xp(msg.from_user.id, len(msg.text))
                     
                     # Update daily challenge progress
                     if DailyChallengeManager:
@@ -459,13 +421,7 @@ async def handle_media(msg: Message):
                 # Award XP for caption translation (smaller amount)
                 if GAMIFICATION_ENABLED:
                     try:
-                        xp_result = award_translation_xp(msg.from_user.id, len(msg.caption))
-                        if xp_result and xp_result.get("level_up"):
-                            await msg.answer(
-                                f"🎉 <b>Level up!</b>\n"
-                                f"Siz {xp_result.get('new_level', '?')}-levelga ko'tarildingiz!",
-                                parse_mode="HTML"
-                            )
+                        award_translation_xp(msg.from_user.id, len(msg.caption))
                         
                         # Update daily challenge progress
                         if DailyChallengeManager:
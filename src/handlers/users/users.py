@@ -1,10 +1,13 @@
-
+import asyncio
+from typing import Optional
 from aiogram import Router, F
 from aiogram.enums import ChatType
-from aiogram.filters import CommandStart, Command
+from aiogram.filters import CommandStart, Command, CommandObject
 from aiogram.types import Message, CallbackQuery
 from config import bot, ADMIN_ID
-from src.handlers.users.timetable import save_timetable, get_daily_timetable
+from src.handlers.users.timetable import (
+    find_timetable_group, get_timetable_path, get_daily_timetable, timetable_groups_text
+)
 from src.keyboards.buttons import UserPanels
 from src.keyboards.keyboard_func import CheckData
 
@@ -36,16 +39,15 @@ async def menu_translate(msg: Message):
 @user_router.message(F.text == "📅 Dars jadvali")
 async def menu_timetable(msg: Message):
     try:
-        processing_msg = await msg.answer("⏳ Jadval yuklanmoqda...")
-        timetable_path = await save_timetable()
-        timetable_text = get_daily_timetable(timetable_path)
-        await processing_msg.delete()
+        base_name = find_timetable_group()
+        if base_name is None:
+            # Bir nechta guruh: /jadval <guruh>
+            await msg.answer(timetable_groups_text(), parse_mode="HTML")
+            return
+        # Indeks kerak bo'lsa qayta quriladi (BeautifulSoup) - event loop'dan tashqarida
+        timetable_text = await asyncio.to_thread(get_daily_timetable, get_timetable_path(base_name))
         await msg.answer(timetable_text, parse_mode="HTML")
     except Exception as e:
-        try:
-            await processing_msg.delete()
-        except:
-            pass
         await msg.answer(
             "❌ Jadvalni yuklashda xatolik yuz berdi. Iltimos, keyinroq qaytadan urinib ko'ring.\n"
             "❌ Error loading schedule. Please try again later."
@@ -107,18 +109,16 @@ async def blocked_user_handler(message: Message):
     )
 
 @user_router.message(Command("jadval"))
-async def cmd_jadval(msg: Message):
+async def cmd_jadval(msg: Message, command: CommandObject):
     try:
-        processing_msg = await msg.answer("⏳ Jadval yuklanmoqda...")
-        timetable_path = await save_timetable()
-        timetable_text = get_daily_timetable(timetable_path)
-        await processing_msg.delete()
+        base_name = find_timetable_group(command.args)
+        if base_name is None:
+            await msg.answer(timetable_groups_text(), parse_mode="HTML")
+            return
+        # Indeks kerak bo'lsa qayta quriladi (BeautifulSoup) - event loop'dan tashqarida
+        timetable_text = await asyncio.to_thread(get_daily_timetable, get_timetable_path(base_name))
         await msg.answer(timetable_text, parse_mode="HTML")
     except Exception as e:
-        try:
-            await processing_msg.delete()
-        except:
-            pass
         await msg.answer(
             "❌ Jadvalni yuklashda xatolik yuz berdi. Iltimos, keyinroq qaytadan urinib ko'ring.\n"
             "❌ Error loading schedule. Please try again later."
@@ -126,13 +126,13 @@ async def cmd_jadval(msg: Message):
         print(f"[ERROR] cmd_jadval: {e}")
 
 @user_router.message(CommandStart())
-async def start_cmd1(message: Message):
+async def start_cmd1(message: Message, streak_result: Optional[dict] = None):
     try:
-        # Check and update user's streak on start
+        # Check and update user's streak on start (middleware already did it if registered)
         try:
-            from src.utils.gamification import GamificationEngine
-            streak_result = GamificationEngine.check_streak(message.from_user.id)
-            if streak_result.get('success') and streak_result.get('xp_reward', 0) > 0:
+            from src.utils.streak_service import streak_service
+            streak_result = streak_result or await streak_service.check_in(message.from_user.id)
+            if streak_result and streak_result.get('success') and streak_result.get('xp_reward', 0) > 0:
                 await message.answer(
                     f"🔥 <b>Izchillik: {streak_result['streak']} kun!</b>\n"
                     f"🎁 +{streak_result['xp_reward']} XP bonus!",
@@ -0,0 +1,212 @@
+"""
+🔘 Compact callback data codec
+
+Inline button payloads are typed dataclasses packed into Telegram's
+64-byte ``callback_data`` as ``~<tag><version>:<field>:<field>``: integers
+in base 62, booleans as 0/1, trailing None/default fields dropped. Packing
+never truncates - a payload that does not fit raises ``CallbackDataError``.
+
+Decoding is one dict lookup on the head. ``CallbackDecodeMiddleware``
+decodes every callback once and ``OnCallback(Schema)`` routes on the
+decoded type. Colon-separated buttons from older releases
+(``setlang:from:uz``) that are still in users' chats are mapped to the new
+types by legacy parsers registered on their first segment.
+"""
+
+import dataclasses
+import string
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from aiogram.filters import BaseFilter
+from aiogram.types import CallbackQuery
+
+MAX_CALLBACK_BYTES = 64
+MARK = "~"
+SEP = ":"
+
+_ALPHABET = string.digits + string.ascii_letters
+_INDEX = {char: i for i, char in enumerate(_ALPHABET)}
+
+
+class CallbackDataError(ValueError):
+    pass
+
+
+# =====================================================
+# 📌 Maydon kodlari
+# =====================================================
+
+def _int_to_b62(value: int) -> str:
+    if value < 0:
+        return "-" + _int_to_b62(-value)
+    digits = []
+    while True:
+        value, rest = divmod(value, 62)
+        digits.append(_ALPHABET[rest])
+        if not value:
+            return "".join(reversed(digits))
+
+
+def _b62_to_int(text: str) -> int:
+    if text.startswith("-"):
+        return -_b62_to_int(text[1:])
+    if not text:
+        raise ValueError("empty integer")
+    value = 0
+    for char in text:
+        value = value * 62 + _INDEX[char]
+    return value
+
+
+def _pack_str(value: str) -> str:
+    if SEP in value:
+        raise CallbackDataError(f"'{SEP}' is not allowed in callback string fields: {value!r}")
+    return value
+
+
+_ENCODERS: Dict[type, Tuple[Callable[[Any], str], Callable[[str], Any]]] = {
+    int: (_int_to_b62, _b62_to_int),
+    bool: (lambda v: "1" if v else "0", lambda s: s == "1"),
+    str: (_pack_str, str),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class _Field:
+    name: str
+    encode: Callable[[Any], str]
+    decode: Callable[[str], Any]
+    optional: bool
+    default: Any
+
+
+def _compile_fields(cls: type) -> List[_Field]:
+    hints = typing.get_type_hints(cls)
+    compiled = []
+    for f in dataclasses.fields(cls):
+        kind, optional = hints[f.name], False
+        args = typing.get_args(kind)
+        if typing.get_origin(kind) is typing.Union and type(None) in args:
+            kind, optional = next(a for a in args if a is not type(None)), True
+        if kind not in _ENCODERS:
+            raise TypeError(f"{cls.__name__}.{f.name}: unsupported callback field type {kind!r}")
+        compiled.append(_Field(f.name, *_ENCODERS[kind], optional, f.default))
+    return compiled
+
+
+# =====================================================
+# 📌 Registry
+# =====================================================
+
+_SCHEMAS: Dict[str, type] = {}  # "<tag><version>" -> dataclass
+_LEGACY: Dict[str, Callable[[str], Any]] = {}  # birinchi segment -> parser
+
+
+def callback_schema(tag: str, version: int = 1):
+    """
+    Register a dataclass as a callback payload and give it ``pack()``
+
+    Args:
+        tag: Short unique name (letters); it is sent with every button
+        version: Bump when fields change incompatibly; register the old
+            head with ``legacy_parser`` to keep old buttons working
+    """
+    if not tag.isalpha():
+        raise ValueError(f"Callback tag must be letters only: {tag!r}")
+    head = f"{tag}{version}"
+
+    def decorator(cls):
+        if not dataclasses.is_dataclass(cls):
+            raise TypeError(f"{cls.__name__} must be a dataclass")
+        if head in _SCHEMAS:
+            raise ValueError(f"Callback head {head!r} is already used by {_SCHEMAS[head].__name__}")
+        cls.__callback_head__ = head
+        cls.__callback_fields__ = _compile_fields(cls)
+        cls.pack = _pack
+        _SCHEMAS[head] = cls
+        return cls
+
+    return decorator
+
+
+def legacy_parser(first_segment: str):
+    """Register a parser for old colon-separated payloads starting with ``first_segment``"""
+    def decorator(func: Callable[[str], Any]):
+        _LEGACY[first_segment] = func
+        return func
+    return decorator
+
+
+def _pack(self) -> str:
+    values = []
+    for f in self.__callback_fields__:
+        value = getattr(self, f.name)
+        # None va default qiymat bo'sh maydon bo'ladi (oxiridagilari tashlanadi)
+        values.append("" if value is None or value == f.default else f.encode(value))
+    while values and values[-1] == "":
+        values.pop()
+    data = MARK + SEP.join([self.__callback_head__] + values)
+    if len(data.encode()) > MAX_CALLBACK_BYTES:
+        raise CallbackDataError(
+            f"{type(self).__name__} packs to {len(data.encode())} bytes (limit {MAX_CALLBACK_BYTES}): {data!r}"
+        )
+    return data
+
+
+def _unpack(cls: type, parts: List[str]) -> Any:
+    fields = cls.__callback_fields__
+    if len(parts) > len(fields):
+        raise ValueError("too many fields")
+    kwargs = {}
+    for i, f in enumerate(fields):
+        raw = parts[i] if i < len(parts) else ""
+        if raw == "" and (f.optional or f.default is not dataclasses.MISSING):
+            kwargs[f.name] = None if f.default is dataclasses.MISSING else f.default
+        else:
+            kwargs[f.name] = f.decode(raw)
+    return cls(**kwargs)
+
+
+def decode(data: Optional[str]) -> Any:
+    """Payload object for ``data``, or None for unknown / malformed data"""
+    if not data:
+        return None
+    try:
+        if data[0] == MARK:
+            head, *parts = data[1:].split(SEP)
+            cls = _SCHEMAS.get(head)
+            return _unpack(cls, parts) if cls is not None else None
+        parser = _LEGACY.get(data.split(SEP, 1)[0])
+        return parser(data) if parser is not None else None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+# =====================================================
+# 📌 Filter
+# =====================================================
+
+_NOT_DECODED = object()
+
+
+class OnCallback(BaseFilter):
+    """
+    Matches callbacks whose payload is one of ``schemas`` (and has the
+    given field values); the handler receives it as ``callback_data``
+    """
+
+    def __init__(self, *schemas: Type, **values: Any):
+        self.schemas = frozenset(schemas)
+        self.values = values
+
+    async def __call__(self, query: CallbackQuery, callback_data: Any = _NOT_DECODED) -> Any:
+        if callback_data is _NOT_DECODED:
+            # CallbackDecodeMiddleware ulanmagan
+            callback_data = decode(query.data)
+        if type(callback_data) not in self.schemas:
+            return False
+        for name, value in self.values.items():
+            if getattr(callback_data, name) != value:
+                return False
+        return {"callback_data": callback_data}
@@ -0,0 +1,112 @@
+"""
+🔘 Callback payloads
+
+Every typed inline-button payload, with parsers for the colon-separated
+buttons older releases sent (still clickable in users' chats).
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from src.keyboards.callback_codec import callback_schema, legacy_parser
+
+
+# =====================================================
+# 📌 Tarjima tillari
+# =====================================================
+
+@callback_schema("sl")
+@dataclass(frozen=True)
+class SetLang:
+    action: str  # "from", "to", "ignore", "back"
+    code: Optional[str] = None
+
+
+@legacy_parser("setlang")
+def _legacy_setlang(data: str) -> SetLang:
+    _, action, *code = data.split(":")
+    return SetLang(action, code[0] if code else None)
+
+
+# =====================================================
+# 📌 Lug'atlar
+# =====================================================
+
+@callback_schema("le")
+@dataclass(frozen=True)
+class LughatExport:
+    book_id: int
+    fmt: Optional[str] = None  # None - format tanlash menyusi
+
+
+@legacy_parser("lughat")
+def _legacy_lughat(data: str) -> Optional[LughatExport]:
+    parts = data.split(":")
+    if len(parts) >= 3 and parts[1] == "export":
+        return LughatExport(int(parts[2]), parts[3] if len(parts) > 3 else None)
+    return None  # boshqa lughat:* tugmalari hali oddiy satr
+
+
+# =====================================================
+# 📌 Parallel tarjimalar
+# =====================================================
+
+@callback_schema("ps")
+@dataclass(frozen=True)
+class ParallelSeries:
+    code: str
+    page: int = 0
+
+
+@callback_schema("pt")
+@dataclass(frozen=True)
+class ParallelTopic:
+    topic_id: int
+
+
+@legacy_parser("parallel")
+def _legacy_parallel(data: str):
+    parts = data.split(":")
+    if len(parts) >= 3 and parts[1] == "series":
+        return ParallelSeries(parts[2], int(parts[3]) if len(parts) > 3 else 0)
+    if len(parts) == 3 and parts[1] == "topic":
+        return ParallelTopic(int(parts[2]))
+    return None
+
+
+# =====================================================
+# 📌 Mashq javoblari (mashqlar, ommaviylar, essential, parallel)
+# =====================================================
+
+@callback_schema("qa")
+@dataclass(frozen=True)
+class QuizAnswer:
+    mode: str    # "mashq", "ommaviy", "essential", "parallel"
+    index: int   # savol so'zi (state'dagi words indeksi)
+    option: int  # tanlangan variant so'zi
+
+
+# =====================================================
+# 📌 Admin
+# =====================================================
+
+@callback_schema("bc")
+@dataclass(frozen=True)
+class BroadcastConfirm:
+    confirmed: bool
+    msg_type: Optional[str] = None  # "simple" yoki "forward"
+
+
+@legacy_parser("admin")
+def _legacy_admin(data: str) -> Optional[BroadcastConfirm]:
+    parts = data.split(":")
+    if parts[1:3] == ["broadcast", "confirm"] and len(parts) >= 4:
+        return BroadcastConfirm(parts[3] == "yes", parts[4] if len(parts) > 4 else None)
+    return None
+
+
+@callback_schema("us")
+@dataclass(frozen=True)
+class UserSearchPage:
+    panel: str  # "complete" yoki "enhanced"
+    page: int   # qidiruv holati (FSM) shu sahifani kutayotgan bo'lsa ishlaydi
@@ -0,0 +1,59 @@
+"""
+🌐 Prebuilt language selection keyboard
+
+The 25-row from/to language keyboard is static except for two ✅ marks.
+All buttons (plain and checked variants) are built once at import; a
+render only swaps the two checked buttons into the shared row template.
+"""
+
+from functools import lru_cache
+from typing import List, Optional
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import LANGUAGES
+from src.keyboards.callbacks import SetLang
+
+_SPACER = InlineKeyboardButton(text=" ", callback_data=SetLang("ignore").pack())
+_BACK_ROW = [InlineKeyboardButton(text="⬅️ Orqaga / Back", callback_data=SetLang("back").pack())]
+
+
+def _label(code: str) -> str:
+    if code == "auto":
+        return "🌐 Avto"
+    data = LANGUAGES[code]
+    return f"{data['flag']} {data['name']}"
+
+
+def _button(code: str, direction: str, checked: bool) -> InlineKeyboardButton:
+    return InlineKeyboardButton(
+        text=f"{'✅ ' if checked else ''}{_label(code)}",
+        callback_data=SetLang(direction, code).pack()
+    )
+
+
+# "auto" birinchi qatorda, qolganlari LANGUAGES tartibida
+_CODES: List[str] = ["auto"] + [code for code in LANGUAGES if code != "auto"]
+_ROW_OF = {code: i for i, code in enumerate(_CODES)}
+
+# [row] -> (from_plain, from_checked, to_plain, to_checked)
+_CELLS = [
+    (_button(c, "from", False), _button(c, "from", True), _button(c, "to", False), _button(c, "to", True))
+    for c in _CODES
+]
+_PLAIN_ROWS = [[cell[0], _SPACER, cell[2]] for cell in _CELLS]
+
+
+@lru_cache(maxsize=1024)
+def render_language_keyboard(from_lang: Optional[str], to_lang: Optional[str]) -> InlineKeyboardMarkup:
+    """Keyboard with ✅ on the selected from/to languages"""
+    rows = list(_PLAIN_ROWS)
+    from_row = _ROW_OF.get(from_lang)
+    to_row = _ROW_OF.get(to_lang)
+
+    for i in {from_row, to_row} - {None}:
+        cell = _CELLS[i]
+        rows[i] = [cell[1] if i == from_row else cell[0], _SPACER, cell[3] if i == to_row else cell[2]]
+
+    rows.append(_BACK_ROW)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
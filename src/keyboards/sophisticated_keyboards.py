@@ -10,6 +10,7 @@ from aiogram.types import (
 )
 from aiogram.utils.keyboard import ReplyKeyboardBuilder, InlineKeyboardBuilder
 from typing import List, Optional, Dict, Any
+from functools import lru_cache
 from config import LANGUAGES
 
 
@@ -131,8 +132,9 @@ class VisualLanguageSelector:
         return builder.as_markup()
     
     @classmethod
+    @lru_cache(maxsize=128)
     def language_grid(cls, category: str = 'all', page: int = 0) -> InlineKeyboardMarkup:
-        """Create paginated language grid"""
+        """Create paginated language grid (static, built once per category/page)"""
         builder = InlineKeyboardBuilder()
         
         if category == 'all':
@@ -182,6 +184,12 @@ class VisualLanguageSelector:
     @classmethod
     def dual_language_selector(cls, user_id: int, current_from: str = 'auto', current_to: str = 'uz') -> InlineKeyboardMarkup:
         """Beautiful dual language selector (source → target)"""
+        return cls._dual_language_markup(current_from, current_to)
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _dual_language_markup(cls, current_from: str, current_to: str) -> InlineKeyboardMarkup:
+        """Selector markup depends only on the selected pair, so it is built once per pair"""
         builder = InlineKeyboardBuilder()
         
         # Header with current selection
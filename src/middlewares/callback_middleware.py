@@ -0,0 +1,25 @@
+"""
+🔘 Callback decode middleware
+Decodes callback_data once per update; OnCallback filters then only
+compare types instead of re-parsing the string
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+from src.keyboards import callbacks  # schemalar shu importda ro'yxatdan o'tadi
+from src.keyboards.callback_codec import decode
+
+
+class CallbackDecodeMiddleware(BaseMiddleware):
+    """Outer middleware on dp.callback_query"""
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        data["callback_data"] = decode(event.data)
+        return await handler(event, data)
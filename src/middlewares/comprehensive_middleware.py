@@ -9,15 +9,18 @@ import pytz
 from typing import Any, Awaitable, Callable, Dict
 
 from config import db, sql, ADMIN_ID
+from src.utils.session_tracker import session_tracker
 
 # Gamification imports
 try:
     from src.utils.gamification import GamificationEngine, DailyChallengeManager
+    from src.utils.streak_service import streak_service
     GAMIFICATION_ENABLED = True
 except ImportError:
     GAMIFICATION_ENABLED = False
     GamificationEngine = None
     DailyChallengeManager = None
+    streak_service = None
 
 
 class ComprehensiveUserMiddleware(BaseMiddleware):
@@ -50,170 +53,50 @@ class ComprehensiveUserMiddleware(BaseMiddleware):
         # Process user registration/activity
         await self._process_user_activity(user, event, event_type)
         
+        # Daily streak: DB faqat kunning birinchi update'ida, natija handler'ga beriladi
+        if GAMIFICATION_ENABLED and streak_service:
+            try:
+                data["streak_result"] = await streak_service.check_in(user.id)
+            except Exception as e:
+                print(f"[MIDDLEWARE] Streak check error: {e}")
+        
         # Continue to handler
         return await handler(event, data)
     
     async def _process_user_activity(self, user, event, event_type):
-        """Process user registration and activity tracking"""
+        """
+        Process activity tracking; the ``users`` row itself is written by
+        RegisterUserMiddleware, which runs before this middleware
+        """
         user_id = user.id
         now = datetime.now(pytz.timezone("Asia/Tashkent"))
-        today = now.date()
         
         try:
-            # Check if user exists
-            sql.execute("SELECT id, last_activity_at FROM users WHERE user_id = %s", (user_id,))
-            existing_user = sql.fetchone()
-            
-            if not existing_user:
-                # NEW USER - Create comprehensive profile
-                await self._create_new_user(user, now)
-            else:
-                # EXISTING USER - Update activity
-                await self._update_user_activity(user_id, user, now, existing_user[1])
-            
             # Update or create daily activity record
             await self._update_daily_activity(user_id, event, event_type, now)
             
             # Manage user session
             await self._manage_session(user_id, event_type, now)
             
-            # Update daily streak via gamification system
-            if GAMIFICATION_ENABLED and GamificationEngine:
-                try:
-                    GamificationEngine.check_streak(user_id)
-                except Exception as e:
-                    print(f"[MIDDLEWARE] Streak check error: {e}")
-            
             db.commit()
             
         except Exception as e:
             db.rollback()
             print(f"[MIDDLEWARE ERROR] User tracking failed: {e}")
     
-    async def _create_new_user(self, user, now):
-        """Create comprehensive new user record"""
-        user_id = user.id
-        
-        # Get referral info if available (from deep linking)
-        # referrer_id = get_referrer_from_start_param(user_id)
-        referrer_id = None
-        
-        sql.execute("""
-            INSERT INTO users (
-                user_id, first_name, last_name, username, language_code,
-                interface_lang, default_from_lang, default_to_lang,
-                is_active, created_at, updated_at, last_activity_at, 
-                first_seen_at, referrer_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (user_id) DO NOTHING
-        """, (
-            user_id,
-            user.first_name,
-            user.last_name,
-            user.username,
-            user.language_code,
-            user.language_code or 'uz',  # interface_lang
-            'en',  # default_from_lang
-            user.language_code or 'uz',  # default_to_lang
-            True,  # is_active
-            now, now, now, now,
-            referrer_id
-        ))
-        
-        # Create default preferences
-        sql.execute("""
-            INSERT INTO user_preferences (user_id)
-            VALUES (%s)
-            ON CONFLICT (user_id) DO NOTHING
-        """, (user_id,))
-        
-        # Initialize daily activity record
-        sql.execute("""
-            INSERT INTO user_activity_daily (user_id, activity_date)
-            VALUES (%s, %s)
-            ON CONFLICT (user_id, activity_date) DO NOTHING
-        """, (user_id, now.date()))
-        
-        # Initialize exercise type stats
-        exercise_types = ['flashcard', 'quiz', 'match', 'write']
-        for ex_type in exercise_types:
-            sql.execute("""
-                INSERT INTO exercise_type_stats (user_id, exercise_type)
-                VALUES (%s, %s)
-                ON CONFLICT (user_id, exercise_type) DO NOTHING
-            """, (user_id, ex_type))
-        
-        # Initialize user achievements
-        sql.execute("""
-            INSERT INTO user_achievements (user_id, achievement_id)
-            SELECT %s, id FROM achievements WHERE is_active = TRUE
-            ON CONFLICT DO NOTHING
-        """, (user_id,))
-        
-        print(f"[NEW USER] Created comprehensive profile for user {user_id}")
-    
-    async def _update_user_activity(self, user_id, user, now, last_activity):
-        """Update existing user activity"""
-        # Update basic info and activity timestamp
-        sql.execute("""
-            UPDATE users SET
-                first_name = COALESCE(%s, first_name),
-                last_name = COALESCE(%s, last_name),
-                username = COALESCE(%s, username),
-                language_code = COALESCE(%s, language_code),
-                last_activity_at = %s,
-                updated_at = %s,
-                is_active = TRUE
-            WHERE user_id = %s
-        """, (
-            user.first_name, user.last_name, user.username, user.language_code,
-            now, now, user_id
-        ))
-    
     async def _update_daily_activity(self, user_id, event, event_type, now):
-        """Update daily activity statistics"""
-        today = now.date()
-        
-        # Check if daily record exists
+        """Update daily activity statistics (one upsert per update)"""
+        message_count = 1 if event_type == 'message' else 0
         sql.execute("""
-            SELECT id FROM user_activity_daily 
-            WHERE user_id = %s AND activity_date = %s
-        """, (user_id, today))
-        
-        if not sql.fetchone():
-            # Create new daily record
-            sql.execute("""
-                INSERT INTO user_activity_daily (user_id, activity_date)
-                VALUES (%s, %s)
-            """, (user_id, today))
-        
-        # Update message count
-        if event_type == 'message':
-            sql.execute("""
-                UPDATE user_activity_daily 
-                SET session_count = session_count + 1
-                WHERE user_id = %s AND activity_date = %s
-            """, (user_id, today))
+            INSERT INTO user_activity_daily (user_id, activity_date, session_count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (user_id, activity_date) DO UPDATE
+                SET session_count = user_activity_daily.session_count + EXCLUDED.session_count
+        """, (user_id, now.date(), message_count))
     
     async def _manage_session(self, user_id, event_type, now):
-        """Manage user session tracking"""
-        # Check for active session (within last 30 minutes)
-        thirty_mins_ago = now - timedelta(minutes=30)
-        
-        sql.execute("""
-            SELECT id, started_at FROM user_sessions 
-            WHERE user_id = %s AND started_at > %s AND ended_at IS NULL
-            ORDER BY started_at DESC LIMIT 1
-        """, (user_id, thirty_mins_ago))
-        
-        session = sql.fetchone()
-        
-        if not session:
-            # Create new session
-            sql.execute("""
-                INSERT INTO user_sessions (user_id, started_at)
-                VALUES (%s, %s)
-            """, (user_id, now))
+        """Manage user session tracking (in memory, written in batches)"""
+        session_tracker.touch(user_id, event_type, now)
 
 
 class TranslationTrackingMiddleware(BaseMiddleware):
@@ -0,0 +1,37 @@
+"""
+🧭 Fast path middleware
+Sends plain texts that no earlier handler can take straight to the
+translate catch-all instead of testing every router ahead of it
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.handlers.routing import RouteTable
+from src.utils.metrics import ROUTING_DECISIONS
+
+
+class FastPathMiddleware(BaseMiddleware):
+    """Outer middleware on dp.message; build the table after all routers are included"""
+
+    def __init__(self, table: RouteTable):
+        self.table = table
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not await self.table.passthrough(event, data):
+            ROUTING_DECISIONS.inc("chain")
+            return await handler(event, data)
+
+        ROUTING_DECISIONS.inc("fast")
+        response = await self.table.target.propagate_event("message", event, **data)
+        if response is UNHANDLED:
+            # Catch-all o'tkazib yubordi (SkipHandler) - keyingi routerlar ham ko'rsin
+            return await handler(event, data)
+        return response
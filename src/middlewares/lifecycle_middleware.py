@@ -0,0 +1,29 @@
+"""
+🛑 Lifecycle middleware
+Counts in-flight updates so shutdown can wait for them to finish
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.utils.lifecycle import Lifecycle, lifecycle as default_lifecycle
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Outer middleware on dp.update (register it first, so it wraps everything)"""
+
+    def __init__(self, lifecycle: Lifecycle = default_lifecycle):
+        self.lifecycle = lifecycle
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        self.lifecycle.update_started()
+        try:
+            return await handler(event, data)
+        finally:
+            self.lifecycle.update_finished()
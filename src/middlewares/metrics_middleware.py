@@ -0,0 +1,66 @@
+"""
+📈 Metrics middleware
+Records update and per-handler latency plus handler errors
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.event.bases import SkipHandler, CancelHandler
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.utils.metrics import UPDATE_SECONDS, HANDLER_SECONDS, HANDLER_ERRORS
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer middleware on dp.update: total time per update type"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_SECONDS.observe(time.perf_counter() - started, getattr(event, "event_type", "unknown"))
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware (dp.message, dp.callback_query, ...): runs after the
+    filters matched, so data["handler"] is the handler that will be called
+    """
+
+    def __init__(self, event_name: str):
+        self.event_name = event_name
+        self._labels: Dict[Any, tuple] = {}
+
+    def _handler_labels(self, handler_obj) -> tuple:
+        callback = getattr(handler_obj, "callback", None)
+        labels = self._labels.get(callback)
+        if labels is None:
+            module = getattr(callback, "__module__", None) or "unknown"
+            name = getattr(callback, "__qualname__", "unknown")
+            labels = self._labels[callback] = (self.event_name, module.rsplit(".", 1)[-1], name)
+        return labels
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        labels = self._handler_labels(data.get("handler"))
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception as e:
+            HANDLER_ERRORS.inc(*labels, type(e).__name__)
+            raise
+        HANDLER_SECONDS.observe(time.perf_counter() - started, *labels)
+        return result
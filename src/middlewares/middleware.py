@@ -1,83 +1,163 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+
 from aiogram.types import Update
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
-import psycopg2
-from datetime import datetime
-import pytz
-from config import DB_CONFIG
+
+from config import db, DB_TYPE
+
+# Foydalanuvchi ma'lumotlari o'zgarmagan bo'lsa, shuncha vaqt DB ga yozilmaydi
+REGISTER_REFRESH_SECONDS = 6 * 60 * 60
+KNOWN_USERS_CACHE_SIZE = 100_000
+
+EXERCISE_TYPES = ("flashcard", "quiz", "match", "write")
+
+_USERS_UPSERT = """
+    INSERT INTO users (
+        user_id, first_name, last_name, username, language_code,
+        interface_lang, default_from_lang, default_to_lang,
+        is_active, created_at, updated_at, last_activity_at, first_seen_at
+    ) VALUES (%(user_id)s, %(first_name)s, %(last_name)s, %(username)s, %(language_code)s,
+              %(lang_code)s, 'en', %(lang_code)s, TRUE, NOW(), NOW(), NOW(), NOW())
+    ON CONFLICT (user_id) DO UPDATE
+        SET first_name = COALESCE(EXCLUDED.first_name, users.first_name),
+            last_name = COALESCE(EXCLUDED.last_name, users.last_name),
+            username = COALESCE(EXCLUDED.username, users.username),
+            language_code = COALESCE(EXCLUDED.language_code, users.language_code),
+            last_activity_at = NOW(),
+            updated_at = NOW(),
+            is_active = TRUE
+"""
+_ACCOUNTS_UPSERT = """
+    INSERT INTO accounts (user_id, lang_code, created_at, first_name, username)
+    VALUES (%(user_id)s, %(lang_code)s, NOW(), %(first_name)s, %(username)s)
+    ON CONFLICT (user_id) DO UPDATE
+        SET first_name = COALESCE(EXCLUDED.first_name, accounts.first_name),
+            username = COALESCE(EXCLUDED.username, accounts.username),
+            updated_at = NOW()
+"""
+_ENHANCED_UPSERT = """
+    INSERT INTO users_enhanced (user_id, username, first_name, language_code, created_at, last_active_at)
+    VALUES (%(user_id)s, %(username)s, %(first_name)s, %(lang_code)s, NOW(), NOW())
+    ON CONFLICT (user_id) DO UPDATE
+        SET last_active_at = NOW(),
+            username = COALESCE(EXCLUDED.username, users_enhanced.username),
+            first_name = COALESCE(EXCLUDED.first_name, users_enhanced.first_name)
+"""
+_BOARD_INSERT = """
+    INSERT INTO leaderboard (user_id, total_xp, current_rank, highest_rank)
+    VALUES (%(user_id)s, 0, NULL, NULL)
+    ON CONFLICT (user_id) DO NOTHING
+"""
+# Yangi foydalanuvchi profili (ComprehensiveUserMiddleware'dan ko'chirilgan) - idempotent
+_PREFERENCES_INSERT = """
+    INSERT INTO user_preferences (user_id) VALUES (%(user_id)s)
+    ON CONFLICT (user_id) DO NOTHING
+"""
+_EXERCISE_STATS_INSERT = f"""
+    INSERT INTO exercise_type_stats (user_id, exercise_type)
+    VALUES {", ".join(f"(%(user_id)s, '{t}')" for t in EXERCISE_TYPES)}
+    ON CONFLICT (user_id, exercise_type) DO NOTHING
+"""
+_ACHIEVEMENTS_INSERT = """
+    INSERT INTO user_achievements (user_id, achievement_id)
+    SELECT %(user_id)s, id FROM achievements WHERE is_active = TRUE
+    ON CONFLICT DO NOTHING
+"""
+
+# Postgres: bitta statement (bitta tranzaksiya) - users birinchi, qolganlari unga FK
+_REGISTER_SQL_POSTGRES = f"""
+    WITH u AS ({_USERS_UPSERT} RETURNING user_id),
+         acc AS ({_ACCOUNTS_UPSERT}),
+         enhanced AS ({_ENHANCED_UPSERT}),
+         board AS ({_BOARD_INSERT}),
+         prefs AS ({_PREFERENCES_INSERT}),
+         exercise_stats AS ({_EXERCISE_STATS_INSERT}),
+         achievements AS ({_ACHIEVEMENTS_INSERT})
+    SELECT user_id FROM u
+"""
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+
+def _positional(statement: str):
+    """SQLite backend faqat ``%s`` ni tushunadi: (statement, parametr nomlari)"""
+    return _NAMED_PARAM.sub("%s", statement), _NAMED_PARAM.findall(statement)
+
+
+# SQLite: alohida statement'lar, bitta db.transaction() ichida
+_REGISTER_SQL_SQLITE = tuple(_positional(statement) for statement in (
+    _USERS_UPSERT, _ACCOUNTS_UPSERT, _ENHANCED_UPSERT, _BOARD_INSERT,
+    _PREFERENCES_INSERT, _EXERCISE_STATS_INSERT, _ACHIEVEMENTS_INSERT,
+))
+
+
+def register_user(user_id: int, lang_code: str, first_name: str, username: str,
+                  last_name: str = None, language_code: str = None) -> None:
+    """
+    Upsert the user's rows (users, accounts, users_enhanced, leaderboard and
+    the new-user profile rows) in one transaction
+    """
+    params = {
+        "user_id": user_id, "lang_code": lang_code, "language_code": language_code,
+        "first_name": first_name, "last_name": last_name, "username": username,
+    }
+    cur = db.cursor()
+    if DB_TYPE == "postgres":
+        cur.execute(_REGISTER_SQL_POSTGRES, params)
+        return
+
+    with db.transaction():
+        for statement, names in _REGISTER_SQL_SQLITE:
+            cur.execute(statement, tuple(params[name] for name in names))
+
 
 class RegisterUserMiddleware(BaseMiddleware):
+    """
+    The one user upsert per update (messages and callbacks); must run before
+    ComprehensiveUserMiddleware, whose rows reference ``users``. A user whose
+    profile (name, username, language) is unchanged and was written recently
+    is skipped without touching the database, so ``users.last_activity_at``
+    is refreshed at most every REGISTER_REFRESH_SECONDS.
+    """
+
+    def __init__(self, refresh_seconds: float = REGISTER_REFRESH_SECONDS, cache_size: int = KNOWN_USERS_CACHE_SIZE):
+        self.refresh_seconds = refresh_seconds
+        self.cache_size = cache_size
+        # user_id -> ((first_name, username, lang_code), last_write_monotonic)
+        self._known: "OrderedDict[int, tuple]" = OrderedDict()
+
     async def __call__(self, handler, event: Update, data: dict):
-        if not event.message:
+        if event.message:
+            user = event.message.from_user
+        elif event.callback_query:
+            user = event.callback_query.from_user
+        else:
+            user = None
+        if not user:
             return await handler(event, data)  # Middleware davom etsin
 
-        user = event.message.from_user
         user_id = user.id
-        date = datetime.now(pytz.timezone("Asia/Tashkent")).date()
         lang_code = user.language_code if user.language_code else "uz"
-        username = user.username
-        first_name = user.first_name
-
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-
-        # **1️ SQL Injection xavfsizligi uchun f-string emas, parametr ishlatilmoqda**
-        cur.execute("SELECT user_id FROM public.accounts WHERE user_id = %s", (user_id,))
-        if not cur.fetchone():  # Foydalanuvchi bazada bo'lmasa
-            cur.execute("DELETE FROM public.accounts WHERE user_id = %s", (user_id,))
-            conn.commit()
-
-            cur.execute(
-                "INSERT INTO accounts (user_id, lang_code, created_at, first_name, username) VALUES (%s, %s, NOW(), %s, %s)",
-                (user_id, lang_code, first_name, username)
-            )
-            conn.commit()
-            
-            # Also register in enhanced table for gamification
-            try:
-                cur.execute("""
-                    INSERT INTO users_enhanced 
-                    (user_id, username, first_name, language_code, created_at, last_active_at)
-                    VALUES (%s, %s, %s, %s, NOW(), NOW())
-                    ON CONFLICT (user_id) DO NOTHING
-                """, (user_id, username, first_name, lang_code))
-                conn.commit()
-                
-                # Also create leaderboard entry
-                cur.execute("""
-                    INSERT INTO leaderboard (user_id, total_xp, current_rank, highest_rank)
-                    VALUES (%s, 0, NULL, NULL)
-                    ON CONFLICT (user_id) DO NOTHING
-                """, (user_id,))
-                conn.commit()
-            except Exception as e:
-                # If enhanced tables don't exist yet, just continue
-                print(f"[WARN] Could not register in enhanced tables: {e}")
-                conn.rollback()
+        profile = (user.first_name, user.last_name, user.username, lang_code)
+        now = time.monotonic()
+
+        known = self._known.get(user_id)
+        if known and known[0] == profile and now - known[1] < self.refresh_seconds:
+            self._known.move_to_end(user_id)
+            return await handler(event, data)
+
+        try:
+            await asyncio.to_thread(register_user, user_id, lang_code, user.first_name, user.username,
+                                    user.last_name, user.language_code)
+        except Exception as e:
+            print(f"[WARN] User registration failed for {user_id}: {e}")
         else:
-            # User exists, update info in both tables
-            try:
-                # Update accounts table
-                cur.execute("""
-                    UPDATE accounts 
-                    SET first_name = COALESCE(%s, first_name),
-                        username = COALESCE(%s, username),
-                        updated_at = NOW()
-                    WHERE user_id = %s
-                """, (first_name, username, user_id))
-                
-                # Update enhanced table
-                cur.execute("""
-                    UPDATE users_enhanced 
-                    SET last_active_at = NOW(),
-                        username = COALESCE(%s, username),
-                        first_name = COALESCE(%s, first_name)
-                    WHERE user_id = %s
-                """, (username, first_name, user_id))
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-
-        cur.close()
-        conn.close()
+            self._known[user_id] = (profile, now)
+            self._known.move_to_end(user_id)
+            if len(self._known) > self.cache_size:
+                self._known.popitem(last=False)
 
         return await handler(event, data)  # **2 Xatolik tuzatildi, middleware davom etadi**
@@ -0,0 +1,91 @@
+"""
+🚦 Per-user ordering middleware
+
+Updates from different users run concurrently (bounded by
+MAX_CONCURRENT_UPDATES); updates from the same user run one at a time, in
+arrival order, so FSM state and counters are never raced by double taps.
+A user with more than PER_USER_QUEUE_LIMIT waiting updates has the extra
+ones dropped.
+
+The lock is held for the whole handler, so long work (broadcasts) must not
+be awaited inline: start it with ``lifecycle.track(...)`` and return.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.utils.metrics import UPDATE_QUEUE_SECONDS, UPDATES_DROPPED
+
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "64"))
+PER_USER_QUEUE_LIMIT = int(os.getenv("PER_USER_QUEUE_LIMIT", "10"))
+
+
+class _UserSlot:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # kutayotganlar FIFO tartibda uyg'onadi
+        self.pending = 0
+
+
+class UserOrderingMiddleware(BaseMiddleware):
+    """
+    Outer middleware on dp.update. Register it right after the lifecycle
+    middleware: nothing may await before the per-user lock, or arrival order
+    is lost.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_UPDATES, per_user_limit: int = PER_USER_QUEUE_LIMIT):
+        self.per_user_limit = per_user_limit
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._users: Dict[int, _UserSlot] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        started = time.perf_counter()
+
+        if user is None:
+            async with self._global:
+                UPDATE_QUEUE_SECONDS.observe(time.perf_counter() - started)
+                return await handler(event, data)
+
+        slot = self._users.get(user.id)
+        if slot is None:
+            slot = self._users[user.id] = _UserSlot()
+        elif slot.pending >= self.per_user_limit:
+            UPDATES_DROPPED.inc("user_queue_full")
+            await self._reject(event)
+            return None
+
+        slot.pending += 1
+        try:
+            async with slot.lock:
+                async with self._global:
+                    UPDATE_QUEUE_SECONDS.observe(time.perf_counter() - started)
+                    return await handler(event, data)
+        finally:
+            slot.pending -= 1
+            if not slot.pending:
+                self._users.pop(user.id, None)
+
+    @staticmethod
+    async def _reject(event: TelegramObject) -> None:
+        """Stop the button spinner for a dropped callback; messages are dropped silently"""
+        if isinstance(event, Update) and event.callback_query:
+            try:
+                await event.callback_query.answer("⏳ Iltimos, biroz kuting...")
+            except Exception:
+                pass
+
+    @property
+    def active_users(self) -> int:
+        return len(self._users)
@@ -0,0 +1,216 @@
+"""
+🎯 Daily challenge service
+
+Today's challenge (Asia/Tashkent day) and every user's progress on it are
+kept in memory. ``record()`` only bumps a counter and detects completion;
+the XP reward goes to the XP ledger. A background task writes changed
+counters to ``user_daily_challenges`` in batched upserts; ``rollover()``
+runs at local midnight from the job scheduler.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set
+
+from config import db
+from src.utils.gamification import DailyChallengeManager, GamificationEngine, TIMEZONE
+
+CHALLENGE_FLUSH_SECONDS = 30
+WRITE_BATCH_SIZE = 500
+
+_UPSERT_PROGRESS = """
+    INSERT INTO user_daily_challenges (user_id, challenge_id, current_value, is_completed, completed_at)
+    VALUES {values}
+    ON CONFLICT (user_id, challenge_id) DO UPDATE
+        SET current_value = GREATEST(user_daily_challenges.current_value, EXCLUDED.current_value),
+            is_completed = user_daily_challenges.is_completed OR EXCLUDED.is_completed,
+            completed_at = COALESCE(user_daily_challenges.completed_at, EXCLUDED.completed_at)
+"""
+
+
+@dataclass
+class Challenge:
+    id: int
+    day: date
+    title: str
+    description: str
+    type: str
+    target: int
+    reward: int
+
+
+def _chunks(items: list, size: int = WRITE_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ChallengeService:
+    def __init__(self, flush_seconds: float = CHALLENGE_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._day: Optional[date] = None
+        self._challenge: Optional[Challenge] = None
+        # Bugungi vazifa bo'yicha: user_id -> joriy qiymat
+        self._progress: Dict[int, int] = {}
+        self._completed: Set[int] = set()
+        self._completed_at: Dict[int, datetime] = {}
+        self._dirty: Set[int] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(TIMEZONE).date()
+
+    # =====================================================
+    # 📌 Hot path (DB yo'q)
+    # =====================================================
+
+    def record(self, user_id: int, challenge_type: str, amount: int = 1) -> Dict[str, Any]:
+        """Add progress to today's challenge if it has this type"""
+        challenge = self._challenge
+        if challenge is None or challenge.type != challenge_type or self._day != self._today():
+            # Vazifa yo'q yoki yangi kun hali yuklanmagan
+            return {"success": False}
+
+        if user_id in self._completed:
+            return {"success": True, "current": challenge.target, "target": challenge.target, "completed": True}
+
+        current = min(self._progress.get(user_id, 0) + amount, challenge.target)
+        self._progress[user_id] = current
+        self._dirty.add(user_id)
+
+        completed = current >= challenge.target
+        if completed:
+            self._completed.add(user_id)
+            self._completed_at[user_id] = datetime.now(TIMEZONE)
+            GamificationEngine.add_xp(user_id, challenge.reward, "Daily challenge completed")
+
+        return {"success": True, "current": current, "target": challenge.target, "completed": completed}
+
+    def get(self, user_id: int) -> Dict[str, Any]:
+        """Today's challenge with the user's progress"""
+        challenge = self._challenge
+        if challenge is None or self._day != self._today():
+            return {"success": False, "error": "No challenge for today"}
+
+        current = self._progress.get(user_id, 0)
+        return {
+            "success": True,
+            "id": challenge.id,
+            "title": challenge.title,
+            "description": challenge.description,
+            "type": challenge.type,
+            "target": challenge.target,
+            "reward": challenge.reward,
+            "current": current,
+            "completed": user_id in self._completed,
+            "progress": min(100, int(current / challenge.target * 100)) if challenge.target else 100,
+        }
+
+    # =====================================================
+    # 📌 Batch yozish
+    # =====================================================
+
+    async def flush(self) -> None:
+        """Write changed progress counters"""
+        async with self._flush_lock:
+            challenge = self._challenge
+            if challenge is None or not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            rows = [
+                (user_id, challenge.id, self._progress[user_id],
+                 user_id in self._completed, self._completed_at.get(user_id))
+                for user_id in dirty
+            ]
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                print(f"[CHALLENGE ERROR] Flush failed ({len(rows)} users): {e}")
+                # Qiymatlar xotirada - keyingi flush'da qayta yoziladi
+                if self._challenge is challenge:
+                    self._dirty |= dirty
+
+    @staticmethod
+    def _write(rows: List[tuple]) -> None:
+        cur = db.cursor()
+        for batch in _chunks(rows):
+            values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+            cur.execute(_UPSERT_PROGRESS.format(values=values), [v for row in batch for v in row])
+        db.commit()
+
+    # =====================================================
+    # 📌 Kun almashishi
+    # =====================================================
+
+    async def rollover(self) -> Optional[Challenge]:
+        """Write the old day's counters, then load (or create) today's challenge"""
+        await self.flush()
+        today = self._today()
+        challenge, progress, completed = await asyncio.to_thread(self._load, today)
+
+        async with self._flush_lock:
+            self._day = today
+            self._challenge = challenge
+            self._progress = progress
+            self._completed = completed
+            self._completed_at = {}
+            self._dirty = set()
+        return challenge
+
+    @staticmethod
+    def _load(day: date):
+        DailyChallengeManager.generate_daily_challenge(day)
+
+        cur = db.cursor()
+        cur.execute("""
+            SELECT id, title, description, challenge_type, target_value, xp_reward
+            FROM daily_challenges WHERE challenge_date = %s
+        """, (day.isoformat(),))
+        row = cur.fetchone()
+        if not row:
+            return None, {}, set()
+
+        challenge = Challenge(row[0], day, row[1], row[2], row[3], row[4], row[5])
+        cur.execute("""
+            SELECT user_id, current_value, is_completed
+            FROM user_daily_challenges WHERE challenge_id = %s
+        """, (challenge.id,))
+        progress, completed = {}, set()
+        for user_id, current, is_completed in cur.fetchall():
+            progress[user_id] = current or 0
+            if is_completed:
+                completed.add(user_id)
+        return challenge, progress, completed
+
+    # =====================================================
+    # 📌 Lifecycle
+    # =====================================================
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[CHALLENGE ERROR] {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="daily-challenges")
+
+    async def stop(self) -> None:
+        """Stop the background task and write pending progress"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+challenge_service = ChallengeService()
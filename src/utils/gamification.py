@@ -5,10 +5,41 @@ PostgreSQL version
 """
 
 import random
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-from config import sql, db
+
+import pytz
+
+from config import sql, db, DB_TYPE
+
+TIMEZONE = pytz.timezone("Asia/Tashkent")
+
+# Kunlik check-in: faqat kunning birinchi chaqiruvida qator o'zgaradi
+# (params: user_id, bugun, kecha, kecha)
+_STREAK_SQL = """
+    INSERT INTO users_enhanced (user_id, language_code, created_at, last_active_at,
+                                streak_days, longest_streak, last_streak_date)
+    VALUES (%s, 'uz', NOW(), NOW(), 1, 1, %s)
+    ON CONFLICT (user_id) DO UPDATE
+        SET streak_days = CASE WHEN users_enhanced.last_streak_date = %s
+                               THEN users_enhanced.streak_days + 1 ELSE 1 END,
+            longest_streak = GREATEST(
+                COALESCE(users_enhanced.longest_streak, 0),
+                CASE WHEN users_enhanced.last_streak_date = %s
+                     THEN users_enhanced.streak_days + 1 ELSE 1 END
+            ),
+            last_streak_date = EXCLUDED.last_streak_date
+        WHERE users_enhanced.last_streak_date IS NULL
+           OR users_enhanced.last_streak_date < EXCLUDED.last_streak_date
+"""
+
+
+def _supports_returning() -> bool:
+    if DB_TYPE == "postgres":
+        return True
+    from src.db.sqlite_backend import NATIVE_RETURNING
+    return NATIVE_RETURNING
 
 
 @dataclass
@@ -70,152 +101,70 @@ class GamificationEngine:
     
     @classmethod
     def add_xp(cls, user_id: int, amount: int, reason: str = "") -> Dict[str, Any]:
-        """Add XP to user and handle level ups"""
-        try:
-            # Check if user exists in enhanced table
-            sql.execute("SELECT user_id FROM users_enhanced WHERE user_id = %s", (user_id,))
-            if not sql.fetchone():
-                # Create user if not exists
-                sql.execute("""
-                    INSERT INTO users_enhanced 
-                    (user_id, username, first_name, language_code, created_at, last_active_at, experience_points, user_level)
-                    VALUES (%s, %s, %s, %s, NOW(), NOW(), 0, 1)
-                """, (user_id, None, None, 'uz'))
-            
-            # Ensure leaderboard entry exists
-            sql.execute("SELECT user_id FROM leaderboard WHERE user_id = %s", (user_id,))
-            if not sql.fetchone():
-                sql.execute("INSERT INTO leaderboard (user_id, total_xp) VALUES (%s, 0)", (user_id,))
-            
-            db.commit()
-            
-            # Get current stats
-            sql.execute("""
-                SELECT experience_points, user_level, streak_days
-                FROM users_enhanced WHERE user_id = %s
-            """, (user_id,))
-            
-            result = sql.fetchone()
-            if not result:
-                return {"success": False, "error": "User not found"}
-            
-            current_xp, current_level, streak = result
-            new_xp = current_xp + amount
-            
-            # Calculate new level
-            new_level = cls.calculate_level(new_xp)
-            level_up = new_level > current_level
-            
-            # Update database
-            sql.execute("""
-                UPDATE users_enhanced 
-                SET experience_points = %s, user_level = %s, updated_at = NOW()
-                WHERE user_id = %s
-            """, (new_xp, new_level, user_id))
-            
-            # Update leaderboard
-            sql.execute("""
-                UPDATE leaderboard 
-                SET total_xp = %s, last_updated = NOW()
-                WHERE user_id = %s
-            """, (new_xp, user_id))
-            
-            db.commit()
-            
-            return {
-                "success": True,
-                "xp_added": amount,
-                "total_xp": new_xp,
-                "new_level": new_level,
-                "level_up": level_up,
-                "reason": reason
-            }
-        except Exception as e:
-            print(f"[ERROR] add_xp: {e}")
-            db.rollback()
-            return {"success": False, "error": str(e)}
+        """
+        Queue an XP award in the ledger (applied atomically in batches,
+        level-ups are announced when the batch is written)
+        """
+        from src.utils.xp_ledger import xp_ledger
+        return xp_ledger.award(user_id, amount, reason)
     
     @classmethod
-    def check_streak(cls, user_id: int) -> Dict[str, Any]:
-        """Check and update user's daily streak"""
+    def streak_reward(cls, streak: int) -> int:
+        """XP for a daily check-in"""
+        if streak <= 1:
+            return XPRewards.DAILY_STREAK
+        return min(XPRewards.DAILY_STREAK + streak * 5, 200)  # Cap at 200 XP
+    
+    @classmethod
+    def check_streak(cls, user_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Check and update user's daily streak with one upsert. The row is only
+        changed on the user's first check-in of the day (Tashkent time).
+        
+        Args:
+            user_id: Telegram user id
+            today: Check-in date, defaults to today in Asia/Tashkent
+        
+        Returns:
+            Streak info; ``xp_reward`` is 0 when the user already checked in today
+        """
+        today = today or datetime.now(TIMEZONE).date()
+        yesterday = (today - timedelta(days=1)).isoformat()
+        params = (user_id, today.isoformat(), yesterday, yesterday)
         try:
-            # Get or create user
-            sql.execute("SELECT user_id FROM users_enhanced WHERE user_id = %s", (user_id,))
-            if not sql.fetchone():
-                sql.execute("""
-                    INSERT INTO users_enhanced 
-                    (user_id, username, first_name, language_code, created_at, last_active_at, streak_days, last_streak_date)
-                    VALUES (%s, %s, %s, %s, NOW(), NOW(), 1, CURRENT_DATE)
-                """, (user_id, None, None, 'uz'))
-                db.commit()
-                return {
-                    "success": True,
-                    "streak": 1,
-                    "maintained": False,
-                    "xp_reward": 50
-                }
-            
-            sql.execute("""
-                SELECT streak_days, last_streak_date, longest_streak
-                FROM users_enhanced WHERE user_id = %s
-            """, (user_id,))
-            
-            result = sql.fetchone()
-            if not result:
-                return {"success": False, "error": "User not found"}
-            
-            streak, last_date, longest = result
-            today = datetime.now().date()
-            
-            if last_date:
-                # Parse date from string
-                if isinstance(last_date, str):
-                    last_date = datetime.strptime(last_date, '%Y-%m-%d').date()
-                days_diff = (today - last_date).days
-                
-                if days_diff == 0:
-                    # Already checked in today
-                    return {
-                        "success": True,
-                        "streak": streak,
-                        "maintained": True,
-                        "xp_reward": 0
-                    }
-                elif days_diff == 1:
-                    # Streak maintained
-                    streak += 1
-                    longest = max(longest or 0, streak)
-                    xp_reward = min(50 + (streak * 5), 200)  # Cap at 200 XP
-                else:
-                    # Streak broken
-                    streak = 1
-                    xp_reward = 50
+            cur = db.cursor()
+            if _supports_returning():
+                cur.execute(_STREAK_SQL + " RETURNING streak_days, longest_streak", params)
+                row = cur.fetchone()
             else:
-                streak = 1
-                xp_reward = 50
-            
-            # Update database
-            sql.execute("""
-                UPDATE users_enhanced 
-                SET streak_days = %s, longest_streak = %s, last_streak_date = CURRENT_DATE
-                WHERE user_id = %s
-            """, (streak, longest, user_id))
-            
+                cur.execute(_STREAK_SQL, params)
+                row = None
+                if cur.rowcount > 0:
+                    cur.execute(
+                        "SELECT streak_days, longest_streak FROM users_enhanced WHERE user_id = %s",
+                        (user_id,)
+                    )
+                    row = cur.fetchone()
             db.commit()
             
-            # Add XP for streak
-            xp_result = cls.add_xp(user_id, xp_reward, f"Daily streak: {streak} days")
+            if row is None:
+                # Bugun allaqachon belgilangan
+                return {"success": True, "maintained": True, "xp_reward": 0}
+            
+            streak, longest = row
+            xp_reward = cls.streak_reward(streak)
+            cls.add_xp(user_id, xp_reward, f"Daily streak: {streak} days")
             
             return {
                 "success": True,
                 "streak": streak,
                 "longest_streak": longest,
-                "maintained": days_diff == 1 if last_date else False,
+                "maintained": streak > 1,
                 "xp_reward": xp_reward,
-                "level_up": xp_result.get("level_up", False)
             }
         except Exception as e:
             print(f"[ERROR] check_streak: {e}")
+            db.rollback()
             return {"success": False, "error": str(e)}
 
 
@@ -321,11 +270,12 @@ class DailyChallengeManager:
     ]
     
     @classmethod
-    def generate_daily_challenge(cls) -> Optional[Dict[str, Any]]:
-        """Generate new daily challenge"""
+    def generate_daily_challenge(cls, day: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Generate the challenge for ``day`` (Tashkent today) unless it exists"""
+        day = day or datetime.now(TIMEZONE).date()
         try:
             # Check if today's challenge exists
-            sql.execute("SELECT id FROM daily_challenges WHERE challenge_date = CURRENT_DATE")
+            sql.execute("SELECT id FROM daily_challenges WHERE challenge_date = %s", (day.isoformat(),))
             if sql.fetchone():
                 return None
             
@@ -341,11 +291,14 @@ class DailyChallengeManager:
                 "languages": f"Bugun {target} ta turli tilga tarjima qiling",
             }
             
+            # Bir nechta jarayon bir vaqtda yaratsa ham bitta qoladi
             sql.execute("""
                 INSERT INTO daily_challenges 
                 (challenge_date, title, description, challenge_type, target_value, xp_reward)
-                VALUES (CURRENT_DATE, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (challenge_date) DO NOTHING
             """, (
+                day.isoformat(),
                 template["title"],
                 descriptions[template["type"]],
                 template["type"],
@@ -361,93 +314,15 @@ class DailyChallengeManager:
     
     @classmethod
     def get_user_challenge(cls, user_id: int) -> Dict[str, Any]:
-        """Get today's challenge for user"""
-        try:
-            sql.execute("""
-                SELECT dc.id, dc.title, dc.description, dc.challenge_type, 
-                       dc.target_value, dc.xp_reward,
-                       COALESCE(udc.current_value, 0) as current,
-                       COALESCE(udc.is_completed, FALSE) as completed
-                FROM daily_challenges dc
-                LEFT JOIN user_daily_challenges udc 
-                    ON dc.id = udc.challenge_id AND udc.user_id = %s
-                WHERE dc.challenge_date = CURRENT_DATE
-            """, (user_id,))
-            
-            result = sql.fetchone()
-            if not result:
-                return {"success": False, "error": "No challenge for today"}
-            
-            return {
-                "success": True,
-                "id": result[0],
-                "title": result[1],
-                "description": result[2],
-                "type": result[3],
-                "target": result[4],
-                "reward": result[5],
-                "current": result[6],
-                "completed": result[7],
-                "progress": min(100, int(result[6] / result[4] * 100))
-            }
-        except Exception as e:
-            print(f"[ERROR] get_user_challenge: {e}")
-            return {"success": False, "error": str(e)}
+        """Get today's challenge for user (from the in-memory challenge service)"""
+        from src.utils.challenge_service import challenge_service
+        return challenge_service.get(user_id)
     
     @classmethod
     def update_progress(cls, user_id: int, challenge_type: str, amount: int = 1):
-        """Update challenge progress for user"""
-        try:
-            sql.execute("""
-                SELECT dc.id, dc.target_value, dc.xp_reward
-                FROM daily_challenges dc
-                WHERE dc.challenge_date = CURRENT_DATE AND dc.challenge_type = %s
-            """, (challenge_type,))
-            
-            result = sql.fetchone()
-            if not result:
-                return {"success": False}
-            
-            challenge_id, target, reward = result
-            
-            # Get current progress
-            sql.execute("""
-                SELECT current_value FROM user_daily_challenges
-                WHERE user_id = %s AND challenge_id = %s
-            """, (user_id, challenge_id))
-            
-            progress_result = sql.fetchone()
-            if progress_result:
-                current = min(progress_result[0] + amount, target)
-                sql.execute("""
-                    UPDATE user_daily_challenges
-                    SET current_value = %s
-                    WHERE user_id = %s AND challenge_id = %s
-                """, (current, user_id, challenge_id))
-            else:
-                current = amount
-                sql.execute("""
-                    INSERT INTO user_daily_challenges (user_id, challenge_id, current_value)
-                    VALUES (%s, %s, %s)
-                """, (user_id, challenge_id, current))
-            
-            # Check completion
-            if current >= target:
-                sql.execute("""
-                    UPDATE user_daily_challenges
-                    SET is_completed = TRUE, completed_at = NOW()
-                    WHERE user_id = %s AND challenge_id = %s AND is_completed = FALSE
-                """, (user_id, challenge_id))
-                
-                if sql.rowcount > 0:
-                    # Award XP
-                    GamificationEngine.add_xp(user_id, reward, "Daily challenge completed")
-            
-            db.commit()
-            return {"success": True, "current": current, "target": target}
-        except Exception as e:
-            print(f"[ERROR] update_progress: {e}")
-            return {"success": False, "error": str(e)}
+        """Update challenge progress for user (in memory, written in batches)"""
+        from src.utils.challenge_service import challenge_service
+        return challenge_service.record(user_id, challenge_type, amount)
 
 
 class LeaderboardManager:
@@ -455,21 +330,21 @@ class LeaderboardManager:
     
     @staticmethod
     def update_rankings():
-        """Recalculate all rankings"""
+        """Recalculate all rankings (scheduled job: runs in a thread, own cursor)"""
         try:
-            # Get all users ordered by XP
-            sql.execute("SELECT user_id, total_xp FROM leaderboard ORDER BY total_xp DESC")
-            users = sql.fetchall()
-            
-            # Update ranks
-            for rank, (user_id, _) in enumerate(users, 1):
-                sql.execute("""
-                    UPDATE leaderboard
-                    SET current_rank = %s,
-                        highest_rank = LEAST(COALESCE(highest_rank, %s), %s),
-                        last_updated = NOW()
-                    WHERE user_id = %s
-                """, (rank, rank, rank, user_id))
+            cur = db.cursor()
+            # Bitta set-based UPDATE - har bir qator uchun alohida so'rov emas
+            cur.execute("""
+                UPDATE leaderboard AS l
+                SET current_rank = r.new_rank,
+                    highest_rank = LEAST(COALESCE(l.highest_rank, r.new_rank), r.new_rank),
+                    last_updated = NOW()
+                FROM (
+                    SELECT user_id, ROW_NUMBER() OVER (ORDER BY total_xp DESC, user_id) AS new_rank
+                    FROM leaderboard
+                ) AS r
+                WHERE l.user_id = r.user_id
+            """)
             
             db.commit()
             return {"success": True}
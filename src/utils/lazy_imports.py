@@ -0,0 +1,62 @@
+"""
+Lazy loading for heavy optional dependencies
+
+Playwright, BeautifulSoup, openpyxl and the translators are only needed by
+a few handlers. ``lazy_import`` returns a placeholder module that performs
+the real import on first attribute access, so processes that never touch
+these features don't pay their import time and memory.
+"""
+
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+
+# module name -> import time in seconds (filled on first use)
+LAZY_LOAD_TIMES: Dict[str, float] = {}
+
+_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    LAZY_LOAD_TIMES[self.__name__] = time.perf_counter() - started
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Get a lazily imported module
+
+    Args:
+        name: Full module name, e.g. "playwright.async_api"
+
+    Returns:
+        Proxy that behaves like the module once an attribute is accessed
+    """
+    return LazyModule(name)
@@ -0,0 +1,138 @@
+"""
+🛑 Graceful shutdown
+
+On SIGTERM/SIGINT (aiogram stops polling and emits shutdown) ``shutdown()``:
+
+1. stops intake: polling is stopped and ``stopping`` is set, so long
+   loops (broadcasts) checkpoint themselves at the next batch boundary
+2. drains: waits for in-flight updates and tracked background tasks, up to
+   SHUTDOWN_DRAIN_SECONDS
+3. runs the registered stop hooks phase by phase - ``jobs`` (schedulers,
+   refreshers), ``buffers`` (write-behind buffers: sessions, challenges,
+   XP), ``pools`` (HTTP session, DB connection, metrics server, logging)
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))
+SHUTDOWN_HOOK_SECONDS = float(os.getenv("SHUTDOWN_HOOK_SECONDS", "15"))
+
+PHASES = ("jobs", "buffers", "pools")
+
+
+class Lifecycle:
+    def __init__(self, drain_seconds: float = SHUTDOWN_DRAIN_SECONDS, hook_seconds: float = SHUTDOWN_HOOK_SECONDS):
+        self.drain_seconds = drain_seconds
+        self.hook_seconds = hook_seconds
+        self.stopping = False
+        self._in_flight = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._hooks: Dict[str, List[Tuple[str, Callable[[], Any]]]] = {phase: [] for phase in PHASES}
+        self._done: Optional[asyncio.Event] = None
+
+    # =====================================================
+    # 📌 Ro'yxatdan o'tkazish
+    # =====================================================
+
+    def on_stop(self, phase: str, name: str, func: Callable[[], Any]) -> None:
+        """
+        Register a stop hook; hooks of a phase run in registration order
+
+        Args:
+            phase: "jobs", "buffers" or "pools"
+            name: Shown in shutdown logs
+            func: Coroutine function or plain function
+        """
+        if phase not in self._hooks:
+            raise ValueError(f"Unknown shutdown phase '{phase}' (expected one of {PHASES})")
+        self._hooks[phase].append((name, func))
+
+    def track(self, coro: Awaitable, name: Optional[str] = None) -> asyncio.Task:
+        """Run background work that shutdown must wait for (or let checkpoint)"""
+        task = asyncio.ensure_future(coro)
+        if name and hasattr(task, "set_name"):
+            task.set_name(name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # =====================================================
+    # 📌 In-flight update'lar (middleware chaqiradi)
+    # =====================================================
+
+    def update_started(self) -> None:
+        self._in_flight += 1
+
+    def update_finished(self) -> None:
+        self._in_flight -= 1
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight + len(self._tasks)
+
+    async def _drain(self) -> None:
+        while self.in_flight:
+            if self._tasks:
+                await asyncio.wait(set(self._tasks), timeout=0.1)
+            else:
+                await asyncio.sleep(0.05)
+
+    # =====================================================
+    # 📌 Shutdown
+    # =====================================================
+
+    async def shutdown(self, dispatcher=None) -> None:
+        """Stop intake, drain, then run stop hooks phase by phase"""
+        if self.stopping:
+            # Ikkinchi chaqiruv birinchisi tugashini kutadi
+            if self._done is not None:
+                await self._done.wait()
+            return
+        self.stopping = True
+        self._done = asyncio.Event()
+
+        try:
+            if dispatcher is not None:
+                try:
+                    await dispatcher.stop_polling()
+                except RuntimeError:
+                    pass  # polling allaqachon to'xtagan
+
+            started = time.perf_counter()
+            if self.in_flight:
+                print(f"[SHUTDOWN] Draining {self._in_flight} update(s), {len(self._tasks)} task(s)...")
+                try:
+                    await asyncio.wait_for(self._drain(), timeout=self.drain_seconds)
+                except asyncio.TimeoutError:
+                    print(f"[SHUTDOWN WARN] Drain deadline ({self.drain_seconds:g}s) reached, "
+                          f"abandoning {self._in_flight} update(s), {len(self._tasks)} task(s)")
+                    for task in list(self._tasks):
+                        task.cancel()
+            print(f"[SHUTDOWN] Drained in {time.perf_counter() - started:.2f}s")
+
+            for phase in PHASES:
+                for name, func in self._hooks[phase]:
+                    await self._run_hook(phase, name, func)
+        finally:
+            self._done.set()
+
+    async def _run_hook(self, phase: str, name: str, func: Callable[[], Any]) -> None:
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                await asyncio.wait_for(func(), timeout=self.hook_seconds)
+            else:
+                result = func()
+                if asyncio.iscoroutine(result):
+                    await asyncio.wait_for(result, timeout=self.hook_seconds)
+            print(f"[SHUTDOWN] {phase}: {name} stopped ({time.perf_counter() - started:.2f}s)")
+        except asyncio.TimeoutError:
+            print(f"[SHUTDOWN WARN] {phase}: {name} did not stop within {self.hook_seconds:g}s")
+        except Exception as e:
+            print(f"[SHUTDOWN ERROR] {phase}: {name}: {e}")
+
+
+lifecycle = Lifecycle()
@@ -1,92 +1,257 @@
 """
 Professional logging system for Telegram bot
+
+All records go through one in-memory queue; a background QueueListener
+thread does the formatting and file/console I/O, so logging never blocks
+the event loop. Named loggers (bot, translate, ...) get their own rotating
+files through a routing handler inside the listener.
+
+Environment:
+    LOG_FORMAT=json           - file loglarini JSON qatorlar sifatida yozish
+    LOG_SAMPLE_RATES=users=0.1,translate=0.25
+                              - INFO/DEBUG yozuvlarining faqat shu ulushi saqlanadi
 """
+import atexit
+import itertools
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import sys
+import traceback
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional
 
 # Logs papkasini yaratish
 logs_dir = Path("logs")
 logs_dir.mkdir(exist_ok=True)
 
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_SAMPLE_RATES: Dict[str, float] = {
+    name.strip(): float(rate)
+    for name, rate in (
+        item.split("=", 1) for item in os.getenv("LOG_SAMPLE_RATES", "").split(",") if "=" in item
+    )
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+FILE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
 # Custom formatter
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors for console output"""
-    
+
     grey = "\x1b[38;21m"
     blue = "\x1b[38;5;39m"
     yellow = "\x1b[38;5;226m"
     red = "\x1b[38;5;196m"
     bold_red = "\x1b[31;1m"
     reset = "\x1b[0m"
-    
+
     FORMATS = {
-        logging.DEBUG: grey + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.INFO: blue + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.WARNING: yellow + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.ERROR: red + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset,
-        logging.CRITICAL: bold_red + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset
+        logging.DEBUG: grey + TEXT_FORMAT + reset,
+        logging.INFO: blue + TEXT_FORMAT + reset,
+        logging.WARNING: yellow + TEXT_FORMAT + reset,
+        logging.ERROR: red + TEXT_FORMAT + reset,
+        logging.CRITICAL: bold_red + TEXT_FORMAT + reset
     }
-    
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT, datefmt=DATE_FORMAT)
+        # Har bir daraja uchun formatter bir marta yaratiladi
+        self._formatters = {
+            level: logging.Formatter(fmt, datefmt=DATE_FORMAT) for level, fmt in self.FORMATS.items()
+        }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        extra = getattr(record, "data", None)
+        if extra:
+            payload["data"] = extra
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every N-th INFO/DEBUG record; WARNING and above always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if not self.every:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """Like QueueHandler, but keeps the traceback separate from the message"""
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class _RoutingHandler(logging.Handler):
+    """Runs in the listener thread: root handlers + per-logger file handlers"""
+
+    def __init__(self):
+        super().__init__()
+        self.root_handlers: List[logging.Handler] = []
+        self.routes: Dict[str, List[logging.Handler]] = {}
+
+    def _targets(self, name: str) -> List[logging.Handler]:
+        while name:
+            handlers = self.routes.get(name)
+            if handlers is not None:
+                return handlers
+            name = name.rpartition(".")[0]
+        return []
+
+    def emit(self, record):
+        seen = set()
+        for handler in itertools.chain(self.root_handlers, self._targets(record.name)):
+            if id(handler) in seen or record.levelno < handler.level:
+                continue
+            seen.add(id(handler))
+            handler.handle(record)
+
+    def close(self):
+        for handler in {id(h): h for hs in [self.root_handlers, *self.routes.values()] for h in hs}.values():
+            handler.close()
+        super().close()
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_router = _RoutingHandler()
+_listener: Optional[QueueListener] = None
+_file_handlers: Dict[Path, RotatingFileHandler] = {}
+
+
+def _file_formatter() -> logging.Formatter:
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(FILE_FORMAT, datefmt=DATE_FORMAT)
+
+
+def _file_handler(filename: str, level: int) -> RotatingFileHandler:
+    """Shared rotating handler per file (the same file is never opened twice)"""
+    path = logs_dir / filename
+    handler = _file_handlers.get(path)
+    if handler is None:
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=10 * 1024 * 1024,  # 10MB
+            backupCount=5,
+            encoding='utf-8',
+            delay=True
+        )
+        handler.setLevel(level)
+        handler.setFormatter(_file_formatter())
+        _file_handlers[path] = handler
+    return handler
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Install the queue pipeline on the root logger (idempotent)
+
+    Root records go to stdout and logs/bot.log; named loggers created with
+    setup_logger() additionally get their own files.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(
+        ColoredFormatter() if sys.stdout.isatty() else logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    )
+    _router.root_handlers = [console_handler, _file_handler("bot.log", logging.DEBUG)]
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_StructuredQueueHandler(_queue))
+
+    _listener = QueueListener(_queue, _router, respect_handler_level=False)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    _router.close()
+    _file_handlers.clear()
+
+
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
     Professional logger setup with file and console handlers
-    
+
     Args:
         name: Logger nomi
         level: Logging darajasi
-        
+
     Returns:
         Configured logger
     """
+    configure_logging()
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Agar logger allaqachon configured bo'lsa, qaytarish
-    if logger.handlers:
+    if name in _router.routes:
         return logger
-    
-    # File handler - barcha loglar
-    file_handler = RotatingFileHandler(
-        logs_dir / f"{name}.log",
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(file_formatter)
-    
-    # File handler - faqat errorlar
-    error_handler = RotatingFileHandler(
-        logs_dir / f"{name}_errors.log",
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(file_formatter)
-    
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(ColoredFormatter())
-    
-    # Handlerlarni qo'shish
-    logger.addHandler(file_handler)
-    logger.addHandler(error_handler)
-    logger.addHandler(console_handler)
-    
+
+    # Barcha loglar + faqat errorlar (konsolga root orqali chiqadi)
+    _router.routes[name] = [
+        _file_handler(f"{name}.log", logging.DEBUG),
+        _file_handler(f"{name}_errors.log", logging.ERROR),
+    ]
+
+    rate = LOG_SAMPLE_RATES.get(name)
+    if rate is not None and rate < 1:
+        logger.addFilter(SamplingFilter(rate))
+
     return logger
 
 
@@ -100,22 +265,25 @@ admin_logger = setup_logger('admin')
 
 def log_user_action(user_id: int, action: str, details: str = ""):
     """Foydalanuvchi harakatlarini loglash"""
-    user_logger.info(f"User {user_id} - {action} - {details}")
+    user_logger.info("User %s - %s - %s", user_id, action, details,
+                     extra={"data": {"user_id": user_id, "action": action}})
 
 
 def log_translation(user_id: int, from_lang: str, to_lang: str, text_length: int):
     """Tarjimalarni loglash"""
-    translate_logger.info(f"User {user_id} - {from_lang} -> {to_lang} - Length: {text_length}")
+    translate_logger.info("User %s - %s -> %s - Length: %s", user_id, from_lang, to_lang, text_length,
+                          extra={"data": {"user_id": user_id, "from": from_lang, "to": to_lang,
+                                          "length": text_length}})
 
 
 def log_error(error: Exception, context: str = ""):
     """Xatolarni loglash"""
-    bot_logger.error(f"Error in {context}: {str(error)}", exc_info=True)
+    bot_logger.error("Error in %s: %s", context, error, exc_info=True)
 
 
 def log_db_query(query: str, execution_time: float):
     """Database querylarni loglash"""
     if execution_time > 1.0:  # Slow query warning
-        db_logger.warning(f"Slow query ({execution_time:.2f}s): {query[:100]}...")
+        db_logger.warning("Slow query (%.2fs): %s...", execution_time, query[:100])
     else:
-        db_logger.debug(f"Query ({execution_time:.3f}s): {query[:100]}...")
+        db_logger.debug("Query (%.3fs): %s...", execution_time, query[:100])
@@ -0,0 +1,253 @@
+"""
+📈 In-process metrics with a Prometheus text endpoint
+
+Minimal Counter/Histogram implementation (no external dependency): handler
+latency, DB query timing by statement fingerprint, translation providers,
+broadcast throughput and cache hit rates. ``start_metrics_server`` exposes
+everything on ``http://METRICS_HOST:METRICS_PORT/metrics``.
+"""
+
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 - o'chirilgan
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_REGISTRY: List["_Metric"] = []
+_started_at = time.time()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, labels, le)} {cumulative}")
+            label_str = _label_str(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+# =====================================================
+# 📌 Bot metrikalari
+# =====================================================
+
+UPDATE_SECONDS = Histogram(
+    "tarjimon_update_seconds", "Time to process one Telegram update", ("type",))
+HANDLER_SECONDS = Histogram(
+    "tarjimon_handler_seconds", "Handler latency", ("event", "router", "handler"))
+HANDLER_ERRORS = Counter(
+    "tarjimon_handler_errors_total", "Unhandled handler exceptions", ("event", "router", "handler", "error"))
+
+DB_QUERY_SECONDS = Histogram(
+    "tarjimon_db_query_seconds", "DB statement time by fingerprint", ("fingerprint",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+DB_QUERY_ERRORS = Counter(
+    "tarjimon_db_query_errors_total", "Failed DB statements by fingerprint", ("fingerprint",))
+
+TRANSLATION_SECONDS = Histogram(
+    "tarjimon_translation_seconds", "Translation provider latency", ("provider",))
+TRANSLATION_ERRORS = Counter(
+    "tarjimon_translation_errors_total", "Translation provider failures", ("provider",))
+
+BROADCAST_MESSAGES = Counter(
+    "tarjimon_broadcast_messages_total", "Broadcast deliveries", ("result",))
+BROADCAST_SECONDS = Histogram(
+    "tarjimon_broadcast_seconds", "Duration of a full broadcast",
+    buckets=(1, 10, 30, 60, 300, 600, 1800, 3600))
+
+CACHE_REQUESTS = Counter(
+    "tarjimon_cache_requests_total", "In-process cache lookups", ("cache", "result"))
+
+UPDATE_QUEUE_SECONDS = Histogram(
+    "tarjimon_update_queue_seconds", "Wait before an update starts (same-user ordering + global limit)")
+UPDATES_DROPPED = Counter(
+    "tarjimon_updates_dropped_total", "Updates dropped before handling", ("reason",))
+ROUTING_DECISIONS = Counter(
+    "tarjimon_routing_total", "Messages sent to the catch-all directly (fast) or through all routers (chain)", ("path",))
+
+JOB_SECONDS = Histogram(
+    "tarjimon_job_seconds", "Scheduled job run time", ("job",),
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600))
+JOB_RUNS = Counter(
+    "tarjimon_job_runs_total", "Scheduled job runs by outcome", ("job", "result"))
+
+
+def cache_hit(cache: str, hit: bool) -> None:
+    """Count a lookup in one of the in-process caches"""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+# =====================================================
+# 📌 SQL fingerprint
+# =====================================================
+
+_FP_STRING = re.compile(r"'(?:[^']|'')*'")
+_FP_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_FP_IN_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_FP_VALUES = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_FP_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def query_fingerprint(query: str) -> str:
+    """
+    Normalize a statement so that queries differing only in literals,
+    IN-list length or multi-row VALUES count share one fingerprint
+
+    Args:
+        query: Raw SQL text
+
+    Returns:
+        Normalized statement (max 200 chars)
+    """
+    fp = _FP_STRING.sub("?", query)
+    fp = _FP_NUMBER.sub("?", fp)
+    fp = _FP_IN_LIST.sub("(?)", fp)
+    fp = _FP_SPACES.sub(" ", fp).strip()
+    fp = _FP_VALUES.sub(r"\1, ...", fp)
+    return fp[:200]
+
+
+def observe_db_query(query: str, seconds: float, failed: bool = False) -> None:
+    fingerprint = query_fingerprint(query)
+    DB_QUERY_SECONDS.observe(seconds, fingerprint)
+    if failed:
+        DB_QUERY_ERRORS.inc(fingerprint)
+
+
+# =====================================================
+# 📌 HTTP endpoint
+# =====================================================
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = [
+        "# HELP tarjimon_uptime_seconds Seconds since process start",
+        "# TYPE tarjimon_uptime_seconds gauge",
+        f"tarjimon_uptime_seconds {time.time() - _started_at:.0f}",
+    ]
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_runner = None
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[str]:
+    """
+    Serve /metrics on a local port (aiohttp comes with aiogram)
+
+    Returns:
+        URL of the endpoint, or None if disabled
+    """
+    global _runner
+    if port <= 0 or _runner is not None:
+        return None
+
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    _runner = web.AppRunner(app, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    return f"http://{host}:{port}/metrics"
+
+
+async def stop_metrics_server() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,39 @@
+"""
+🗓 Periodic maintenance jobs
+
+Heavy work runs off-peak (Asia/Tashkent night) on one instance; the daily
+challenge rollover refreshes each process's in-memory cache, so it runs on
+every instance.
+"""
+
+from src.utils.challenge_service import challenge_service
+from src.utils.gamification import LeaderboardManager
+from src.utils.scheduler import JobScheduler
+from src.utils.translation_history import trim_history
+
+
+def trim_translation_history() -> None:
+    deleted = trim_history()
+    print(f"[JOB] Translation history trimmed: {deleted} rows")
+
+
+def update_leaderboard_rankings() -> None:
+    # update_rankings xatoni {"success": False} qilib qaytaradi - scheduler "error" ko'rishi uchun
+    result = LeaderboardManager.update_rankings()
+    if not result.get("success"):
+        raise RuntimeError(f"Leaderboard rankings update failed: {result.get('error')}")
+
+
+def register_default_jobs(scheduler: JobScheduler) -> None:
+    scheduler.add_job(
+        "daily_challenge_rollover", challenge_service.rollover,
+        cron="0 0 * * *", exclusive=False,
+    )
+    scheduler.add_job(
+        "leaderboard_rankings", update_leaderboard_rankings,
+        cron="30 3 * * *", jitter=60,
+    )
+    scheduler.add_job(
+        "translation_history_trim", trim_translation_history,
+        cron="0 4 * * *", jitter=60,
+    )
@@ -0,0 +1,264 @@
+"""
+⏰ Asyncio job scheduler
+
+Jobs run on cron-style (``"30 3 * * *"``, Asia/Tashkent) or fixed-interval
+schedules, optionally with random jitter. Synchronous jobs run in a worker
+thread so they never block update handling. A job never overlaps with its
+own previous run, and run time / outcome go to the metrics registry.
+
+Exclusive jobs (the default) run on exactly one instance per scheduled
+slot: the instance takes a Postgres advisory lock for the job and claims
+the slot in ``scheduler_jobs``; every other instance skips it. Jobs that
+maintain per-process state (in-memory caches) use ``exclusive=False``.
+"""
+
+import asyncio
+import os
+import random
+import socket
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pytz
+
+from config import db, DB_TYPE
+from src.utils.cron import CronSchedule
+from src.utils.metrics import JOB_RUNS, JOB_SECONDS
+
+TIMEZONE = pytz.timezone("Asia/Tashkent")
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_CLAIM_SQL = """
+    INSERT INTO scheduler_jobs (job_name, last_slot, last_started_at, owner)
+    VALUES (%s, %s, NOW(), %s)
+    ON CONFLICT (job_name) DO UPDATE
+        SET last_slot = EXCLUDED.last_slot,
+            last_started_at = EXCLUDED.last_started_at,
+            owner = EXCLUDED.owner
+        WHERE scheduler_jobs.last_slot IS NULL
+           OR scheduler_jobs.last_slot < EXCLUDED.last_slot
+"""
+
+_FINISH_SQL = """
+    UPDATE scheduler_jobs
+    SET last_finished_at = NOW(), last_status = %s, last_duration_ms = %s
+    WHERE job_name = %s
+"""
+
+
+def _local_now() -> datetime:
+    """Naive Asia/Tashkent time (minute arithmetic without tz objects)"""
+    return datetime.now(TIMEZONE).replace(tzinfo=None)
+
+
+# =====================================================
+# 📌 Jobs
+# =====================================================
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    cron: Optional[CronSchedule] = None
+    every: Optional[float] = None
+    jitter: float = 0.0
+    exclusive: bool = True
+    running: bool = False
+    next_run: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_duration: Optional[float] = None
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def next_slot(self, now: datetime) -> datetime:
+        if self.cron is not None:
+            return self.cron.next_after(now)
+        # Epoch'ga tekislangan - hamma instance'larda slot bir xil
+        timestamp = (int(time.time() // self.every) + 1) * self.every
+        return datetime.fromtimestamp(timestamp, TIMEZONE).replace(tzinfo=None)
+
+
+def _lock_key(job_name: str) -> int:
+    return zlib.crc32(f"tarjimon-job:{job_name}".encode())
+
+
+def _claim(job_name: str, slot: datetime) -> bool:
+    """Take the job's advisory lock and claim the slot (worker thread)"""
+    cur = db.cursor()
+    if DB_TYPE == "postgres":
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (_lock_key(job_name),))
+        if not cur.fetchone()[0]:
+            return False
+    try:
+        cur.execute(_CLAIM_SQL, (job_name, slot, OWNER))
+        claimed = cur.rowcount > 0
+        db.commit()
+    except Exception:
+        _release(job_name)
+        raise
+    if not claimed:
+        _release(job_name)
+    return claimed
+
+
+def _release(job_name: str) -> None:
+    if DB_TYPE == "postgres":
+        db.cursor().execute("SELECT pg_advisory_unlock(%s)", (_lock_key(job_name),))
+
+
+def _finish(job_name: str, status: str, seconds: float) -> None:
+    try:
+        db.cursor().execute(_FINISH_SQL, (status, int(seconds * 1000), job_name))
+        db.commit()
+    finally:
+        _release(job_name)
+
+
+class JobScheduler:
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self._stopping = False
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        cron: Optional[str] = None,
+        every: Optional[float] = None,
+        jitter: float = 0.0,
+        exclusive: bool = True,
+    ) -> Job:
+        """
+        Register a job
+
+        Args:
+            name: Unique job name (also the lock / bookkeeping key)
+            func: Coroutine function, or a plain function run in a worker thread
+            cron: Five-field cron expression in Asia/Tashkent time
+            every: Interval in seconds (instead of ``cron``)
+            jitter: Up to this many seconds of random delay per run
+            exclusive: Run on one instance only (advisory lock + slot claim)
+        """
+        if (cron is None) == (every is None):
+            raise ValueError(f"Job '{name}' needs exactly one of cron/every")
+        if name in self.jobs:
+            raise ValueError(f"Job '{name}' is already registered")
+        job = Job(
+            name=name,
+            func=func,
+            cron=CronSchedule(cron) if cron else None,
+            every=every,
+            jitter=jitter,
+            exclusive=exclusive,
+        )
+        self.jobs[name] = job
+        return job
+
+    async def run_job(self, job: Job, slot: Optional[datetime] = None) -> Optional[str]:
+        """
+        Run one job now
+
+        Returns:
+            "ok", "error", or None when skipped (still running / other instance)
+        """
+        if job.running:
+            JOB_RUNS.inc(job.name, "overlap")
+            return None
+        slot = slot or _local_now().replace(second=0, microsecond=0)
+
+        job.running = True
+        try:
+            if job.exclusive:
+                try:
+                    claimed = await asyncio.to_thread(_claim, job.name, slot)
+                except Exception as e:
+                    print(f"[SCHEDULER ERROR] Could not claim {job.name}: {e}")
+                    claimed = False
+                if not claimed:
+                    JOB_RUNS.inc(job.name, "skipped")
+                    return None
+
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                if asyncio.iscoroutinefunction(job.func):
+                    await job.func()
+                else:
+                    await asyncio.to_thread(job.func)
+            except Exception as e:
+                status = "error"
+                print(f"[SCHEDULER ERROR] Job {job.name} failed: {e}")
+            elapsed = time.perf_counter() - started
+
+            job.last_status, job.last_duration = status, elapsed
+            JOB_SECONDS.observe(elapsed, job.name)
+            JOB_RUNS.inc(job.name, status)
+            if job.exclusive:
+                try:
+                    await asyncio.to_thread(_finish, job.name, status, elapsed)
+                except Exception as e:
+                    print(f"[SCHEDULER ERROR] Could not record {job.name}: {e}")
+            return status
+        finally:
+            job.running = False
+
+    async def _loop(self, job: Job) -> None:
+        while not self._stopping:
+            now = _local_now()
+            slot = job.next_slot(now)
+            job.next_run = slot
+            delay = (slot - now).total_seconds()
+            if job.jitter:
+                delay += random.uniform(0, job.jitter)
+            await asyncio.sleep(max(0.0, delay))
+            if self._stopping:
+                break
+            try:
+                await self.run_job(job, slot)
+            except Exception as e:
+                print(f"[SCHEDULER ERROR] {job.name}: {e}")
+
+    def start(self) -> None:
+        self._stopping = False
+        for job in self.jobs.values():
+            if job._task is None or job._task.done():
+                job._task = asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Cancel idle schedule loops; runs in progress get ``timeout`` seconds
+        to finish before they are cancelled too
+        """
+        self._stopping = True
+        tasks = [job._task for job in self.jobs.values() if job._task is not None]
+        running = [job._task for job in self.jobs.values() if job._task is not None and job.running]
+        for task in tasks:
+            if task not in running:
+                task.cancel()
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                print(f"[SCHEDULER WARN] Cancelling {task.get_name()} (still running)")
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job._task = None
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": job.name,
+                "schedule": job.cron.expression if job.cron else f"every {job.every:g}s",
+                "exclusive": job.exclusive,
+                "running": job.running,
+                "next_run": job.next_run,
+                "last_status": job.last_status,
+                "last_duration": job.last_duration,
+            }
+            for job in self.jobs.values()
+        ]
+
+
+scheduler = JobScheduler()
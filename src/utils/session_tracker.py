@@ -0,0 +1,264 @@
+"""
+🕒 In-memory user session tracker
+
+Open sessions live in memory keyed by user; an update only touches the
+in-memory record. A background task periodically writes new sessions and
+closes idle ones (ended_at, duration, message/translation counts) in
+batches; ``stop()`` closes everything that is still open and flushes.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from config import db, DB_TYPE
+
+TIMEZONE = pytz.timezone("Asia/Tashkent")
+SESSION_IDLE_MINUTES = 30
+SESSION_FLUSH_SECONDS = 60
+WRITE_BATCH_SIZE = 500
+# Ma'lumoti yaroqsiz (FK, constraint) sessiya shuncha urinishdan keyin tashlanadi
+MAX_WRITE_ATTEMPTS = 3
+
+
+@dataclass
+class Session:
+    user_id: int
+    started_at: datetime
+    last_seen: datetime
+    messages: int = 0
+    translations: int = 0
+    exercises: int = 0
+    id: Optional[int] = None
+    in_flight: bool = False
+    end_reason: Optional[str] = None
+    attempts: int = 0  # yaroqsiz ma'lumot sabab rad etilgan yozishlar
+
+    @property
+    def duration_seconds(self) -> int:
+        return int((self.last_seen - self.started_at).total_seconds())
+
+
+def _chunks(items: List[Session], size: int = WRITE_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _is_row_error(error: Exception) -> bool:
+    """The row itself was rejected (psycopg2 / sqlite3 IntegrityError, DataError) - not an outage"""
+    return any(cls.__name__ in ("IntegrityError", "DataError") for cls in type(error).__mro__)
+
+
+def _supports_returning() -> bool:
+    if DB_TYPE == "postgres":
+        return True
+    from src.db.sqlite_backend import NATIVE_RETURNING
+    return NATIVE_RETURNING
+
+
+class SessionTracker:
+    def __init__(self, idle_minutes: int = SESSION_IDLE_MINUTES, flush_seconds: float = SESSION_FLUSH_SECONDS):
+        self.idle = timedelta(minutes=idle_minutes)
+        self.flush_seconds = flush_seconds
+        self._open: Dict[int, Session] = {}
+        self._closed: List[Session] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        # Ochiq sessiyani darhol yozish uchun qatorning id si kerak (RETURNING)
+        self._write_opens = _supports_returning()
+
+    # =====================================================
+    # 📌 Hot path (DB yo'q)
+    # =====================================================
+
+    def touch(self, user_id: int, event_type: str, now: Optional[datetime] = None) -> Session:
+        """Record activity; starts a new session after the idle timeout"""
+        now = now or datetime.now(TIMEZONE)
+        session = self._open.get(user_id)
+        if session is not None and now - session.last_seen > self.idle:
+            self._close(session, "idle")
+            session = None
+        if session is None:
+            session = self._open[user_id] = Session(user_id, now, now)
+        session.last_seen = now
+        if event_type == "message":
+            session.messages += 1
+        return session
+
+    def note(self, user_id: int, field: str, amount: int = 1) -> None:
+        """Count a translation/exercise in the user's open session"""
+        session = self._open.get(user_id)
+        if session is not None and field in ("translations", "exercises"):
+            setattr(session, field, getattr(session, field) + amount)
+
+    def _close(self, session: Session, reason: str) -> None:
+        session.end_reason = reason
+        self._open.pop(session.user_id, None)
+        self._closed.append(session)
+
+    # =====================================================
+    # 📌 Batch yozish
+    # =====================================================
+
+    def _expire_idle(self, now: datetime) -> None:
+        for session in [s for s in self._open.values() if now - s.last_seen > self.idle]:
+            self._close(session, "idle")
+
+    async def flush(self, now: Optional[datetime] = None) -> None:
+        """Write new sessions and finished ones in batches"""
+        async with self._flush_lock:
+            self._expire_idle(now or datetime.now(TIMEZONE))
+
+            opens = [
+                s for s in self._open.values()
+                if s.id is None and not s.in_flight and s.attempts < MAX_WRITE_ATTEMPTS
+            ] if self._write_opens else []
+            ready = [s for s in self._closed if not s.in_flight]
+            closes = [s for s in ready if s.id is not None]
+            full = [s for s in ready if s.id is None]
+            if not (opens or closes or full):
+                return
+
+            self._closed = [s for s in self._closed if s.in_flight]
+            for session in opens:
+                session.in_flight = True
+            try:
+                ids, rejected, pending = await asyncio.to_thread(self._write, opens, closes, full)
+            except Exception as e:
+                print(f"[SESSION TRACKER ERROR] Flush failed ({len(opens)} open, "
+                      f"{len(closes) + len(full)} closed): {e}")
+                ids, rejected, pending = {}, [], closes + full
+            for session in opens:
+                session.in_flight = False
+                session.id = ids.get((session.user_id, session.started_at))
+
+            # Yozilmagan yopiq sessiyalar keyingi flush'ga qaytadi (yaroqsizlari N urinishgacha)
+            retry = {id(s) for s in pending}
+            for session in rejected:
+                if session.attempts < MAX_WRITE_ATTEMPTS:
+                    retry.add(id(session))
+                elif session.end_reason is not None:
+                    print(f"[SESSION TRACKER ERROR] Dropping session of user {session.user_id} "
+                          f"after {session.attempts} rejected writes")
+            self._closed.extend(s for s in closes + full if id(s) in retry)
+
+    @staticmethod
+    def _write(opens: List[Session], closes: List[Session],
+               full: List[Session]) -> Tuple[Dict[tuple, int], List[Session], List[Session]]:
+        """
+        One statement per chunk; a chunk the database rejects for bad data
+        is retried row by row, so one bad row cannot block the others
+
+        Returns:
+            (ids of written open sessions, sessions rejected for bad data,
+             sessions left unwritten because the database failed)
+        """
+        ids = {}
+        cur = db.cursor()
+
+        def insert_opens(batch: List[Session]) -> None:
+            placeholders = ", ".join(["(%s, %s)"] * len(batch))
+            params = [v for s in batch for v in (s.user_id, s.started_at)]
+            cur.execute(
+                f"INSERT INTO user_sessions (user_id, started_at) VALUES {placeholders} "
+                f"RETURNING id, user_id",
+                params
+            )
+            started = {s.user_id: s.started_at for s in batch}
+            ids.update({(user_id, started[user_id]): session_id for session_id, user_id in cur.fetchall()})
+
+        def insert_full(batch: List[Session]) -> None:
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(batch))
+            params = [
+                v for s in batch for v in (
+                    s.user_id, s.started_at, s.last_seen, s.duration_seconds,
+                    s.messages, s.translations, s.exercises, s.end_reason
+                )
+            ]
+            cur.execute(f"""
+                INSERT INTO user_sessions (
+                    user_id, started_at, ended_at, duration_seconds,
+                    messages_count, translations_count, exercises_count, end_reason
+                ) VALUES {placeholders}
+            """, params)
+
+        def update_closes(batch: List[Session]) -> None:
+            cur.executemany("""
+                UPDATE user_sessions SET
+                    ended_at = %s,
+                    duration_seconds = %s,
+                    messages_count = %s,
+                    translations_count = %s,
+                    exercises_count = %s,
+                    end_reason = %s
+                WHERE id = %s
+            """, [
+                (s.last_seen, s.duration_seconds, s.messages, s.translations, s.exercises, s.end_reason, s.id)
+                for s in batch
+            ])
+
+        done, rejected = set(), []
+        try:
+            for write, sessions in ((insert_opens, opens), (insert_full, full), (update_closes, closes)):
+                for batch in _chunks(sessions):
+                    try:
+                        write(batch)
+                        done.update(id(s) for s in batch)
+                        continue
+                    except Exception as e:
+                        if not _is_row_error(e):
+                            raise
+                    for session in batch:
+                        try:
+                            write([session])
+                        except Exception as e:
+                            if not _is_row_error(e):
+                                raise
+                            session.attempts += 1
+                            rejected.append(session)
+                            print(f"[SESSION TRACKER ERROR] Session of user {session.user_id} rejected: {e}")
+                        done.add(id(session))
+            db.commit()
+        except Exception as e:
+            print(f"[SESSION TRACKER ERROR] Write interrupted: {e}")
+            return ids, rejected, [s for s in opens + full + closes if id(s) not in done]
+        return ids, rejected, []
+
+    # =====================================================
+    # 📌 Lifecycle
+    # =====================================================
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[SESSION TRACKER ERROR] {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="session-tracker")
+
+    async def stop(self) -> None:
+        """Close all open sessions and write them"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for session in list(self._open.values()):
+            self._close(session, "shutdown")
+        await self.flush()
+
+    @property
+    def open_sessions(self) -> int:
+        return len(self._open)
+
+
+session_tracker = SessionTracker()
@@ -0,0 +1,145 @@
+"""
+Startup profiler: per-module import time and memory
+
+Enable with ``PROFILE_STARTUP=1``. A meta path hook times every module's
+execution (self and cumulative, children excluded from self time) and,
+via tracemalloc, the memory it allocated. ``report()`` returns a text
+summary that main.py logs once startup has finished.
+"""
+
+import importlib.abc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.utils.lazy_imports import LAZY_LOAD_TIMES
+
+
+@dataclass
+class ImportStat:
+    name: str
+    cumulative: float = 0.0
+    self_time: float = 0.0
+    memory: int = 0
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps the real loader to measure exec_module"""
+
+    def __init__(self, profiler: "ImportProfiler", loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Collects import statistics while installed"""
+
+    def __init__(self):
+        self.stats: Dict[str, ImportStat] = {}
+        self._stack: List[list] = []  # [name, start, mem_start, child_time]
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._rss_start = self._rss_kb()
+
+    @staticmethod
+    def _rss_kb() -> Optional[int]:
+        """Peak RSS in KB; None where ``resource`` is missing (Windows)"""
+        try:
+            import resource
+        except ImportError:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _enter(self, name: str):
+        mem = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self._stack.append([name, time.perf_counter(), mem, 0.0])
+
+    def _exit(self, name: str):
+        _, started, mem_start, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        mem = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        stat = self.stats.setdefault(name, ImportStat(name))
+        stat.cumulative += elapsed
+        stat.self_time += elapsed - child_time
+        stat.memory += max(0, mem - mem_start)
+        if self._stack:
+            self._stack[-1][3] += elapsed
+
+    def finish(self):
+        """Stop collecting (keeps the results)"""
+        self._finished = time.perf_counter()
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self, top: int = 20) -> str:
+        """Text summary of the slowest imports"""
+        total = (self._finished or time.perf_counter()) - self._started
+        rss = self._rss_kb()
+        if rss is None or self._rss_start is None:
+            peak = "peak RSS n/a"
+        else:
+            peak = f"peak RSS {rss / 1024:.1f} MB (+{(rss - self._rss_start) / 1024:.1f} MB)"
+        lines = [
+            f"[PROFILE] Startup: {total:.2f}s, {len(self.stats)} modules, {peak}",
+            f"[PROFILE] {'module':<48} {'self ms':>9} {'cum ms':>9} {'mem KB':>9}",
+        ]
+        for stat in sorted(self.stats.values(), key=lambda s: s.cumulative, reverse=True)[:top]:
+            lines.append(
+                f"[PROFILE] {stat.name[:48]:<48} {stat.self_time * 1000:>9.1f} "
+                f"{stat.cumulative * 1000:>9.1f} {stat.memory / 1024:>9.0f}"
+            )
+        if LAZY_LOAD_TIMES:
+            loaded = ", ".join(f"{name} {sec * 1000:.0f}ms" for name, sec in LAZY_LOAD_TIMES.items())
+            lines.append(f"[PROFILE] Lazy modules loaded so far: {loaded}")
+        return "\n".join(lines)
+
+
+_profiler: Optional[ImportProfiler] = None
+
+
+def install() -> Optional[ImportProfiler]:
+    """Start profiling imports if PROFILE_STARTUP is set"""
+    global _profiler
+    if _profiler is not None or os.getenv("PROFILE_STARTUP", "0") not in ("1", "true", "yes"):
+        return _profiler
+    tracemalloc.start()
+    _profiler = ImportProfiler()
+    sys.meta_path.insert(0, _profiler)
+    return _profiler
+
+
+def finish_and_report(top: int = 20) -> Optional[str]:
+    """Stop profiling and return the report (None when profiling is off)"""
+    if _profiler is None:
+        return None
+    _profiler.finish()
+    return _profiler.report(top)
@@ -0,0 +1,78 @@
+"""
+🔥 Daily streak service
+
+Keeps the set of users who already checked in today (Tashkent time). Only a
+user's first event of the day reaches the database; every later event is a
+set lookup. The set is dropped when the day changes and rebuilt from
+``users_enhanced.last_streak_date`` on startup.
+"""
+
+import asyncio
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Set
+
+from config import db
+from src.utils.gamification import GamificationEngine, TIMEZONE
+
+
+class StreakService:
+    def __init__(self):
+        self._day: date = datetime.now(TIMEZONE).date()
+        self._checked: Set[int] = set()
+
+    def _today(self) -> date:
+        today = datetime.now(TIMEZONE).date()
+        if today != self._day:
+            # Yarim tun: yangi kun, yangi to'plam
+            self._day = today
+            self._checked = set()
+        return today
+
+    def checked_in(self, user_id: int) -> bool:
+        """True if the user already checked in today"""
+        self._today()
+        return user_id in self._checked
+
+    async def check_in(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Record the user's daily check-in
+
+        Returns:
+            GamificationEngine.check_streak result on the first event of the
+            day, None when the user already checked in today
+        """
+        today = self._today()
+        if user_id in self._checked:
+            return None
+
+        # await dan oldin qo'shiladi - parallel update'lar DB ga ikki marta bormasin
+        self._checked.add(user_id)
+        result = await asyncio.to_thread(GamificationEngine.check_streak, user_id, today)
+        if not result.get("success"):
+            self._checked.discard(user_id)
+        return result
+
+    async def load(self) -> int:
+        """Rebuild today's check-in set from the database"""
+        today = self._today()
+
+        def fetch():
+            cur = db.cursor()
+            cur.execute(
+                "SELECT user_id FROM users_enhanced WHERE last_streak_date = %s",
+                (today.isoformat(),)
+            )
+            return [row[0] for row in cur.fetchall()]
+
+        user_ids = await asyncio.to_thread(fetch)
+        if today == self._day:
+            self._checked.update(user_ids)
+        return len(user_ids)
+
+    @property
+    def checked_in_today(self) -> int:
+        self._today()
+        return len(self._checked)
+
+
+streak_service = StreakService()
@@ -5,6 +5,8 @@ from typing import List, Tuple, Optional
 from datetime import datetime
 from config import sql, db
 
+MAX_HISTORY_PER_USER = 100  # Max stored translations
+
 
 def save_translation_history(
     user_id: int,
@@ -49,18 +51,7 @@ def save_translation_history(
         
         db.commit()
         
-        # Eski tarixni tozalash (oxirgi 100tadan ko'pini o'chirish)
-        sql.execute("""
-            DELETE FROM translation_history
-            WHERE id IN (
-                SELECT id FROM translation_history
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                OFFSET 100
-            )
-        """, (user_id,))
-        
-        db.commit()
+        # Eski tarix har tarjimada emas, tungi trim_history() job'ida tozalanadi
         
     except Exception as e:
         print(f"[ERROR] Failed to save translation history: {e}")
@@ -241,3 +232,29 @@ def get_user_translation_stats(user_id: int) -> dict:
     except Exception as e:
         print(f"[ERROR] Failed to get stats: {e}")
         return {"total": 0, "today": 0, "most_used": None}
+
+
+def trim_history(max_per_user: int = MAX_HISTORY_PER_USER) -> int:
+    """
+    Har bir foydalanuvchining eng yangi ``max_per_user`` ta tarjimasidan
+    eskilarini o'chirish (rejalashtirilgan job, bitta statement)
+    
+    Returns:
+        O'chirilgan qatorlar soni
+    """
+    cur = db.cursor()
+    cur.execute("""
+        DELETE FROM translation_history
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM translation_history
+            ) ranked
+            WHERE rn > %s
+        )
+    """, (max_per_user,))
+    deleted = cur.rowcount
+    db.commit()
+    return deleted
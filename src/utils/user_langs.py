@@ -0,0 +1,106 @@
+"""
+🌐 User translation languages with an in-process cache
+
+Every translated message and every language keyboard render needs the
+user's (from_lang, to_lang) pair. The pair is read from `user_languages`
+once and then served from memory; updates are single upserts whose
+RETURNING row refreshes the cache.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import sql, db
+from src.utils.metrics import cache_hit
+
+CACHE_SIZE = 50_000
+
+_MISSING = object()
+# user_id -> (from_lang, to_lang) yoki None (qator yo'q)
+_cache: "OrderedDict[int, Optional[Tuple[Optional[str], Optional[str]]]]" = OrderedDict()
+
+
+def _remember(user_id: int, langs) -> None:
+    _cache[user_id] = langs
+    _cache.move_to_end(user_id)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def get_user_langs(user_id: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    Get user's (from_lang, to_lang)
+
+    Returns:
+        Tuple or None if the user has not selected languages yet
+    """
+    langs = _cache.get(user_id, _MISSING)
+    cache_hit("user_langs", langs is not _MISSING)
+    if langs is not _MISSING:
+        _cache.move_to_end(user_id)
+        return langs
+
+    sql.execute("SELECT from_lang, to_lang FROM user_languages WHERE user_id=%s", (user_id,))
+    row = sql.fetchone()
+    langs = (row[0], row[1]) if row else None
+    _remember(user_id, langs)
+    return langs
+
+
+def set_user_lang(user_id: int, lang_code: str, direction: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    Set one side of the user's language pair with a single upsert
+
+    Args:
+        direction: "from" or "to"
+
+    Returns:
+        Updated (from_lang, to_lang)
+    """
+    field = "from_lang" if direction == "from" else "to_lang"
+    from_lang = lang_code if direction == "from" else None
+    to_lang = lang_code if direction == "to" else None
+    sql.execute(f"""
+        INSERT INTO user_languages (user_id, from_lang, to_lang)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (user_id) DO UPDATE SET {field} = EXCLUDED.{field}
+        RETURNING from_lang, to_lang
+    """, (user_id, from_lang, to_lang))
+    row = sql.fetchone()
+    db.commit()
+
+    if row:
+        langs = (row[0], row[1])
+    else:
+        # RETURNING qo'llab-quvvatlanmasa (SQLite) - keshdan hisoblash
+        cached = _cache.get(user_id, _MISSING)
+        if cached is _MISSING:
+            _cache.pop(user_id, None)
+            return get_user_langs(user_id)
+        old_from, old_to = cached or (None, None)
+        langs = (lang_code, old_to) if direction == "from" else (old_from, lang_code)
+
+    _remember(user_id, langs)
+    return langs
+
+
+def swap_user_langs(user_id: int) -> bool:
+    """Swap from/to languages in one statement. Returns False if nothing to swap."""
+    sql.execute(
+        "UPDATE user_languages SET from_lang=to_lang, to_lang=from_lang WHERE user_id=%s",
+        (user_id,)
+    )
+    swapped = sql.rowcount > 0
+    db.commit()
+
+    cached = _cache.get(user_id, _MISSING)
+    if swapped and cached not in (_MISSING, None):
+        _remember(user_id, (cached[1], cached[0]))
+    else:
+        _cache.pop(user_id, None)
+    return swapped
+
+
+def invalidate_user_langs(user_id: int) -> None:
+    """Drop cached pair (e.g. after a direct SQL update elsewhere)"""
+    _cache.pop(user_id, None)
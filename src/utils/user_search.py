@@ -0,0 +1,210 @@
+"""
+🔎 Admin user search
+
+Searches ``users`` / ``users_enhanced`` by id prefix, username and
+first/last name without scanning the table (indexes: m0003_user_search).
+
+Results come in ranked buckets, each read in index order:
+
+- digits: id prefix, as ``user_id`` ranges on the unique index
+  (``123`` -> [123, 124), [1230, 1240), ...) - the exact id comes first
+- username, then first name, then last name starts with the query:
+  ranges on ``(lower(column), user_id)`` btree indexes, so an exact match
+  sorts first and a common prefix stops after one page
+- the query appears anywhere (3+ characters): pg_trgm GIN index on
+  Postgres, FTS5 trigram table on SQLite
+
+Buckets are queried one after another until the page is full, so the
+substring bucket - the only one that has to skip rows already shown by the
+prefix buckets - only runs when the prefixes are nearly exhausted. Paging
+is keyset: the cursor is ``(bucket, key, user_id)`` of the last row shown.
+"""
+
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+from config import db, DB_TYPE
+
+SEARCH_TABLES = ("users", "users_enhanced")
+NAME_COLUMNS = ("username", "first_name", "last_name")
+PAGE_SIZE = 5
+MIN_CONTAINS_LENGTH = 3
+# Telegram ID'lari 2^52 dan kichik (16 xona)
+MAX_ID_DIGITS = 16
+# Prefiks diapazonining yuqori chegarasi: "abc" <= x < "abc\U0010ffff"
+_PREFIX_END = "\U0010ffff"
+
+Cursor = Tuple[int, object, int]  # (bucket, key, user_id)
+
+_fts_tables: dict = {}
+
+
+def search_text_sql(row: str = "") -> str:
+    """``username first_name last_name`` in lower case (``row`` - e.g. ``new.`` in triggers)"""
+    return "lower(" + " || ' ' || ".join(f"coalesce({row}{column}, '')" for column in NAME_COLUMNS) + ")"
+
+
+# GIN indeks ham aynan shu ifoda ustida (m0003_user_search)
+SEARCH_TEXT = search_text_sql()
+
+
+def key_sql(column: str) -> str:
+    """Indexed sort key of a name column (byte order, so prefixes are ranges)"""
+    if DB_TYPE == "postgres":
+        return f'lower({column}) COLLATE "C"'
+    return f"lower({column})"
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_search"
+
+
+def _has_fts(table: str) -> bool:
+    """SQLite: is the FTS5 table there (SQLite without FTS5 trigram falls back to a scan)"""
+    if table not in _fts_tables:
+        cur = db.cursor()
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (fts_table(table),))
+        _fts_tables[table] = cur.fetchone() is not None
+    return _fts_tables[table]
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# =====================================================
+# 📌 Bucket so'rovlari
+# =====================================================
+
+def _starts_with(column: str) -> str:
+    key = key_sql(column)
+    return f"({key} >= lower(%s) AND {key} < lower(%s))"
+
+
+def _not_shown(columns: Sequence[str], query: str) -> Tuple[str, list]:
+    """Skip rows an earlier prefix bucket already returned"""
+    if not columns:
+        return "", []
+    condition = " OR ".join(_starts_with(column) for column in columns)
+    return f" AND NOT coalesce({condition}, FALSE)", [query, query + _PREFIX_END] * len(columns)
+
+
+def _id_statement(table: str, select: str, query: str, after: Optional[Cursor], limit: int):
+    if query.startswith("0") or len(query) > MAX_ID_DIGITS:
+        return None, []
+    prefix = int(query)
+    parts, params = [], []
+    for k in range(MAX_ID_DIGITS - len(query) + 1):
+        low, high = prefix * 10 ** k, (prefix + 1) * 10 ** k
+        if after is not None:
+            if high <= after[2]:
+                continue
+            low = max(low, after[2] + 1)
+        parts.append(f"SELECT * FROM (SELECT {select}, user_id AS hit_key, user_id AS hit_id FROM {table} "
+                     f"WHERE user_id >= %s AND user_id < %s ORDER BY user_id LIMIT %s) AS r{len(parts)}")
+        params += [low, high, limit]
+    if not parts:
+        return None, []
+    # Diapazonlar o'sish tartibida, shuning uchun UNION ALL tartibi - user_id tartibi
+    return f"SELECT * FROM ({' UNION ALL '.join(parts)}) AS hits ORDER BY hit_id LIMIT %s", params + [limit]
+
+
+def _prefix_statement(table: str, select: str, query: str, bucket: int, after: Optional[Cursor], limit: int):
+    column = NAME_COLUMNS[bucket]
+    key = key_sql(column)
+    skip, skip_params = _not_shown(NAME_COLUMNS[:bucket], query)
+    statement = (f"SELECT {select}, {key} AS hit_key, user_id AS hit_id FROM {table} "
+                 f"WHERE {_starts_with(column)}{skip}")
+    params = [query, query + _PREFIX_END] + skip_params
+    if after is not None and after[0] == bucket:
+        statement += f" AND ({key}, user_id) > (%s, %s)"
+        params += [after[1], after[2]]
+    return statement + f" ORDER BY {key}, user_id LIMIT %s", params + [limit]
+
+
+def _contains_statement(table: str, select: str, query: str, bucket: int, after: Optional[Cursor], limit: int):
+    skip, skip_params = _not_shown(NAME_COLUMNS, query)
+    if DB_TYPE != "postgres" and _has_fts(table):
+        # FTS5 rowid (= user_id) tartibida o'qiydi va LIMIT da to'xtaydi
+        search = fts_table(table)
+        statement = (f"SELECT {select}, {search}.rowid AS hit_key, {search}.rowid AS hit_id "
+                     f"FROM {search} JOIN {table} ON {table}.user_id = {search}.rowid "
+                     f"WHERE {search} MATCH %s{skip}")
+        params = ['"' + query.replace('"', '""') + '"'] + skip_params
+        order = f"{search}.rowid"
+    else:
+        # Postgres'da '\\' standart escape belgisi, SQLite'da yo'q
+        escape = "" if DB_TYPE == "postgres" else " ESCAPE '\\'"
+        statement = (f"SELECT {select}, user_id AS hit_key, user_id AS hit_id FROM {table} "
+                     f"WHERE {SEARCH_TEXT} LIKE lower(%s){escape}{skip}")
+        params = ["%" + _escape_like(query) + "%"] + skip_params
+        order = "user_id"
+    if after is not None and after[0] == bucket:
+        statement += f" AND {order} > %s"
+        params.append(after[2])
+    return statement + f" ORDER BY {order} LIMIT %s", params + [limit]
+
+
+def bucket_statements(table: str, columns: Sequence[str], query: str, after: Optional[Cursor] = None):
+    """
+    Yields ``(bucket, build)`` in rank order, from the cursor's bucket on;
+    ``build(limit)`` returns ``(statement or None, params)``
+    """
+    if table not in SEARCH_TABLES:
+        raise ValueError(f"Unknown search table: {table}")
+    select = ", ".join(f"{table}.{column}" for column in columns)
+    first = after[0] if after is not None else 0
+
+    if query.isdigit():
+        if first == 0:
+            yield 0, lambda limit: _id_statement(table, select, query, after, limit)
+        return
+
+    for bucket in range(first, len(NAME_COLUMNS)):
+        yield bucket, lambda limit, b=bucket: _prefix_statement(table, select, query, b, after, limit)
+    bucket = len(NAME_COLUMNS)
+    if len(query) >= MIN_CONTAINS_LENGTH and first <= bucket:
+        yield bucket, lambda limit: _contains_statement(table, select, query, bucket, after, limit)
+
+
+# =====================================================
+# 📌 Qidiruv
+# =====================================================
+
+def normalize_query(text: Optional[str]) -> str:
+    return (text or "").strip().lstrip("@").strip()
+
+
+async def search_users(query: str, columns: Sequence[str], table: str = "users", limit: int = PAGE_SIZE,
+                       after: Optional[Cursor] = None) -> Tuple[List[tuple], Optional[Cursor]]:
+    """
+    One page of search results
+
+    Returns:
+        (rows with the requested ``columns``, cursor of the next page or None)
+    """
+    query = normalize_query(query)
+    if not query:
+        return [], None
+
+    def run():
+        cur = db.cursor()
+        found = []  # (bucket, row)
+        for bucket, build in bucket_statements(table, columns, query, after):
+            # Bitta ortiqcha qator - keyingi sahifa bor-yo'qligini bilish uchun
+            statement, params = build(limit + 1 - len(found))
+            if statement is None:
+                continue
+            cur.execute(statement, tuple(params))
+            found += [(bucket, row) for row in cur.fetchall()]
+            if len(found) > limit:
+                break
+        return found
+
+    found = await asyncio.to_thread(run)
+    next_after = None
+    if len(found) > limit:
+        found = found[:limit]
+        bucket, row = found[-1]
+        next_after = (bucket, row[-2], row[-1])
+    return [tuple(row[:-2]) for _, row in found], next_after
@@ -0,0 +1,242 @@
+"""
+💎 XP ledger
+
+Awards are appended to an in-memory queue (coalesced per user) and applied
+in batches by a background task. Each batch is one atomic upsert
+(``experience_points = experience_points + delta ... RETURNING``), so
+concurrent awards can no longer overwrite each other, and the new level is
+computed in the same statement. Level-ups are detected from the returned
+totals and announced to the user.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import bot, db, DB_TYPE
+from src.utils.gamification import GamificationEngine
+
+XP_FLUSH_SECONDS = 5
+WRITE_BATCH_SIZE = 500
+
+LEVEL_UP_TEXT = (
+    "🎉 <b>Level up!</b>\n"
+    "Siz {level}-levelga ko'tarildingiz!\n"
+    "💎 Jami XP: {total_xp}"
+)
+
+
+def _level_sql(xp_expr: str) -> str:
+    """CASE expression equal to GamificationEngine.calculate_level(xp)"""
+    thresholds = GamificationEngine.LEVEL_THRESHOLDS
+    branches = " ".join(
+        f"WHEN {xp_expr} >= {threshold} THEN {level}"
+        for level, threshold in reversed(list(enumerate(thresholds, 1)))
+        if level > 1
+    )
+    return f"CASE {branches} ELSE 1 END"
+
+
+_NEW_XP = "users_enhanced.experience_points + EXCLUDED.experience_points"
+
+# users_enhanced: qator yo'q bo'lsa yaratiladi, bo'lsa XP atomik qo'shiladi
+_UPSERT_USERS = """
+    INSERT INTO users_enhanced (user_id, language_code, created_at, last_active_at, experience_points, user_level)
+    VALUES {values}
+    ON CONFLICT (user_id) DO UPDATE
+        SET experience_points = """ + _NEW_XP + """,
+            user_level = """ + _level_sql(_NEW_XP) + """,
+            updated_at = NOW()
+"""
+
+_UPSERT_LEADERBOARD = """
+    INSERT INTO leaderboard (user_id, total_xp, last_updated)
+    {source}
+    ON CONFLICT (user_id) DO UPDATE
+        SET total_xp = EXCLUDED.total_xp,
+            last_updated = NOW()
+"""
+
+_USER_VALUES = "(%s, 'uz', NOW(), NOW(), %s, %s)"
+
+
+@dataclass
+class LevelUp:
+    user_id: int
+    old_level: int
+    new_level: int
+    total_xp: int
+
+
+def _chunks(items: list, size: int = WRITE_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _supports_returning() -> bool:
+    if DB_TYPE == "postgres":
+        return True
+    from src.db.sqlite_backend import NATIVE_RETURNING
+    return NATIVE_RETURNING
+
+
+class XPLedger:
+    def __init__(self, flush_seconds: float = XP_FLUSH_SECONDS, notify: bool = True):
+        self.flush_seconds = flush_seconds
+        self.notify = notify
+        # user_id -> hali yozilmagan XP (bir nechta mukofot qo'shilib boradi)
+        self._pending: Dict[int, int] = {}
+        # award() handler'lardan ham, to_thread ishchilaridan ham chaqiriladi
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # =====================================================
+    # 📌 Hot path (DB yo'q)
+    # =====================================================
+
+    def award(self, user_id: int, amount: int, reason: str = "") -> Dict:
+        """Queue an XP award; it is applied on the next flush"""
+        if amount:
+            with self._lock:
+                self._pending[user_id] = self._pending.get(user_id, 0) + amount
+        return {
+            "success": True,
+            "queued": True,
+            "xp_added": amount,
+            "level_up": False,
+            "reason": reason,
+        }
+
+    def pending(self, user_id: int) -> int:
+        """XP awarded to the user but not written yet"""
+        with self._lock:
+            return self._pending.get(user_id, 0)
+
+    # =====================================================
+    # 📌 Batch yozish
+    # =====================================================
+
+    async def flush(self) -> List[LevelUp]:
+        """Apply queued awards; returns the level-ups they caused"""
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return []
+
+            try:
+                totals = await asyncio.to_thread(self._apply, list(batch.items()))
+            except Exception as e:
+                print(f"[XP LEDGER ERROR] Flush failed ({len(batch)} users): {e}")
+                # XP yo'qolmasin - keyingi flush'da qayta urinib ko'riladi
+                with self._lock:
+                    for user_id, amount in batch.items():
+                        self._pending[user_id] = self._pending.get(user_id, 0) + amount
+                return []
+
+        level_ups = []
+        for user_id, total_xp in totals.items():
+            old_level = GamificationEngine.calculate_level(total_xp - batch[user_id])
+            new_level = GamificationEngine.calculate_level(total_xp)
+            if new_level > old_level:
+                level_ups.append(LevelUp(user_id, old_level, new_level, total_xp))
+
+        if level_ups and self.notify:
+            await self._announce(level_ups)
+        return level_ups
+
+    @staticmethod
+    def _apply(awards: List[tuple]) -> Dict[int, int]:
+        """Write awards; returns user_id -> experience_points after the update"""
+        cur = db.cursor()
+        totals = {}
+
+        for batch in _chunks(awards):
+            values = ", ".join([_USER_VALUES] * len(batch))
+            params = [
+                v for user_id, amount in batch
+                for v in (user_id, amount, GamificationEngine.calculate_level(amount))
+            ]
+            upsert_users = _UPSERT_USERS.format(values=values)
+
+            if DB_TYPE == "postgres":
+                # Bitta statement: XP, level va leaderboard birga yoziladi
+                cur.execute(f"""
+                    WITH ue AS (
+                        {upsert_users}
+                        RETURNING user_id, experience_points
+                    ), lb AS (
+                        {_UPSERT_LEADERBOARD.format(source="SELECT user_id, experience_points, NOW() FROM ue")}
+                    )
+                    SELECT user_id, experience_points FROM ue
+                """, params)
+                totals.update(cur.fetchall())
+                continue
+
+            with db.transaction():
+                if _supports_returning():
+                    cur.execute(upsert_users + " RETURNING user_id, experience_points", params)
+                    rows = cur.fetchall()
+                else:
+                    cur.execute(upsert_users, params)
+                    user_ids = [user_id for user_id, _ in batch]
+                    cur.execute(
+                        "SELECT user_id, experience_points FROM users_enhanced "
+                        f"WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})",
+                        user_ids
+                    )
+                    rows = cur.fetchall()
+                cur.execute(
+                    _UPSERT_LEADERBOARD.format(
+                        source="VALUES " + ", ".join(["(%s, %s, NOW())"] * len(rows))
+                    ),
+                    [v for row in rows for v in row]
+                )
+            totals.update(rows)
+
+        return totals
+
+    async def _announce(self, level_ups: List[LevelUp]) -> None:
+        async def send(level_up: LevelUp):
+            try:
+                await bot.send_message(
+                    level_up.user_id,
+                    LEVEL_UP_TEXT.format(level=level_up.new_level, total_xp=level_up.total_xp),
+                    parse_mode="HTML"
+                )
+            except Exception as e:
+                print(f"[XP LEDGER] Level-up message to {level_up.user_id} failed: {e}")
+
+        await asyncio.gather(*(send(level_up) for level_up in level_ups))
+
+    # =====================================================
+    # 📌 Lifecycle
+    # =====================================================
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[XP LEDGER ERROR] {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="xp-ledger")
+
+    async def stop(self) -> None:
+        """Stop the background task and write what is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+xp_ledger = XPLedger()
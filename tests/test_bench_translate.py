@@ -0,0 +1,29 @@
+"""
+Smoke test: the translate benchmark runs end to end on SQLite with the
+same dispatcher wiring as main.py
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+
+def test_bench_translate_runs_on_sqlite(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_translate", "--updates", "10", "--warmup", "2",
+         "--users", "3", "--json"],
+        cwd=ROOT, env=sqlite_env(tmp_path), capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-4000:]
+    assert "ERROR" not in result.stderr, result.stderr[-4000:]
+
+    report = json.loads(result.stdout)
+    assert report["db"] == "sqlite"
+    assert report["errors"] == 0
+    assert report["api_calls_per_update"] >= 1  # har bir matnga tarjima javobi
+    assert "not included" not in report["fast_path"]
@@ -0,0 +1,94 @@
+"""
+Callback data codec: packing, base-62 integers, legacy colon-separated
+buttons and malformed payloads
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from src.keyboards import callback_codec as codec  # noqa: E402
+from src.keyboards.callbacks import (  # noqa: E402
+    BroadcastConfirm, LughatExport, ParallelSeries, ParallelTopic, QuizAnswer, SetLang,
+)
+
+
+@codec.callback_schema("zt")
+@dataclass(frozen=True)
+class _Sample:
+    name: str
+    count: int = 0
+    flag: bool = False
+    note: Optional[str] = None
+
+
+def test_pack_drops_default_and_none_fields():
+    assert SetLang("ignore").pack() == "~sl1:ignore"
+    assert ParallelSeries("en_uz").pack() == "~ps1:en_uz"
+    assert _Sample("a").pack() == "~zt1:a"
+    # O'rtadagi default bo'sh maydon bo'lib qoladi, oxiridagilari tashlanadi
+    assert _Sample("a", flag=True).pack() == "~zt1:a::1"
+    assert _Sample("a", count=62, note="x").pack() == "~zt1:a:10::x"
+
+
+def test_pack_round_trip():
+    for payload in (_Sample("a"), _Sample("a", 5, True, "n"), _Sample("b", note="x"),
+                    QuizAnswer("mashq", 3, 125), BroadcastConfirm(False, "forward")):
+        assert codec.decode(payload.pack()) == payload
+
+
+def test_pack_rejects_separator_in_string():
+    with pytest.raises(codec.CallbackDataError, match="not allowed"):
+        SetLang("from", "a:b").pack()
+
+
+def test_pack_rejects_payload_over_64_bytes():
+    assert len(_Sample("x" * 59).pack()) == codec.MAX_CALLBACK_BYTES
+    with pytest.raises(codec.CallbackDataError, match="limit 64"):
+        _Sample("x" * 60).pack()
+    # Chegara baytlarda, belgilarda emas
+    with pytest.raises(codec.CallbackDataError):
+        _Sample("ў" * 30).pack()
+
+
+@pytest.mark.parametrize("value", [0, 1, 9, 10, 61, 62, 3843, 3844, -1, -62, 10**12, 2**63 - 1])
+def test_base62_round_trip(value):
+    text = codec._int_to_b62(value)
+    assert codec._b62_to_int(text) == value
+    assert codec.SEP not in text
+
+
+def test_base62_digits():
+    assert codec._int_to_b62(61) == "Z"
+    assert codec._int_to_b62(62) == "10"
+    with pytest.raises(ValueError):
+        codec._b62_to_int("")
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("setlang:from:uz", SetLang("from", "uz")),
+    ("setlang:back", SetLang("back")),
+    ("parallel:series:en_uz", ParallelSeries("en_uz", 0)),
+    ("parallel:series:en_uz:2", ParallelSeries("en_uz", 2)),
+    ("parallel:topic:17", ParallelTopic(17)),
+    ("parallel:other", None),
+    ("lughat:export:5", LughatExport(5)),
+    ("lughat:export:5:csv", LughatExport(5, "csv")),
+    ("lughat:open:5", None),
+    ("admin:broadcast:confirm:yes:forward", BroadcastConfirm(True, "forward")),
+    ("admin:broadcast:confirm:no", BroadcastConfirm(False)),
+    ("admin:broadcast:start", None),
+])
+def test_legacy_parsers(data, expected):
+    assert codec.decode(data) == expected
+
+
+@pytest.mark.parametrize("data", [
+    None, "", "~", "~zz9:1", "~pt1", "~pt1:", "~pt1:1:2", "~pt1:!!",
+    "unknown:data", "parallel:topic:abc", "lughat:export:x",
+])
+def test_decode_malformed_returns_none(data):
+    assert codec.decode(data) is None
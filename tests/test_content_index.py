@@ -0,0 +1,43 @@
+"""
+Content index on SQLite: dropping the parallel tables ("qaytatdan") must
+empty the parallel course instead of keeping the stale snapshot
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+REBUILD = """
+import asyncio, json
+from src.db.migration_runner import run_migrations
+from src.handlers.users.lughatlar import content_index
+from src.handlers.users.lughatlar.parallel import create_parallel_tables
+from src.handlers.users.lughatlar.vocabs import db_exec
+
+async def main():
+    await run_migrations()
+    await create_parallel_tables()
+    await db_exec("INSERT INTO parallel_series (code, name, icon, src_lang, trg_lang) "
+                  "VALUES ('test', 'Test', 'x', 'en', 'uz')")
+    before = len((await content_index.rebuild_content_index()).parallel_series)
+    for table in ("parallel_entries", "parallel_topics", "parallel_series"):
+        await db_exec(f"DROP TABLE IF EXISTS {table} CASCADE")
+    dropped = len((await content_index.rebuild_content_index()).parallel_series)
+    print(json.dumps({"before": before, "dropped": dropped}))
+
+asyncio.run(main())
+"""
+
+
+def test_dropped_parallel_tables_empty_the_index(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", REBUILD], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    assert data["before"] > 0
+    assert data["dropped"] == 0
@@ -0,0 +1,64 @@
+"""
+Cron schedule parsing and next-run arithmetic
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.utils.cron import CronSchedule, _parse_field
+
+
+@pytest.mark.parametrize("spec, low, high, expected", [
+    ("7", 0, 59, {7}),
+    ("*", 1, 12, set(range(1, 13))),
+    ("*/15", 0, 59, {0, 15, 30, 45}),
+    ("5/20", 0, 59, {5, 25, 45}),  # a/step - a dan oxirigacha
+    ("10-20", 0, 23, set(range(10, 21))),
+    ("10-20/5", 0, 59, {10, 15, 20}),
+    ("1,3-4,*/10", 0, 30, {0, 1, 3, 4, 10, 20, 30}),
+])
+def test_parse_field(spec, low, high, expected):
+    assert _parse_field(spec, low, high) == expected
+
+
+@pytest.mark.parametrize("spec", ["60", "5-3", "0-60", "*/0", "x", ""])
+def test_parse_field_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        _parse_field(spec, 0, 59)
+
+
+def test_schedule_rejects_wrong_field_count():
+    with pytest.raises(ValueError, match="5 fields"):
+        CronSchedule("0 0 * *")
+
+
+def test_sunday_is_zero_and_seven():
+    assert CronSchedule("0 0 * * 7").weekdays == CronSchedule("0 0 * * 0").weekdays == {0}
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    # Qat'iy "keyin": aynan shu daqiqa keyingi kunga o'tadi
+    ("30 3 * * *", datetime(2026, 10, 19, 3, 29, 59), datetime(2026, 10, 19, 3, 30)),
+    ("30 3 * * *", datetime(2026, 10, 19, 3, 30), datetime(2026, 10, 20, 3, 30)),
+    ("*/15 * * * *", datetime(2026, 10, 19, 23, 50), datetime(2026, 10, 20, 0, 0)),
+    ("0 9-17/4 * * *", datetime(2026, 10, 19, 10, 0), datetime(2026, 10, 19, 13, 0)),
+    # Oy va yil almashinuvi
+    ("0 0 1 * *", datetime(2026, 1, 31, 12, 0), datetime(2026, 2, 1, 0, 0)),
+    ("0 0 1 * *", datetime(2026, 12, 15, 0, 0), datetime(2027, 1, 1, 0, 0)),
+    ("0 12 31 * *", datetime(2026, 4, 1, 0, 0), datetime(2026, 5, 31, 12, 0)),
+    ("0 0 29 2 *", datetime(2026, 3, 1, 0, 0), datetime(2028, 2, 29, 0, 0)),
+    # Faqat bittasi berilgan: o'sha maydon hal qiladi
+    ("0 9 13 * *", datetime(2026, 10, 19, 0, 0), datetime(2026, 11, 13, 9, 0)),
+    ("0 9 * * 1", datetime(2026, 10, 19, 9, 0), datetime(2026, 10, 26, 9, 0)),
+    # Ikkalasi berilgan: 13-sana YOKI juma
+    ("0 9 13 * 5", datetime(2026, 7, 11, 0, 0), datetime(2026, 7, 13, 9, 0)),  # dushanba, 13
+    ("0 9 13 * 5", datetime(2026, 7, 13, 10, 0), datetime(2026, 7, 17, 9, 0)),  # juma
+])
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+def test_never_firing_expression():
+    with pytest.raises(ValueError, match="never fires"):
+        CronSchedule("0 0 31 2 *").next_after(datetime(2026, 1, 1))
@@ -0,0 +1,42 @@
+"""
+Leaderboard ranking job on SQLite: one set-based UPDATE, highest_rank only
+improves
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+RANK = """
+import asyncio, json
+from config import db
+from src.db.migration_runner import run_migrations
+from src.utils.gamification import LeaderboardManager
+
+async def main():
+    await run_migrations()
+    db.cursor().executemany(
+        "INSERT INTO leaderboard (user_id, total_xp, highest_rank) VALUES (%s, %s, %s)",
+        [(1, 50, None), (2, 300, None), (3, 120, 1), (4, 120, 9)])
+    db.commit()
+    result = await asyncio.to_thread(LeaderboardManager.update_rankings)
+    cur = db.cursor()
+    cur.execute("SELECT user_id, current_rank, highest_rank FROM leaderboard ORDER BY user_id")
+    print(json.dumps({"result": result, "rows": cur.fetchall()}))
+
+asyncio.run(main())
+"""
+
+
+def test_update_rankings_on_sqlite(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", RANK], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    assert data["result"] == {"success": True}
+    assert data["rows"] == [[1, 4, 4], [2, 1, 1], [3, 2, 1], [4, 3, 3]]
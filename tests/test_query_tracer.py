@@ -0,0 +1,26 @@
+"""
+Query tracer rows: SQLite gives no rowcount for SELECT, so fetched rows
+are counted instead
+"""
+
+import sqlite3
+
+from src.db import query_tracer
+
+
+def test_sqlite_select_rows_are_counted_on_fetch():
+    query_tracer.reset()
+    conn = sqlite3.connect(":memory:", factory=query_tracer.TracingSQLiteConnection)
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE t (x INTEGER)")
+    cur.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(7)])
+    cur.execute("SELECT x FROM t")
+    cur.fetchall()
+    cur.execute("SELECT x FROM t WHERE x < ?", (3,))
+    cur.fetchone()
+    cur.fetchmany(5)
+
+    rows = {s.fingerprint: s.rows for s in query_tracer.top_queries(10, "rows")}
+    assert rows["INSERT INTO t VALUES (?)"] == 7
+    assert rows["SELECT x FROM t"] == 7
+    assert rows["SELECT x FROM t WHERE x < ?"] == 3
@@ -0,0 +1,55 @@
+"""
+Quiz matrix: small vocabularies (fewer than 4 distinct translations) must not
+hang, and a question never offers the same option or its own translation
+twice
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+QUIZ = """
+import json, random
+from src.handlers.users.lughatlar.quiz import build_quiz
+
+translations = {
+    "single": ["a"],
+    "same": ["a", "a", "a"],
+    "two": ["a", "b", "a"],
+    "three": ["a", "b", "c", "b"],
+    "many": ["a", "b", "c", "a", "d", "e", "b", "f", "g", "a"],
+}
+out = {}
+for name, trg in translations.items():
+    words = [{"word_src": f"w{i}", "word_trg": t} for i, t in enumerate(trg)]
+    out[name] = {"trg": trg, "quizzes": [build_quiz(words, rng=random.Random(seed)) for seed in range(25)]}
+out["repeat"] = build_quiz(words, rng=random.Random(7)) == build_quiz(words, rng=random.Random(7))
+print(json.dumps(out))
+"""
+
+
+def test_build_quiz_options(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", QUIZ], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    assert data.pop("repeat") is True
+
+    for name, case in data.items():
+        trg = case["trg"]
+        expected = min(4, len(set(trg)))
+        for quiz in case["quizzes"]:
+            assert len(quiz) == len(trg), name
+            for i, row in enumerate(quiz):
+                assert i in row, name
+                assert len(row) == expected, name
+                assert len(set(row)) == len(row), name
+                # Chalg'ituvchilar - boshqa tarjimali, o'zaro ham takrorlanmaydi
+                distractors = [trg[option] for option in row if option != i]
+                assert trg[i] not in distractors, name
+                assert len(set(distractors)) == len(distractors), name
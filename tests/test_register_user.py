@@ -0,0 +1,67 @@
+"""
+RegisterUserMiddleware on SQLite: the first update writes the users row and
+the new-user profile rows, a repeat update from the same user hits the cache
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+REGISTER = """
+import asyncio, json
+from datetime import datetime
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+from config import sql
+from src.db.migration_runner import run_migrations
+from src.middlewares import middleware as mw
+
+calls = []
+register_user = mw.register_user
+mw.register_user = lambda *args: calls.append(args[0]) or register_user(*args)
+
+async def handler(event, data):
+    return "ok"
+
+async def main():
+    await run_migrations()
+    user = User(id=7, is_bot=False, first_name="Ali", language_code="uz")
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=7, type="private"),
+                      from_user=user, text="salom")
+    callback = CallbackQuery(id="1", from_user=user, chat_instance="x", data="noop")
+
+    middleware = mw.RegisterUserMiddleware()
+    results = [
+        await middleware(handler, Update(update_id=1, message=message), {}),
+        await middleware(handler, Update(update_id=2, callback_query=callback), {}),
+        await middleware(handler, Update(update_id=3, callback_query=callback.model_copy(
+            update={"from_user": User(id=7, is_bot=False, first_name="Vali", language_code="uz")})), {}),
+    ]
+
+    rows = {}
+    for table in ("users", "accounts", "leaderboard", "user_preferences", "exercise_type_stats"):
+        sql.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = 7")
+        rows[table] = sql.fetchone()[0]
+    sql.execute("SELECT first_name FROM users WHERE user_id = 7")
+    print(json.dumps({"results": results, "calls": calls, "rows": rows, "name": sql.fetchone()[0]}))
+
+asyncio.run(main())
+"""
+
+
+def test_known_user_skips_database(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", REGISTER], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert data["results"] == ["ok", "ok", "ok"]
+    # Ikkinchi update keshdan, uchinchisida ism o'zgargan - qayta yoziladi
+    assert data["calls"] == [7, 7]
+    assert data["rows"] == {"users": 1, "accounts": 1, "leaderboard": 1,
+                            "user_preferences": 1, "exercise_type_stats": 4}
+    assert data["name"] == "Vali"
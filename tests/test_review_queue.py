@@ -0,0 +1,64 @@
+"""
+Spaced repetition queue on SQLite: a word is graded once per practice
+session, and answers left in FSM data are written when the session is
+abandoned
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+REVIEW = """
+import asyncio, json
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from config import db
+from src.db.migration_runner import run_migrations
+from src.handlers.users.lughatlar import review_queue
+
+async def main():
+    await run_migrations()
+    cur = db.cursor()
+    cur.execute("INSERT INTO vocab_books (user_id, name) VALUES (7, 'b')")
+    cur.executemany("INSERT INTO vocab_entries (book_id, word_src, word_trg) VALUES (1, %s, %s)",
+                    [(f"w{i}", f"t{i}") for i in range(5)])
+    db.commit()
+
+    words = await review_queue.get_due_words(7, 1)
+    data = {"book_id": 1, "pending_reviews": {}, "graded_entries": []}
+    # Uch tsikl: birinchisida to'g'ri, keyingilarida ham to'g'ri / xato
+    for correct in (True, True, False):
+        for word in words:
+            review_queue.record_answer(data, word, correct)
+
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=7, user_id=7))
+    await state.update_data(**data)
+    # Foydalanuvchi "finish" bosmay kabinetga qaytdi
+    await review_queue.flush_session_reviews(7, state)
+
+    cur.execute("SELECT interval_days, repetitions, lapses FROM vocab_review_queue ORDER BY entry_id")
+    print(json.dumps({
+        "words": len(words),
+        "queue": cur.fetchall(),
+        "left": (await state.get_data())["pending_reviews"],
+    }))
+
+asyncio.run(main())
+"""
+
+
+def test_word_graded_once_per_session_and_flushed_on_exit(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", REVIEW], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert data["words"] == 5
+    assert data["queue"] == [[1, 1, 0]] * 5
+    assert data["left"] == {}
@@ -0,0 +1,56 @@
+"""
+Scheduled jobs on SQLite: a leaderboard ranking run that reports failure is
+recorded as an error, not "ok"
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+RANKINGS = """
+import asyncio, json
+from datetime import datetime
+from config import sql
+from src.db.migration_runner import run_migrations
+from src.utils.gamification import LeaderboardManager
+from src.utils.metrics import JOB_RUNS
+from src.utils.scheduled_jobs import register_default_jobs
+from src.utils.scheduler import JobScheduler
+
+async def main():
+    await run_migrations()
+    scheduler = JobScheduler()
+    register_default_jobs(scheduler)
+    job = scheduler.jobs["leaderboard_rankings"]
+
+    statuses = [await scheduler.run_job(job, datetime(2026, 1, 1, 3, 30))]
+    LeaderboardManager.update_rankings = staticmethod(lambda: {"success": False, "error": "boom"})
+    statuses.append(await scheduler.run_job(job, datetime(2026, 1, 2, 3, 30)))
+
+    sql.execute("SELECT last_status FROM scheduler_jobs WHERE job_name = 'leaderboard_rankings'")
+    print(json.dumps({
+        "statuses": statuses,
+        "last_status": job.last_status,
+        "row": sql.fetchone()[0],
+        "runs": [JOB_RUNS.value(job.name, "ok"), JOB_RUNS.value(job.name, "error")],
+    }))
+
+asyncio.run(main())
+"""
+
+
+def test_failed_rankings_update_is_an_error(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", RANKINGS], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert data["statuses"] == ["ok", "error"]
+    assert data["last_status"] == "error"
+    assert data["row"] == "error"
+    assert data["runs"] == [1, 1]
@@ -0,0 +1,94 @@
+"""
+Session tracker flush on SQLite: a row the database rejects (users FK) must
+not block the rest of the batch, and is dropped after MAX_WRITE_ATTEMPTS
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+FLUSH = """
+import asyncio, json
+from datetime import timedelta
+from config import sql, db
+from src.db.migration_runner import run_migrations
+from src.utils import session_tracker as st
+
+async def main():
+    await run_migrations()
+    db.cursor().executemany("INSERT INTO users (user_id, first_name) VALUES (%s, %s)", [(1, "a"), (2, "b")])
+    db.commit()
+
+    tracker = st.SessionTracker()
+    now = st.datetime.now(st.TIMEZONE)
+    for user_id in (1, 404, 2):  # 404 - users'da yo'q (FK)
+        tracker.touch(user_id, "message", now)
+    await tracker.flush(now)
+    opened = {s.user_id: s.id for s in tracker._open.values()}
+
+    later = now + timedelta(minutes=st.SESSION_IDLE_MINUTES + 1)
+    attempts = []
+    for i in range(st.MAX_WRITE_ATTEMPTS + 1):
+        await tracker.flush(later + timedelta(seconds=i))
+        attempts.append(len(tracker._closed))
+
+    sql.execute("SELECT user_id, end_reason FROM user_sessions ORDER BY user_id")
+    print(json.dumps({"opened": opened, "attempts": attempts, "rows": sql.fetchall()}))
+
+asyncio.run(main())
+"""
+
+
+def test_rejected_session_does_not_block_batch(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", FLUSH], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert data["opened"]["1"] is not None and data["opened"]["2"] is not None
+    assert data["opened"]["404"] is None
+    # 404 qayta navbatga qo'yiladi, N urinishdan keyin tashlanadi
+    assert data["attempts"][-1] == 0
+    assert data["rows"] == [[1, "idle"], [2, "idle"]]
+
+
+COUNTERS = """
+import asyncio, json
+from datetime import timedelta
+from config import sql, db
+from src.db.migration_runner import run_migrations
+from src.utils import session_tracker as st
+
+async def main():
+    await run_migrations()
+    db.cursor().execute("INSERT INTO users (user_id, first_name) VALUES (1, 'a')")
+    db.commit()
+
+    tracker = st.SessionTracker()
+    now = st.datetime.now(st.TIMEZONE)
+    tracker.touch(1, "message", now)
+    tracker.touch(1, "callback_query", now)
+    tracker.note(1, "exercises")
+    tracker.note(1, "exercises")
+    tracker.note(1, "translations")
+    tracker.note(1, "unknown")
+    await tracker.flush(now + timedelta(minutes=st.SESSION_IDLE_MINUTES + 1))
+
+    sql.execute("SELECT messages_count, translations_count, exercises_count FROM user_sessions")
+    print(json.dumps(sql.fetchall()))
+
+asyncio.run(main())
+"""
+
+
+def test_activity_counters_are_written(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run([sys.executable, "-c", COUNTERS], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == [[1, 1, 2]]
@@ -0,0 +1,66 @@
+"""
+Every migration must apply to an empty SQLite file (DBTYPE=sqlite is what
+the benchmarks and single-node deployments run on)
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.db.sqlite_backend import split_script, translate_sql
+
+ROOT = Path(__file__).resolve().parent.parent
+
+RUN_MIGRATIONS = """
+import asyncio
+from src.db.migration_runner import pending_migrations, run_migrations
+asyncio.run(run_migrations())
+pending, changed = pending_migrations()
+assert not pending and not changed, (pending, changed)
+"""
+
+
+def sqlite_env(tmp_path):
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "123456:TEST-OFFLINE-TOKEN",
+        "DBTYPE": "sqlite",
+        "DB_NAME": str(tmp_path / "test.db"),
+        "METRICS_PORT": "0",
+        "ADMINS_ID": "1",
+    })
+    return env
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("created_at TIMESTAMP DEFAULT now\n   (\n   )", "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+    ("WHERE t > NOW ( ) - INTERVAL '7 days'", "WHERE t > datetime('now', '-7 days')"),
+    ("SELECT GREATEST (a, b), LEAST\n(a, b)", "SELECT MAX(a, b), MIN(a, b)"),
+    ("DROP TABLE IF EXISTS parallel_topics CASCADE", "DROP TABLE IF EXISTS parallel_topics"),
+])
+def test_dialect_rules_tolerate_whitespace(query, expected):
+    assert translate_sql(query, False)[0] == expected
+
+
+def test_split_script_keeps_literals_and_trigger_bodies():
+    script = ("CREATE TABLE a (x TEXT); INSERT INTO a VALUES ('1;2');\n"
+              "CREATE TRIGGER t AFTER INSERT ON a BEGIN DELETE FROM a; END;")
+    assert len(split_script(script)) == 3
+
+
+def test_all_migrations_apply_to_empty_sqlite(tmp_path):
+    pytest.importorskip("aiogram")
+    env = sqlite_env(tmp_path)
+    result = subprocess.run([sys.executable, "-c", RUN_MIGRATIONS], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    # Baseline qadamlari xatoni yutib yuboradi - chiqishda ham xato bo'lmasin
+    assert "ERROR" not in result.stdout, result.stdout
+
+    conn = sqlite3.connect(env["DB_NAME"])
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"users", "users_enhanced", "essential_series", "parallel_topics", "scheduler_jobs"} <= tables
@@ -0,0 +1,29 @@
+"""
+Startup profiler must import and report without the Unix-only ``resource``
+module (Windows)
+"""
+
+import builtins
+
+import pytest
+
+from src.utils import startup_profiler
+
+
+def test_report_without_resource_module(monkeypatch):
+    real_import = builtins.__import__
+
+    def no_resource(name, *args, **kwargs):
+        if name == "resource":
+            raise ImportError("No module named 'resource'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_resource)
+    profiler = startup_profiler.ImportProfiler()
+    assert "peak RSS n/a" in profiler.report()
+
+
+def test_report_with_resource_module():
+    pytest.importorskip("resource")
+    profiler = startup_profiler.ImportProfiler()
+    assert "peak RSS" in profiler.report() and "n/a" not in profiler.report().splitlines()[0]
@@ -0,0 +1,76 @@
+"""
+Timetable group resolution: every group in TIMETABLE_GROUPS is servable,
+and without a group a multi-group bot asks which one
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+RESOLVE = """
+import json
+from src.handlers.users import timetable
+print(json.dumps({
+    "default": timetable.find_timetable_group(),
+    "by_base": timetable.find_timetable_group("57-24"),
+    "by_name": timetable.find_timetable_group(" mmf 2/56-24 mexm "),
+    "unknown": timetable.find_timetable_group("99-99"),
+    "path": timetable.get_timetable_path("57-24"),
+    "menu": timetable.timetable_groups_text(),
+}))
+"""
+
+
+def test_every_configured_group_resolves(tmp_path):
+    pytest.importorskip("aiogram")
+    env = sqlite_env(tmp_path)
+    env["TIMETABLE_GROUPS"] = "MMF 2/56-24 MexM=56-24;MMF 2/57-24=57-24"
+    result = subprocess.run([sys.executable, "-c", RESOLVE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert data["default"] is None
+    assert data["by_base"] == "57-24"
+    assert data["by_name"] == "56-24"
+    assert data["unknown"] is None
+    assert data["path"].endswith("/57-24.svg")
+    assert "/jadval 56-24" in data["menu"] and "/jadval 57-24" in data["menu"]
+
+
+SAVE = """
+import json, os, sys
+from src.handlers.users import timetable
+
+svg_path = os.path.join(sys.argv[1], "56-24.svg")
+svg = ('<svg xmlns="http://www.w3.org/2000/svg"><rect x="300" y="430" height="200" stroke="none" '
+       'style="fill: rgb(255, 255, 255)"/><title>Matematika\\nKarimov\\n101</title></svg>')
+timetable._save_svg(svg_path, svg)
+
+def no_rebuild(*args, **kwargs):
+    raise AssertionError("index rebuilt on read")
+
+timetable.build_timetable_index = no_rebuild
+_, index = timetable.load_timetable_index(svg_path)
+print(json.dumps({
+    "lessons": [lesson["name"] for lesson in index["days"]["Dushanba"]],
+    "files": sorted(os.listdir(sys.argv[1])),
+}))
+"""
+
+
+def test_new_svg_is_indexed_before_it_is_swapped_in(tmp_path):
+    pytest.importorskip("bs4")
+    pytest.importorskip("aiogram")
+    folder = tmp_path / "timetables"
+    folder.mkdir()
+    result = subprocess.run([sys.executable, "-c", SAVE, str(folder)], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    assert data["lessons"] == ["Matematika"]
+    assert data["files"] == ["56-24.json", "56-24.svg"]
@@ -0,0 +1,84 @@
+"""
+Admin user search on SQLite: ranking, keyset paging, trigger sync, and the
+migration's literal DDL matching the search module
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_sqlite_migrations import ROOT, sqlite_env
+
+SEARCH = """
+import asyncio, json
+from config import sql, db
+from src.db.migration_runner import run_migrations
+from src.db.migrations import m0003_user_search as m0003
+from src.utils import user_search
+
+async def main():
+    await run_migrations()
+    rows = [(1000 + i, name, last, username) for i, (name, last, username) in enumerate([
+        ("Ali", "Karimov", "ali"), ("Alisher", None, "sher_ali"), ("Vali", "Aliyev", None),
+        ("Bobur", None, "bobur99"), ("Alijon", "Toshev", "alijon"), ("Aziz", None, "qalin"),
+    ] * 5)]
+    db.cursor().executemany(
+        "INSERT INTO users (user_id, first_name, last_name, username) VALUES (%s, %s, %s, %s)", rows)
+    db.commit()
+
+    pages, after = [], None
+    while True:
+        page, after = await user_search.search_users("ali", ("user_id",), limit=4, after=after)
+        pages.append([row[0] for row in page])
+        if after is None:
+            break
+    ids, _ = await user_search.search_users("100", ("user_id",), limit=50)
+    sql.execute("UPDATE users SET username = 'zzqqyy' WHERE user_id = 1003")
+    renamed, _ = await user_search.search_users("zqqy", ("user_id",))
+    print(json.dumps({
+        "pages": pages,
+        "ids": [row[0] for row in ids],
+        "renamed": [row[0] for row in renamed],
+        "ddl_matches": m0003.SEARCH_TEXT == user_search.SEARCH_TEXT
+                       and m0003.NEW_SEARCH_TEXT == user_search.search_text_sql("new."),
+    }))
+
+asyncio.run(main())
+"""
+
+
+def run_search(tmp_path):
+    result = subprocess.run([sys.executable, "-c", SEARCH], cwd=ROOT, env=sqlite_env(tmp_path),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-4000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_user_search_on_sqlite(tmp_path):
+    pytest.importorskip("aiogram")
+    found = run_search(tmp_path)
+
+    assert found["ddl_matches"]
+    flat = [user_id for page in found["pages"] for user_id in page]
+    assert len(flat) == len(set(flat))  # sahifalar orasida takror yo'q
+    assert flat[0] == 1000  # username aynan "ali"
+    # username prefiksi -> ism prefiksi -> familiya prefiksi -> substring
+    usernames = {1000, 1004}
+    assert set(flat[:10]) == {uid + 6 * k for uid in usernames for k in range(5)}
+    assert {1002, 1005} <= set(flat)  # "Aliyev" familiya, "qalin" substring
+    assert found["ids"] == list(range(1000, 1010))  # "100" prefiksli ID lar
+    assert found["renamed"] == [1003]
+
+
+def test_bench_user_search_runs_on_sqlite(tmp_path):
+    pytest.importorskip("aiogram")
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_user_search", "--users", "2000", "--repeat", "2",
+         "--pages", "2", "--json"],
+        cwd=ROOT, env=sqlite_env(tmp_path), capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-4000:]
+    report = json.loads(result.stdout)
+    assert report["users"] == 2000 and report["queries"]["common prefix"]["pages"] >= 1